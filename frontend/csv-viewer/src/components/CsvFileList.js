@@ -6,11 +6,17 @@ function CsvFileList({ onSelectFile, refresh }) {
   const [files, setFiles] = useState([]);
 
   useEffect(() => {
-    axios.get(`${process.env.REACT_APP_API_BASE_URL}/api/list-csv-files/`, { headers: { 'X-API-KEY': process.env.REACT_APP_API_KEY } })
+    // The list is paginated, follow the next links of the Link header until the last page
+    const fetchPage = (url, previous) => axios.get(url, { headers: { 'X-API-KEY': process.env.REACT_APP_API_KEY } })
       .then(response => {
-        // Assuming the response is an array of objects with fileName as a key
-        setFiles(response.data);
-      })
+        // An array of objects with fileName as a key
+        const files = previous.concat(response.data);
+        const next = /<([^>]+)>;\s*rel="next"/.exec(response.headers.link || '');
+        return next ? fetchPage(next[1], files) : files;
+      });
+
+    fetchPage(`${process.env.REACT_APP_API_BASE_URL}/api/list-csv-files/?include_columns=false`, [])
+      .then(setFiles)
       .catch(error => console.error('Error fetching files', error));
   }, [refresh]);
 
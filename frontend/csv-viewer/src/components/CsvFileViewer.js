@@ -16,8 +16,8 @@ function CsvFileViewer({ fileName }) {
 
   const dataTypes = [
     'Int8', 'Int16', 'Int32', 'Int64',
-    'float16', 'float32', 'float64',
-    'complex64', 'complex128',
+    'float32', 'float64',
+    'complex128',
     'object', 'bool',
     'category', 'datetime64[ns]', 'timedelta64[ns]'
   ];
@@ -28,14 +28,30 @@ function CsvUpload({ onUploadSuccess }) {
         'X-API-KEY': process.env.REACT_APP_API_KEY,
       },
     })
-    .then(response => {
-      console.log(response.data);
-      onUploadSuccess(response.data);
+    .then(response => waitForJob(response.data))
+    .then(job => {
+      console.log(job);
+      onUploadSuccess(job);
       alert('File uploaded and processed successfully.');
     })
     .catch(error => console.error('Error uploading file', error));
   };
 
+  // The inference runs as a job, poll its status until it has finished
+  const waitForJob = (job) => {
+    if (job.status === 'succeeded') {
+      return Promise.resolve(job);
+    }
+    if (job.status === 'failed') {
+      return Promise.reject(new Error(job.error));
+    }
+    return new Promise(resolve => setTimeout(resolve, 1000))
+      .then(() => axios.get(job.statusUrl, {
+        headers: { 'X-API-KEY': process.env.REACT_APP_API_KEY },
+      }))
+      .then(response => waitForJob({ ...response.data, statusUrl: job.statusUrl }));
+  };
+
   return (
     <div>
       <Input type="file" onChange={handleFileSelect} />
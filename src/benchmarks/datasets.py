@@ -0,0 +1,137 @@
+"""
+Generates the synthetic CSV datasets of the benchmark suite. Every dataset is drawn from a seeded generator, so
+the same kind, rows and seed always give the same file and timings can be compared from one run to the next.
+"""
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+DATASETS = ('tall', 'wide', 'high_cardinality', 'dirty', 'dates', 'durations')
+WIDE_COLUMNS = 200
+
+
+def _dates(rng: np.random.Generator, rows: int) -> pd.Series:
+    seconds = rng.integers(0, 30 * 365 * 24 * 3600, rows)
+    return pd.Series(pd.Timestamp('1995-01-01') + pd.to_timedelta(seconds, unit='s'))
+
+
+def _with_missing(rng: np.random.Generator, values: pd.Series, proportion: float) -> pd.Series:
+    return values.astype(object).where(rng.random(len(values)) >= proportion, '')
+
+
+def _tall(rng: np.random.Generator, rows: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        'id': np.arange(rows),
+        'score': rng.normal(50, 15, rows).round(2),
+        'active': rng.choice(['True', 'False'], rows),
+        'grade': rng.choice(list('ABCDE'), rows),
+        'created': _dates(rng, rows).dt.strftime('%Y-%m-%d'),
+        'note': [f'note {value}' for value in rng.integers(0, rows, rows)],
+    })
+
+
+def _wide(rng: np.random.Generator, rows: int) -> pd.DataFrame:
+    columns = {}
+    for index in range(WIDE_COLUMNS):
+        kind = index % 4
+        if kind == 0:
+            columns[f'int_{index}'] = rng.integers(0, 1000, rows)
+        elif kind == 1:
+            columns[f'float_{index}'] = rng.random(rows).round(4)
+        elif kind == 2:
+            columns[f'category_{index}'] = rng.choice(['red', 'green', 'blue', 'yellow'], rows)
+        else:
+            columns[f'flag_{index}'] = rng.choice(['yes', 'no'], rows)
+    return pd.DataFrame(columns)
+
+
+def _high_cardinality(rng: np.random.Generator, rows: int) -> pd.DataFrame:
+    # UUID shaped rather than bare hex: pandas' float parser crashes on a run of digits, an 'e' and an exponent
+    # too long for an int, which a 16 digit hex key can be
+    return pd.DataFrame({
+        'key': [str(uuid.UUID(bytes=rng.bytes(16))) for _ in range(rows)],
+        'email': [f'user{value}@example.com' for value in rng.permutation(rows)],
+        'city': [f'city {value}' for value in rng.integers(0, max(rows // 2, 1), rows)],
+        'amount': rng.integers(-10 ** 12, 10 ** 12, rows),
+    })
+
+
+def _dirty(rng: np.random.Generator, rows: int) -> pd.DataFrame:
+    junk = np.array(['n/a', '?', '--', 'unknown', ' '])
+    numbers = pd.Series(rng.integers(0, 10000, rows).astype(str))
+    numbers = numbers.where(rng.random(rows) >= 0.1, rng.choice(junk, rows))
+    dates = _dates(rng, rows)
+    mixed_dates = np.where(rng.random(rows) < 0.5, dates.dt.strftime('%Y-%m-%d'), dates.dt.strftime('%d/%m/%Y'))
+    complex_values = [f'{real}+{imag}j' for real, imag in zip(rng.integers(0, 100, rows), rng.integers(0, 100, rows))]
+    return pd.DataFrame({
+        'quantity': numbers,
+        'price': _with_missing(rng, pd.Series(rng.random(rows).round(2) * 100).astype(str).str.pad(8), 0.2),
+        'answer': rng.choice(['yes', 'no', 'Y', 'N', 'True', 'false', '1', '0', 'maybe'], rows),
+        'when': _with_missing(rng, pd.Series(mixed_dates), 0.05),
+        'signal': np.where(rng.random(rows) < 0.7, complex_values, rng.choice(junk, rows)),
+        'comment': _with_missing(rng, pd.Series(rng.choice(['ok', 'late', 'lost', 'returned'], rows)), 0.3),
+    })
+
+
+def _dates_heavy(rng: np.random.Generator, rows: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        'iso': _dates(rng, rows).dt.strftime('%Y-%m-%d'),
+        'day_first': _dates(rng, rows).dt.strftime('%d/%m/%Y'),
+        'timestamp': _dates(rng, rows).dt.strftime('%Y-%m-%dT%H:%M:%S'),
+        'written': _dates(rng, rows).dt.strftime('%b %d, %Y'),
+        'month_first': _with_missing(rng, _dates(rng, rows).dt.strftime('%m-%d-%Y %H:%M'), 0.1),
+    })
+
+
+def _durations(rng: np.random.Generator, rows: int) -> pd.DataFrame:
+    seconds = rng.integers(0, 100000, rows)
+    hours, minutes = seconds // 3600, seconds // 60 % 60
+    return pd.DataFrame({
+        'clock': [f'{h:02d}:{m:02d}:{s % 60:02d}' for h, m, s in zip(hours, minutes, seconds)],
+        'short': [f'{h}h {m}m' for h, m in zip(hours, minutes)],
+        'days': [f'{value} days' for value in seconds // 86400],
+        'iso': [f'PT{h}H{m}M' for h, m in zip(hours, minutes)],
+        # Shapes only pytimeparse understands
+        'spoken': [f'{value} weeks' if value % 2 else f'{value} hrs' for value in rng.integers(1, 50, rows)],
+    })
+
+
+GENERATORS = {
+    'tall': _tall,
+    'wide': _wide,
+    'high_cardinality': _high_cardinality,
+    'dirty': _dirty,
+    'dates': _dates_heavy,
+    'durations': _durations,
+}
+
+
+def generate(kind: str, rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generates a synthetic dataset.
+
+    Args:
+    - kind: One of DATASETS.
+    - rows: The number of rows.
+    - seed: The seed of the random generator, the same seed always gives the same data.
+
+    Returns:
+    - The dataset as a DataFrame.
+    """
+    if kind not in GENERATORS:
+        raise ValueError(f"Unknown dataset '{kind}', expected one of {', '.join(DATASETS)}.")
+    return GENERATORS[kind](np.random.default_rng(seed), rows)
+
+
+def write_dataset(kind: str, directory: str, rows: int, seed: int = 0) -> str:
+    """
+    Writes a synthetic dataset to <directory>/<kind>.csv.
+
+    Returns:
+    - The path to the CSV file.
+    """
+    file_path = os.path.join(directory, f'{kind}.csv')
+    generate(kind, rows, seed).to_csv(file_path, index=False)
+    return file_path
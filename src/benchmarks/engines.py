@@ -0,0 +1,61 @@
+"""
+Compares the 'c' and 'pyarrow' CSV engines of DataFrameTypeInferencer on a corpus of CSV files, timing the
+read, the type inference and the conversion of each file.
+
+Usage, from the src directory:
+    python -m benchmarks.engines [csv_dir] [--repeat N] [--chunk-size N]
+"""
+import argparse
+import os
+import time
+
+from cleaner.inferencer import DataFrameTypeInferencer
+from cleaner.readers import CSV_ENGINES, pa
+
+
+def time_engine(file_path: str, engine: str, chunk_size: int, repeat: int):
+    """
+    Times one engine on one file.
+
+    Returns:
+        Dict[str, float]: The best read, inference and conversion times in seconds over the repeats.
+    """
+    timings = {'read': [], 'infer': [], 'convert': []}
+    for _ in range(repeat):
+        inference = DataFrameTypeInferencer(file_path, chunk_size=chunk_size, engine=engine)
+
+        start = time.perf_counter()
+        for _ in inference.read_chunks():
+            pass
+        timings['read'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        type_map = inference.sample_and_infer_types()
+        timings['infer'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for chunk in inference.read_chunks():
+            inference.convert_chunk(chunk, type_map)
+        timings['convert'].append(time.perf_counter() - start)
+    return {stage: min(values) for stage, values in timings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('csv_dir', nargs='?', default=os.path.join(os.path.dirname(__file__), '..', 'csv'))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--chunk-size', type=int, default=1000000)
+    args = parser.parse_args()
+
+    engines = CSV_ENGINES if pa is not None else ('c',)
+    files = sorted(file for file in os.listdir(args.csv_dir) if file.endswith('.csv'))
+
+    print(f"{'file':<30}{'engine':<10}{'read (s)':>10}{'infer (s)':>11}{'convert (s)':>13}")
+    for file in files:
+        for engine in engines:
+            timings = time_engine(os.path.join(args.csv_dir, file), engine, args.chunk_size, args.repeat)
+            print(f"{file:<30}{engine:<10}{timings['read']:>10.3f}{timings['infer']:>11.3f}{timings['convert']:>13.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Compares streaming a workbook through ExcelReader with loading it whole with pandas.read_excel, timing the
+type inference and the conversion of each path and tracing their peak memory. Without a workbook, one of
+--rows rows is generated in a temporary directory first.
+
+Usage, from the src directory:
+    python -m benchmarks.excel [workbook] [--rows N] [--chunk-size N] [--sample-size N]
+"""
+import argparse
+import datetime
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from cleaner.inferencer import DataFrameTypeInferencer
+from cleaner.readers import openpyxl
+from cleaner.sinks import pq
+
+
+def write_workbook(file_path: str, rows: int):
+    """
+    Writes a workbook of rows rows of integer, float, date, category and text columns.
+    """
+    book = openpyxl.Workbook(write_only=True)
+    sheet = book.create_sheet()
+    sheet.append(['id', 'score', 'day', 'grade', 'note'])
+    start = datetime.datetime(2020, 1, 1)
+    for i in range(rows):
+        sheet.append([i, i * 0.25, start + datetime.timedelta(minutes=i), 'ABCDE'[i % 5], f'note {i}'])
+    book.save(file_path)
+
+
+def full_load(file_path: str, chunk_size: int, sample_size: int):
+    """
+    Infers and converts the workbook the way it was before it was streamed: loaded whole with read_excel, then
+    sampled and converted in memory.
+    """
+    inference = DataFrameTypeInferencer(file_path, chunk_size=chunk_size, sample_size=sample_size)
+    df = pd.read_excel(file_path)
+    sampled_df = df if len(df) < inference.sample_size else \
+        df.sample(n=inference.sample_size, random_state=inference.random_state)
+    type_map = {col: inference.infer_dtype(sampled_df[col]) for col in sampled_df.columns}
+    return inference.convert_chunk(df, type_map)
+
+
+def streamed(file_path: str, chunk_size: int, sample_size: int):
+    """
+    Infers and converts the workbook chunk by chunk, as the inference jobs do, writing the typed chunks to a
+    Parquet file when pyarrow is installed.
+    """
+    inference = DataFrameTypeInferencer(file_path, chunk_size=chunk_size, sample_size=sample_size)
+    type_map = inference.sample_and_infer_types()
+    if pq is None:
+        return inference.convert_df_dtypes(type_map)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        return inference.convert_to_file(type_map, os.path.join(temp_dir, 'benchmark.parquet'))
+
+
+def measure(run, file_path: str, chunk_size: int, sample_size: int):
+    """
+    Runs one path under tracemalloc.
+
+    Returns:
+        Tuple[float, float]: The time in seconds and the peak traced memory in MiB.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        run(file_path, chunk_size, sample_size)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak / (1 << 20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('workbook', nargs='?')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    parser.add_argument('--sample-size', type=int, default=100000)
+    args = parser.parse_args()
+
+    if openpyxl is None:
+        parser.error("openpyxl is not installed")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = args.workbook
+        if file_path is None:
+            file_path = os.path.join(temp_dir, 'benchmark.xlsx')
+            write_workbook(file_path, args.rows)
+
+        print(f"{'path':<12}{'time (s)':>10}{'peak (MiB)':>12}")
+        for name, run in (('read_excel', full_load), ('streamed', streamed)):
+            elapsed, peak = measure(run, file_path, args.chunk_size, args.sample_size)
+            print(f"{name:<12}{elapsed:>10.3f}{peak:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""
+Times every check_* function of the type checker, sample_and_infer_types, convert_df_dtypes and the type-infer
+endpoint on the synthetic datasets of benchmarks.datasets, and saves the timings to a JSON file. Given a
+baseline saved by an earlier run, it exits with status 1 when a timing regressed past the threshold.
+
+Usage, from the src directory:
+    python -m benchmarks.suite [--rows N] [--repeat N] [--output results.json]
+                               [--baseline baseline.json] [--threshold 1.5] [--min-seconds 0.1]
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+
+from benchmarks.datasets import DATASETS, write_dataset
+from cleaner import type_checker
+from cleaner.inferencer import DataFrameTypeInferencer
+
+# Rows of each dataset as a fraction of --rows, the wide one has WIDE_COLUMNS columns
+DATASET_SCALE = {
+    'tall': 1.0,
+    'wide': 0.05,
+    'high_cardinality': 0.5,
+    'dirty': 0.5,
+    'dates': 0.2,
+    'durations': 0.2,
+}
+SUITES = ('checks', 'inference', 'endpoint')
+
+CHECKS = {name: function for name, function in inspect.getmembers(type_checker, inspect.isfunction)
+          if name.startswith('check_') and function.__module__ == type_checker.__name__}
+
+
+def best_time(function: Callable[[], object], repeat: int) -> float:
+    """
+    Returns the best wall time of function in seconds over repeat calls.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def time_checks(file_path: str, repeat: int) -> Dict[str, float]:
+    """
+    Times each check function on every column of a dataset, read as text and without missing values the way
+    infer_dtype hands the columns to the checks.
+    """
+    df = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+    columns = [df[col].loc[df[col].str.strip() != ''] for col in df.columns]
+    return {name: best_time(lambda: [check(values, threshold=0.5) for values in columns], repeat)
+            for name, check in CHECKS.items()}
+
+
+def time_inference(file_path: str, repeat: int) -> Dict[str, float]:
+    """
+    Times the sampling and inference, and the conversion, of a dataset.
+    """
+    inference = DataFrameTypeInferencer(file_path)
+    type_map = inference.sample_and_infer_types()
+    return {
+        'sample_and_infer_types': best_time(lambda: DataFrameTypeInferencer(file_path).sample_and_infer_types(),
+                                            repeat),
+        'convert_df_dtypes': best_time(lambda: inference.convert_df_dtypes(type_map), repeat),
+    }
+
+
+def time_endpoint(file_paths: Dict[str, str], repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Times uploads of each dataset to the type-infer endpoint, with the job run inline in the request and the
+    inference cache off, against a throwaway test database.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    django.setup()
+    from django.conf import settings
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+    from django.urls import reverse
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    client = Client()
+    url = reverse('cleaner-type-infer')
+
+    def upload(file_path):
+        with open(file_path, 'rb') as file:
+            response = client.post(url, {'document': file}, HTTP_X_API_KEY=settings.API_KEY)
+        if response.status_code != 202:
+            raise RuntimeError(f"Upload of {file_path} failed with status {response.status_code}.")
+
+    try:
+        with tempfile.TemporaryDirectory() as upload_dir, \
+                override_settings(CSV_FILES_DIR=upload_dir, INFERENCE_JOB_WORKERS=0, INFERENCE_CACHE_MAX_ENTRIES=0):
+            return {kind: {'type_infer': best_time(lambda: upload(file_path), repeat)}
+                    for kind, file_path in file_paths.items()}
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def run(rows: int, repeat: int, seed: int = 0, suites=SUITES) -> Dict[str, object]:
+    """
+    Generates the datasets and runs the suites on them.
+
+    Returns:
+    - A dict of the run parameters under 'meta', and the timings in seconds under 'timings', keyed by
+      '<dataset>.<timed function>'.
+    """
+    timings = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        file_paths = {kind: write_dataset(kind, data_dir, max(int(rows * DATASET_SCALE[kind]), 1), seed)
+                      for kind in DATASETS}
+        results = {kind: {} for kind in DATASETS}
+        for kind, file_path in file_paths.items():
+            if 'checks' in suites:
+                results[kind].update(time_checks(file_path, repeat))
+            if 'inference' in suites:
+                results[kind].update(time_inference(file_path, repeat))
+        if 'endpoint' in suites:
+            for kind, endpoint_timings in time_endpoint(file_paths, repeat).items():
+                results[kind].update(endpoint_timings)
+
+    for kind, kind_timings in results.items():
+        for name, seconds in kind_timings.items():
+            timings[f'{kind}.{name}'] = round(seconds, 6)
+    return {
+        'meta': {
+            'rows': rows,
+            'repeat': repeat,
+            'seed': seed,
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+        },
+        'timings': timings,
+    }
+
+
+def compare(timings: Dict[str, float], baseline: Dict[str, float], threshold: float = 1.5,
+            min_seconds: float = 0.1) -> List[Tuple[str, float, float]]:
+    """
+    Finds the timings that regressed compared with a baseline.
+
+    Args:
+    - timings: The timings of this run.
+    - baseline: The timings of the baseline run, timings missing from either run are skipped.
+    - threshold: The ratio to the baseline timing above which a timing has regressed.
+    - min_seconds: The smallest slowdown in seconds counted as a regression, so that noise on very short
+                   timings is not reported.
+
+    Returns:
+    - The (name, baseline seconds, seconds) of each regressed timing.
+    """
+    regressions = []
+    for name, seconds in timings.items():
+        if name not in baseline:
+            continue
+        previous = baseline[name]
+        if seconds > previous * threshold and seconds - previous > min_seconds:
+            regressions.append((name, previous, seconds))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--suites', default=','.join(SUITES), help=f"Comma separated, of {', '.join(SUITES)}.")
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--baseline')
+    parser.add_argument('--threshold', type=float, default=1.5)
+    parser.add_argument('--min-seconds', type=float, default=0.1)
+    args = parser.parse_args()
+
+    suites = args.suites.split(',')
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    baseline = {}
+    if args.baseline:
+        # Read first, the output may replace it
+        with open(args.baseline) as file:
+            baseline_results = json.load(file)
+        if baseline_results['meta']['rows'] != args.rows:
+            parser.error(f"the baseline was run with --rows {baseline_results['meta']['rows']}")
+        baseline = baseline_results['timings']
+
+    results = run(args.rows, args.repeat, args.seed, suites)
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+
+    print(f"{'timing':<50}{'seconds':>10}{'baseline':>10}")
+    for name, seconds in sorted(results['timings'].items()):
+        previous = f"{baseline[name]:>10.3f}" if name in baseline else f"{'':>10}"
+        print(f"{name:<50}{seconds:>10.3f}{previous}")
+
+    regressions = compare(results['timings'], baseline, args.threshold, args.min_seconds)
+    for name, previous, seconds in regressions:
+        print(f"REGRESSION {name}: {previous:.3f}s -> {seconds:.3f}s ({seconds / previous:.1f}x)", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype
+
+# Separates the values of a text column in its packed buffer
+VALUE_SEPARATOR = '\x00'
+
+
+def pack_column(column: pd.Series) -> Dict[str, Any]:
+    """
+    Packs a column into compact buffers that pickle cheaply to a worker process: NumPy columns as their
+    array, text columns as one UTF-8 buffer of separated values plus a null mask. Anything else is shipped
+    as the Series itself: Arrow-backed columns pickle as their Arrow buffers, and object columns mixing text
+    and numbers keep their values.
+
+    Args:
+    - column: The pandas Series to pack.
+
+    Returns:
+    - A dictionary to be rebuilt into the same Series with unpack_column.
+    """
+    packed = {'name': column.name, 'dtype': str(column.dtype)}
+    if isinstance(column.dtype, np.dtype) and column.dtype != object:
+        packed['values'] = column.to_numpy()
+        return packed
+
+    if column.dtype == object and infer_dtype(column, skipna=True) in ('string', 'empty'):
+        mask = column.isna().to_numpy()
+        values = column[~mask].tolist()
+        text = VALUE_SEPARATOR.join(values)
+        # A separator inside a value would split it in two, such columns are shipped as they are
+        if text.count(VALUE_SEPARATOR) == max(len(values) - 1, 0):
+            packed['text'] = text.encode('utf-8')
+            packed['mask'] = np.packbits(mask)
+            packed['length'] = len(mask)
+            return packed
+
+    packed['series'] = column.reset_index(drop=True)
+    return packed
+
+
+def unpack_column(packed: Dict[str, Any]) -> pd.Series:
+    """
+    Rebuilds a column packed with pack_column, with a default RangeIndex.
+    """
+    if 'values' in packed:
+        return pd.Series(packed['values'], name=packed['name'])
+    if 'series' in packed:
+        return packed['series']
+
+    mask = np.unpackbits(packed['mask'], count=packed['length']).astype(bool)
+    values = np.full(packed['length'], np.nan, dtype=object)
+    if not mask.all():
+        values[~mask] = packed['text'].decode('utf-8').split(VALUE_SEPARATOR)
+    return pd.Series(values, name=packed['name'])
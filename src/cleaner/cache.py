@@ -0,0 +1,80 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import InferenceCacheEntry
+
+# Inference parameters that change the inferred types. The worker count does not, and the dialect is sniffed
+# from the content the digest already covers.
+FINGERPRINT_KEYS = ('chunk_size', 'sample_size', 'sample_size_per_chunk', 'random_state', 'valid_threshold',
+                    'category_threshold', 'engine', 'memory_budget')
+
+
+def config_fingerprint(config: Dict[str, Any]) -> str:
+    """
+    Computes the fingerprint of the inference parameters that change the result.
+
+    Args:
+    - config: The DataFrameTypeInferencer parameters.
+
+    Returns:
+    - The hex SHA-256 digest of the parameters, as canonical JSON.
+    """
+    params = {key: config.get(key) for key in FINGERPRINT_KEYS}
+    # The engine defaults to the C parser, a config without one infers the same types as one naming it
+    params['engine'] = params['engine'] or 'c'
+    # Without a budget the sizes are the ones given, left out so fingerprints from before budgets still match
+    if params['memory_budget'] is None:
+        del params['memory_budget']
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def lookup(digest: str, config: Dict[str, Any]) -> Optional[InferenceCacheEntry]:
+    """
+    Finds the cached result of a file content and inference parameters, marking it as recently used.
+
+    Args:
+    - digest: The hex SHA-256 digest of the file.
+    - config: The DataFrameTypeInferencer parameters.
+
+    Returns:
+    - The InferenceCacheEntry, or None if there is none or the cache is disabled.
+    """
+    if not digest or settings.INFERENCE_CACHE_MAX_ENTRIES <= 0:
+        return None
+
+    entry = InferenceCacheEntry.objects.filter(digest=digest, config_fingerprint=config_fingerprint(config)).first()
+    if entry is not None:
+        InferenceCacheEntry.objects.filter(pk=entry.pk).update(hits=F('hits') + 1, last_used_at=timezone.now())
+    return entry
+
+
+def store(digest: str, config: Dict[str, Any], type_map: Dict[str, str], columns: List[Dict[str, str]]):
+    """
+    Caches the result of a file content and inference parameters, then evicts the least recently used entries
+    beyond INFERENCE_CACHE_MAX_ENTRIES.
+
+    Args:
+    - digest: The hex SHA-256 digest of the file.
+    - config: The DataFrameTypeInferencer parameters.
+    - type_map: The inferred data type of each column.
+    - columns: The description of the converted columns.
+    """
+    if not digest or settings.INFERENCE_CACHE_MAX_ENTRIES <= 0:
+        return
+
+    entry, created = InferenceCacheEntry.objects.get_or_create(digest=digest,
+                                                               config_fingerprint=config_fingerprint(config))
+    entry.set_type_map(type_map)
+    entry.set_columns_data(columns)
+    entry.last_used_at = timezone.now()
+    entry.save()
+
+    stale = InferenceCacheEntry.objects.order_by('-last_used_at', '-pk').values_list('pk', flat=True)
+    stale = list(stale[settings.INFERENCE_CACHE_MAX_ENTRIES:])
+    if stale:
+        InferenceCacheEntry.objects.filter(pk__in=stale).delete()
@@ -1,12 +1,41 @@
 import pandas as pd
 import numpy as np
-import warnings
+import logging
 import os
-from collections import Counter
-from typing import Any, Dict
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+from pandas.api.types import union_categoricals
 from cleaner.type_checker import check_boolean, check_numeric, check_complex, check_datetime, check_category, \
-    check_timedelta, try_parse_timedelta, try_parse_date
+    check_timedelta, infer_datetime_formats, guess_datetime_formats, parse_datetimes, parse_timedeltas, \
+    parse_complex
 from cleaner.utils import zip_float_dtype, zip_float_to_int_dtype, zip_int_dtype
+from cleaner.sketches import ReservoirSampler
+from cleaner.profiler import profile_column
+from cleaner.sinks import TypedFileWriter, pq
+from cleaner.buffers import pack_column, unpack_column
+from cleaner.readers import ParallelCsvReader, ArrowCsvReader, ExcelReader, EXCEL_EXTENSIONS
+from cleaner.sniffer import CsvDialect, sniff_csv
+from cleaner.metrics import PhaseProfile
+from cleaner.memory import MEMORY_PROBE_ROWS, budget_rows, peak_rss, row_size
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_SIZE = 1000000
+# Data types columns can be converted to and written to a typed file as, the ones a user may re-type a column to
+CONVERTIBLE_DTYPES = ('Int8', 'Int16', 'Int32', 'Int64', 'float32', 'float64', 'complex128', 'bool', 'category',
+                      'datetime64[ns]', 'timedelta64[ns]', 'object')
+# Most processes a file is parsed and its columns are inferred in, whatever the workers asked for
+MAX_WORKERS = os.cpu_count() or 1
+
+# Kind of values each check looks for, used to rule checks out from the column profile
+CHECK_KINDS = {
+    check_boolean: 'bool',
+    check_numeric: 'numeric',
+    check_complex: 'complex',
+    check_datetime: 'datetime',
+    check_timedelta: 'timedelta',
+}
 
 
 class DataFrameTypeInferencer:
@@ -16,24 +45,52 @@ class DataFrameTypeInferencer:
     Attributes:
         file_path (str): The path to the CSV or Excel file.
         chunk_size (int): The size of chunks for processing large files. Default is 1,000,000.
-        sample_size_per_chunk (int): Number of samples to take per chunk for type inference.
+        sample_size (int): Total number of rows sampled from the whole file for type inference.
+        sample_size_per_chunk (int): Deprecated, used as the total sample size when sample_size is not given.
         random_state (int): Seed for the random number generator.
         valid_threshold (float): Threshold for considering a data type valid (default is 0.5).
         category_threshold (float): Threshold for considering categorization (default is 0.5).
+        datetime_formats (Dict[str, List[str]]): Datetime formats detected per column during inference.
+        workers (int): Number of processes the file is parsed and the columns are inferred in, 1 does everything
+                       in this process, at most MAX_WORKERS.
+        engine (str): The CSV parser, 'c' for the pandas C parser or 'pyarrow' for the multithreaded pyarrow.csv
+                      parser with Arrow-backed string columns.
+        dialect (CsvDialect): The encoding and dialect of the CSV file, sniffed on the first read when not given.
+        progress_callback (Callable): Called with the stage ('sampling', 'inferring' or 'converting'), the rows
+                                      processed and the total rows when known.
+        row_count (int): Number of data rows in the file, known once it has been sampled.
+        profile (PhaseProfile): Wall time, rows and bytes of the reads, sampling, checks and conversions so far.
+        memory_budget (int): Bytes the reading, sampling and conversion should stay within. When given, the
+                             chunk size and sample size are derived from it and the row size measured on the
+                             first rows, in place of chunk_size and sample_size.
     """
 
     def __init__(self, file_path: str, chunk_size: int = 1000000,
-                 sample_size_per_chunk: int = 1000000, random_state: int = 0,
-                 valid_threshold: float = 0.5, category_threshold: float = 0.5):
+                 sample_size_per_chunk: Optional[int] = None, random_state: int = 0,
+                 valid_threshold: float = 0.5, category_threshold: float = 0.5,
+                 sample_size: Optional[int] = None, workers: int = 1,
+                 engine: str = 'c', dialect: Optional[CsvDialect] = None,
+                 progress_callback: Optional[Callable[[str, int, Optional[int]], None]] = None,
+                 profile: Optional[PhaseProfile] = None, memory_budget: Optional[int] = None):
         """
         Initializes the DataFrameTypeInferencer with file path and processing parameters.
         """
         self.file_path = file_path
         self.chunk_size = chunk_size
+        self.sample_size = sample_size or sample_size_per_chunk or DEFAULT_SAMPLE_SIZE
         self.sample_size_per_chunk = sample_size_per_chunk
         self.random_state = random_state
         self.valid_threshold = valid_threshold
         self.category_threshold = category_threshold
+        self.datetime_formats: Dict[str, List[str]] = {}
+        self.workers = max(1, min(workers, MAX_WORKERS))
+        self.engine = engine
+        self.dialect = dialect
+        self.progress_callback = progress_callback
+        self.row_count: Optional[int] = None
+        self.profile = profile if profile is not None else PhaseProfile()
+        self.memory_budget = memory_budget
+        self._budget_applied = False
 
     def infer_dtype(self, column: pd.Series) -> str:
         """
@@ -44,12 +101,26 @@ class DataFrameTypeInferencer:
         if len(valid_values) == 0:
             return 'object'
 
-        if str(column.dtype) == 'object':
+        if str(column.dtype) in ('object', 'string'):
+            # One profiling pass rules out the checks no value could pass, before any parser runs
+            with self.profile.phase('profile', column.name) as record:
+                profile = profile_column(valid_values)
+                record.rows += len(valid_values)
             for check in (check_boolean, check_numeric, check_complex, check_datetime, check_timedelta, check_category):
-                if check is check_category:
-                    dtype = check(valid_values)
-                else:
-                    dtype = check(valid_values, threshold=self.valid_threshold)
+                if check in CHECK_KINDS and not profile.could_be(CHECK_KINDS[check], self.valid_threshold):
+                    continue
+                with self.profile.phase(check.__name__, column.name) as record:
+                    record.rows += len(valid_values)
+                    if check is check_category:
+                        dtype = check(valid_values, threshold=self.category_threshold)
+                    elif check is check_datetime:
+                        # Keep the detected formats so the conversion can reuse them
+                        formats = infer_datetime_formats(valid_values, threshold=self.valid_threshold)
+                        if formats is not None:
+                            self.datetime_formats[column.name] = formats
+                        dtype = None if formats is None else 'datetime64[ns]'
+                    else:
+                        dtype = check(valid_values, threshold=self.valid_threshold)
                 if dtype is not None:
                     return dtype
         elif str(column.dtype).lower() in ['int8', 'int16', 'int32', 'int64']:
@@ -62,83 +133,303 @@ class DataFrameTypeInferencer:
             return dtype
         return 'object'
 
+    def _report_progress(self, stage: str, rows: int, total: Optional[int] = None):
+        if self.progress_callback is not None:
+            self.progress_callback(stage, rows, total)
+
+    def apply_memory_budget(self):
+        """
+        Sizes the chunks and the sample to the memory budget, from the size of the first rows of the file. A
+        file parsed by a pool of workers has several chunks in flight, so its chunks are smaller. The pyarrow
+        engine parses the whole file into Arrow memory first, only its pandas chunks are sized.
+        """
+        if self.memory_budget is None or self._budget_applied:
+            return
+        self._budget_applied = True
+        if self.file_path.endswith(EXCEL_EXTENSIONS):
+            probe = next(iter(ExcelReader(self.file_path, chunk_size=MEMORY_PROBE_ROWS)))
+        else:
+            if self.dialect is None:
+                self.dialect = sniff_csv(self.file_path)
+            probe = pd.read_csv(self.file_path, nrows=MEMORY_PROBE_ROWS, **self.dialect.read_csv_kwargs())
+        chunks_in_flight = 2 * self.workers + 1 if self.workers > 1 and self.engine != 'pyarrow' else 1
+        self.chunk_size, self.sample_size = budget_rows(self.memory_budget, row_size(probe), chunks_in_flight)
+        logger.info("Chunks of %s rows and a sample of %s rows for %s within %s bytes", self.chunk_size,
+                    self.sample_size, self.file_path, self.memory_budget)
+
+    def _open_reader(self) -> Iterator[pd.DataFrame]:
+        if self.file_path.endswith(EXCEL_EXTENSIONS):
+            # Rows are streamed from the workbook, so it goes through the same chunked path as a CSV file
+            return iter(ExcelReader(self.file_path, chunk_size=self.chunk_size))
+        if self.dialect is None:
+            # Sniffed once, every later read of the file reuses it
+            self.dialect = sniff_csv(self.file_path)
+        if self.engine == 'pyarrow':
+            # Multithreaded already, the workers are left to the column inference
+            return iter(ArrowCsvReader(self.file_path, chunk_size=self.chunk_size, dialect=self.dialect))
+        if self.workers > 1 and self.dialect.escapechar is None and self.dialect.encoding != 'utf-16':
+            # Byte ranges of the file are parsed in worker processes and come back in file order
+            return self._read_in_workers(ParallelCsvReader(self.file_path, self.workers, chunk_size=self.chunk_size,
+                                                           **self.dialect.read_csv_kwargs()))
+        return pd.read_csv(self.file_path, chunksize=self.chunk_size, low_memory=True,
+                           **self.dialect.read_csv_kwargs())
+
+    def read_chunks(self) -> Iterator[pd.DataFrame]:
+        """
+        Reads the CSV file or workbook in chunks of chunk_size rows, or about as many when parsed in parallel,
+        without the 'Unnamed' index columns.
+        """
+        self.apply_memory_budget()
+        reader = self._open_reader()
+        while True:
+            with self.profile.phase('read') as record:
+                chunk = next(reader, None)
+                if chunk is not None:
+                    record.rows += len(chunk)
+            if chunk is None:
+                break
+            yield chunk.loc[:, ~chunk.columns.astype(str).str.contains('^Unnamed')]
+        self.profile.record('read').bytes += os.path.getsize(self.file_path)
+
     def sample_and_infer_types(self) -> Dict[str, str]:
         """
         Samples the DataFrame and infers data types for each column.
         """
-        sampled_df = pd.DataFrame()
-
-        if self.file_path.endswith('.csv'):
-            try:
-                reader = pd.read_csv(self.file_path, chunksize=self.chunk_size, low_memory=True)
-            except UnicodeDecodeError:
-                reader = pd.read_csv(self.file_path, chunksize=self.chunk_size, low_memory=True, encoding='unicode_escape')
-
-            for chunk in reader:
-                if len(chunk) < self.sample_size_per_chunk:
-                    sampled_chunk = chunk  # Take the whole chunk if it's smaller than the sample size
-                else:
-                    sampled_chunk = chunk.sample(n=self.sample_size_per_chunk, random_state=self.random_state)
-                sampled_chunk = sampled_chunk.loc[:, ~sampled_chunk.columns.str.contains('^Unnamed')]
-                sampled_df = pd.concat([sampled_df, sampled_chunk], ignore_index=True)
-
-        elif self.file_path.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(file_path)
-            if len(df) < self.sample_size_per_chunk:
-                sampled_df = df
-            else:
-                sampled_df = df.sample(n=self.sample_size_per_chunk, random_state=self.random_state)
-            sampled_df = sampled_df.loc[:, ~sampled_df.columns.str.contains('^Unnamed')]
+        self.apply_memory_budget()
+        if self.file_path.endswith(('.csv',) + EXCEL_EXTENSIONS):
+            # A fixed-size sample over the whole stream, so memory does not grow with the file
+            sampler = ReservoirSampler(self.sample_size, random_state=self.random_state)
+            for chunk in self.read_chunks():
+                with self.profile.phase('sample') as record:
+                    sampler.update(chunk)
+                    record.rows += len(chunk)
+                self._report_progress('sampling', sampler.seen)
+            sampled_df = sampler.result()
+            self.row_count = sampler.seen
         else:
             raise ValueError("Unsupported file format.")
 
-        type_map = {col: self.infer_dtype(sampled_df[col]) for col in sampled_df.columns}
+        self._report_progress('inferring', 0, self.row_count)
+        # The checks of each column are timed as phases of their own when inferred in this process
+        with self.profile.phase('infer') as record:
+            if self.workers > 1 and len(sampled_df.columns) > 1:
+                type_map = self.infer_dtypes_in_parallel(sampled_df)
+            else:
+                type_map = {col: self.infer_dtype(sampled_df[col]) for col in sampled_df.columns}
+            record.rows += len(sampled_df)
 
         return type_map
 
-    def convert_df_dtypes(self, type_map: Dict[str, str]) -> pd.DataFrame:
+    def infer_dtypes_in_parallel(self, df: pd.DataFrame) -> Dict[str, str]:
         """
-        Converts the DataFrame columns to the inferred data types.
+        Infers the data types of the columns of a DataFrame in a pool of worker processes. Columns are shipped as
+        compact buffers and the results are collected in column order, so the type_map and datetime formats are
+        the same as when inferring in this process.
         """
+        tasks = ((pack_column(df[col]), self.valid_threshold, self.category_threshold) for col in df.columns)
+        # Spawned workers do not inherit the threads and open connections of a forked server process
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(df.columns)), mp_context=context) as executor:
+            results = list(executor.map(_infer_packed_column, tasks))
+
+        type_map = {}
+        worker_peaks = {}
+        for col, (dtype, formats, pid, worker_peak) in zip(df.columns, results):
+            type_map[col] = dtype
+            if formats is not None:
+                self.datetime_formats[col] = formats
+            if worker_peak is not None:
+                worker_peaks[pid] = max(worker_peaks.get(pid, 0), worker_peak)
+        self.profile.add_worker_peaks(worker_peaks)
+        return type_map
+
+    def _read_in_workers(self, reader: ParallelCsvReader) -> Iterator[pd.DataFrame]:
         try:
-            df = pd.read_csv(self.file_path, low_memory=True)
-        except UnicodeDecodeError:
-            df = pd.read_csv(self.file_path, low_memory=True, encoding='unicode_escape')
+            yield from reader
+        finally:
+            self.profile.add_worker_peaks(reader.worker_peak_rss)
 
-        df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
+    def convert_column(self, column: str, values: pd.Series, dtype: str) -> pd.Series:
+        """
+        Converts the values of a column to its inferred data type. Values that cannot be represented in
+        that type become missing values.
+        """
+        if dtype == 'datetime64[ns]':
+            formats = self.datetime_formats.get(column) or guess_datetime_formats(values)
+            return parse_datetimes(values, formats)[0]
+        elif dtype == 'timedelta64[ns]':
+            return parse_timedeltas(values)
+        elif dtype == 'category':
+            return values.astype('category')
+        elif dtype in ['Int8', 'Int16', 'Int32', 'Int64']:
+            numeric = pd.to_numeric(values, errors='coerce')
+            # Chunks other than the sampled rows may hold fractions or values out of the inferred range
+            limits = np.iinfo(dtype.lower())
+            numeric = numeric.where((numeric % 1 == 0) & numeric.between(limits.min, limits.max))
+            return numeric.astype(dtype)
+        elif dtype in ['float32', 'float64']:
+            return pd.to_numeric(values, errors='coerce').astype(dtype)
+        elif dtype == 'bool':
+            return values.astype('bool')
+        elif dtype == 'complex128':
+            return parse_complex(values)
+        elif dtype == 'object' and isinstance(values.dtype, pd.StringDtype):
+            # Text read by the pyarrow engine stays Arrow-backed rather than becoming Python strings
+            return values
+        else:
+            return values.astype(dtype)
 
-        print('###### BEFORE CONVERSION')
-        print(df.dtypes)
-        print('\n\n')
+    def convert_chunk(self, chunk: pd.DataFrame, type_map: Dict[str, str]) -> pd.DataFrame:
+        """
+        Converts the columns of a chunk to the inferred data types.
+        """
+        with self.profile.phase('convert') as record:
+            chunk = chunk.copy()
+            for column, dtype in type_map.items():
+                # noinspection PyBroadException
+                try:
+                    chunk[column] = self.convert_column(column, chunk[column], dtype)
+                except:
+                    # Rollback to original type
+                    continue
+            record.rows += len(chunk)
+        return chunk
 
-        for column, dtype in type_map.items():
-            # noinspection PyBroadException
-            try:
-                if dtype == 'datetime64[ns]':
-                    df[column] = pd.to_datetime(df[column], errors='coerce', format='mixed')
-                elif dtype == 'timedelta64[ns]':
-                    converted = df[column].apply(lambda x: try_parse_timedelta(x) if pd.notnull(x) else pd.NaT)
-                    df[column] = pd.to_timedelta(converted)
-                elif dtype == 'category':
-                    df[column] = df[column].astype('category')
-                elif dtype in ['Int8', 'Int16', 'Int32', 'Int64']:
-                    df[column] = pd.to_numeric(df[column], errors='coerce').astype(dtype)
-                elif dtype in ['float32', 'float64']:
-                    df[column] = pd.to_numeric(df[column], errors='coerce').astype(dtype)
-                elif dtype == 'bool':
-                    df[column] = df[column].astype('bool')
-                elif dtype == 'complex128':
-                    df[column] = df[column].apply(complex)
-                else:
-                    df[column] = df[column].astype(dtype)
-            except:
-                # Rollback to original type
-                continue
-
-        print('###### AFTER CONVERSION')
-        print(df.dtypes)
+    def convert_df_dtypes(self, type_map: Dict[str, str]) -> pd.DataFrame:
+        """
+        Converts the DataFrame columns to the inferred data types, reading and converting the file chunk by
+        chunk so only the typed columns are held in memory.
+        """
+        converted_chunks = []
+        converted_rows = 0
+        for chunk in self.read_chunks():
+            if not converted_chunks and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Dtypes of %s before conversion: %s", self.file_path, chunk.dtypes.astype(str).to_dict())
+            converted_chunks.append(self.convert_chunk(chunk, type_map))
+            converted_rows += len(chunk)
+            self._report_progress('converting', converted_rows, self.row_count)
+
+        if len(converted_chunks) == 1:
+            df = converted_chunks[0]
+        else:
+            df = pd.concat(converted_chunks, ignore_index=True)
+            for column in df.columns:
+                if type_map.get(column) == 'category':
+                    df[column] = self._concat_categories(df[column], [chunk[column] for chunk in converted_chunks])
+        del converted_chunks
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Dtypes of %s after conversion: %s", self.file_path, df.dtypes.astype(str).to_dict())
         return df
 
+    @staticmethod
+    def _concat_categories(concatenated: pd.Series, chunks: List[pd.Series]) -> pd.Series:
+        # Chunks have their own categories, concat only keeps the categorical dtype if they all match
+        if all(isinstance(values.dtype, pd.CategoricalDtype) for values in chunks):
+            try:
+                return union_categoricals(chunks)
+            except TypeError:
+                # Categories of different types, such as numbers in one chunk and text in another
+                pass
+        # A chunk whose conversion was rolled back, convert the whole column or keep it as it was
+        # noinspection PyBroadException
+        try:
+            return concatenated.astype('category')
+        except:
+            return concatenated
+
+    def convert_to_file(self, type_map: Dict[str, str], output_path: str, file_format: str = 'parquet',
+                        compression: str = 'zstd') -> Dict[str, str]:
+        """
+        Converts the file to the inferred data types chunk by chunk, writing each typed chunk to a Parquet
+        or Feather file as it goes, so peak memory stays around one chunk whatever the file size.
+
+        Returns:
+            Dict[str, str]: The pandas dtype of each converted column.
+        """
+        writer = None
+        dtypes = {}
+        converted_rows = 0
+        try:
+            for chunk in self.read_chunks():
+                converted = self.convert_chunk(chunk, type_map)
+                if writer is None:
+                    writer = TypedFileWriter(output_path, type_map, list(converted.columns), file_format=file_format,
+                                             compression=compression, row_group_size=self.chunk_size)
+                    dtypes = {str(column): str(dtype) for column, dtype in converted.dtypes.items()}
+                with self.profile.phase('write') as record:
+                    writer.write(converted)
+                    record.rows += len(converted)
+                converted_rows += len(chunk)
+                self._report_progress('converting', converted_rows, self.row_count)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is not None:
+            self.profile.record('write').bytes += os.path.getsize(output_path)
+        return dtypes
+
+    def convert_columns_to_file(self, type_map: Dict[str, str], columns: List[str], typed_path: str,
+                                output_path: str, compression: str = 'zstd') -> Dict[str, str]:
+        """
+        Re-converts some columns of the file to new data types and patches them into a Parquet file written by
+        convert_to_file, one row group at a time. Only these columns are parsed from the CSV file, the others
+        are copied from the typed file without being converted again.
+
+        Args:
+        - type_map: The data type of every column of the typed file.
+        - columns: The columns to re-convert.
+        - typed_path: The typed file to patch.
+        - output_path: The path of the patched file, not typed_path as that is read while writing.
+
+        Returns:
+            Dict[str, str]: The pandas dtype of each column of the patched file.
+        """
+        if pq is None:
+            raise ImportError("Patching a typed file requires pyarrow.")
+        if self.dialect is None:
+            self.dialect = sniff_csv(self.file_path)
+
+        source = pq.ParquetFile(typed_path)
+        names = source.schema_arrow.names
+        kept = [column for column in names if column not in columns]
+        group_sizes = [source.metadata.row_group(index).num_rows for index in range(source.num_row_groups)]
+        writer = TypedFileWriter(output_path, type_map, names, compression=compression,
+                                 row_group_size=max(group_sizes, default=None))
+        dtypes = {}
+        converted_rows = 0
+        usecols = columns
+        if self.dialect.header_row is None:
+            # The typed file names the columns of a file without a header by their position
+            usecols = sorted(names.index(column) for column in columns)
+        try:
+            # Rows are taken from the CSV file as many at a time as the row group they are patched into holds
+            with pd.read_csv(self.file_path, usecols=usecols, iterator=True, low_memory=True,
+                             **self.dialect.read_csv_kwargs()) as reader:
+                for index, group_size in enumerate(group_sizes):
+                    with self.profile.phase('read') as record:
+                        chunk = reader.get_chunk(group_size)
+                        record.rows += len(chunk)
+                    if self.dialect.header_row is None:
+                        chunk.columns = [names[position] for position in chunk.columns]
+                    chunk = self.convert_chunk(chunk, {column: type_map[column] for column in columns})
+                    patched = source.read_row_group(index, columns=kept).to_pandas()
+                    for column in columns:
+                        patched[column] = chunk[column].reset_index(drop=True)
+                    patched = patched[names]
+                    if not dtypes:
+                        dtypes = {column: str(dtype) for column, dtype in patched.dtypes.items()}
+                    with self.profile.phase('write') as record:
+                        writer.write(patched)
+                        record.rows += len(patched)
+                    converted_rows += group_size
+                    self._report_progress('retyping', converted_rows, source.metadata.num_rows)
+        finally:
+            writer.close()
+        self.profile.record('read').bytes += os.path.getsize(self.file_path)
+        self.profile.record('write').bytes += os.path.getsize(output_path)
+        return dtypes
+
     def infer_and_convert(self):
         """
         Main method to perform both inference and conversion for the DataFrame.
@@ -147,6 +438,17 @@ class DataFrameTypeInferencer:
         return self.convert_df_dtypes(type_map)
 
 
+def _infer_packed_column(task):
+    # Runs in a worker process: rebuilds the column and infers its dtype with the same thresholds, and reports the
+    # peak memory of the worker so far
+    packed, valid_threshold, category_threshold = task
+    column = unpack_column(packed)
+    inferencer = DataFrameTypeInferencer(file_path='', valid_threshold=valid_threshold,
+                                         category_threshold=category_threshold)
+    dtype = inferencer.infer_dtype(column)
+    return dtype, inferencer.datetime_formats.get(column.name), os.getpid(), peak_rss()
+
+
 if __name__ == '__main__':
     files = os.listdir('../csv/')
     for file in files:
@@ -0,0 +1,383 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import django
+import pandas as pd
+from django.conf import settings
+from django.utils import timezone
+
+from . import cache
+from .inferencer import DataFrameTypeInferencer
+from .memory import peak_rss, reset_peak_rss
+from .metrics import METRICS, PhaseProfile
+from .models import CsvFileInference, InferenceCacheEntry, InferenceJob
+from .row_index import build_row_index
+from .sinks import pa, pq, stored_dtype
+from .sniffer import CsvDialect, sniff_csv
+
+logger = logging.getLogger(__name__)
+
+# Mapping of pandas data types to friendly names
+DTYPE_FRIENDLY_NAMES = {
+    'int8': 'integer', 'int16': 'integer', 'int32': 'integer', 'int64': 'integer',
+    'float16': 'float', 'float32': 'float', 'float64': 'float',
+    'complex64': 'complex', 'complex128': 'complex',
+    'object': 'text', 'string': 'text', 'bool': 'boolean',
+    'category': 'category', 'datetime64[ns]': 'datetime', 'timedelta64[ns]': 'timedelta'
+}
+
+# Share of the job progress taken by each stage of the inferencer
+STAGE_PROGRESS = {
+    'sampling': (0.0, 0.45),
+    'inferring': (0.45, 0.5),
+    'converting': (0.5, 1.0),
+    'retyping': (0.0, 1.0),
+}
+# Smallest progress change written to the database, so large files do not write a row per chunk
+PROGRESS_STEP = 0.01
+# Directory of CSV_FILES_DIR holding the converted Parquet files
+TYPED_FILES_DIR = '.typed'
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+_pending = set()
+
+
+class QueueFullError(Exception):
+    """
+    Raised when a job is submitted while INFERENCE_JOB_QUEUE_LIMIT jobs are already queued or running.
+    """
+
+
+def describe_dtypes(dtypes: Dict[str, str]) -> List[Dict[str, str]]:
+    """
+    Describes converted columns from their pandas type, with its friendly name.
+    """
+    return [
+        {
+            "name": col,
+            "pandas_type": dtype,
+            "friendly_name": DTYPE_FRIENDLY_NAMES.get(dtype.lower(), 'unknown')
+        }
+        for col, dtype in dtypes.items()
+    ]
+
+
+def describe_columns(df: pd.DataFrame) -> List[Dict[str, str]]:
+    """
+    Describes the columns of a converted DataFrame with their pandas type and friendly name.
+    """
+    return describe_dtypes({col: str(df[col].dtype) for col in df.columns})
+
+
+def typed_file_name(file_name: str, sha256: str, config: Dict[str, Any]) -> str:
+    """
+    Returns the name, in CSV_FILES_DIR, of the Parquet file a file is converted to. It is addressed by the
+    content digest and inference parameters when the digest is known, so identical uploads share it.
+    """
+    if sha256:
+        return os.path.join(TYPED_FILES_DIR, f'{sha256}-{cache.config_fingerprint(config)[:16]}.parquet')
+    return os.path.join(TYPED_FILES_DIR, f'{file_name}.parquet')
+
+
+class JobProgress:
+    """
+    Progress callback of the inferencer, saving the stage and overall progress of a job as it runs.
+
+    Attributes:
+        job (InferenceJob): The job whose progress is saved.
+    """
+
+    def __init__(self, job: InferenceJob):
+        self.job = job
+
+    def __call__(self, stage: str, rows: int, total: Optional[int] = None):
+        start, end = STAGE_PROGRESS[stage]
+        progress = start + (end - start) * (min(rows / total, 1.0) if total else 0.0)
+        if stage == self.job.stage and progress - self.job.progress < PROGRESS_STEP:
+            return
+        self.job.stage = stage
+        self.job.progress = progress
+        self.job.rows_processed = rows
+        self.job.save(update_fields=['stage', 'progress', 'rows_processed', 'updated_at'])
+
+
+def _save_file_inference(file_name: str, columns: List[Dict[str, str]], dialect: Optional[CsvDialect],
+                         typed_file: Optional[str]):
+    obj, created = CsvFileInference.objects.get_or_create(file_name=file_name)
+    obj.set_columns_data(columns)
+    obj.typed_file_name = typed_file
+    if dialect is not None:
+        obj.set_dialect(dialect)
+    obj.save()
+
+
+def _write_typed_file(typed_file: str, job_id: str, write: Callable[[str], Dict[str, str]]) -> Dict[str, str]:
+    typed_path = os.path.join(settings.CSV_FILES_DIR, typed_file)
+    os.makedirs(os.path.dirname(typed_path), exist_ok=True)
+    # Written under a partial name and moved in place once complete, a download never sees half a file
+    partial_path = f'{typed_path}.{job_id}.part'
+    try:
+        dtypes = write(partial_path)
+        os.replace(partial_path, typed_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    return dtypes
+
+
+def _run_inference(job: InferenceJob, profile: PhaseProfile) -> List[Dict[str, str]]:
+    file_path = os.path.join(settings.CSV_FILES_DIR, job.file_name)
+    config = job.get_config()
+    fingerprint_config = dict(config)
+    # Sniffed during the upload when it was streamed, sniffed from the file otherwise
+    dialect_data = config.pop('dialect', None)
+    if dialect_data is not None:
+        dialect = CsvDialect.from_dict(dialect_data)
+    else:
+        dialect = sniff_csv(file_path) if job.file_name.endswith('.csv') else None
+    inference = DataFrameTypeInferencer(file_path=file_path, dialect=dialect,
+                                        progress_callback=JobProgress(job), profile=profile, **config)
+    type_map = inference.sample_and_infer_types()
+    if pa is not None:
+        # The typed data is kept as Parquet, one row group per chunk, for the typed download endpoint
+        typed_file = typed_file_name(job.file_name, job.sha256, fingerprint_config)
+        columns = describe_dtypes(_write_typed_file(typed_file, str(job.pk),
+                                                    lambda path: inference.convert_to_file(type_map, path)))
+    else:
+        typed_file = None
+        columns = describe_columns(inference.convert_df_dtypes(type_map))
+
+    _save_file_inference(job.file_name, columns, dialect, typed_file)
+    cache.store(job.sha256, fingerprint_config, type_map, columns)
+
+    if dialect is not None:
+        # Row offsets for the row window endpoint, a file that cannot be indexed is still inferred
+        try:
+            build_row_index(file_path, dialect)
+        except Exception:
+            logger.exception("Row index of %s could not be built", job.file_name)
+    return columns
+
+
+def _user_types(columns: List[Dict[str, str]]) -> Dict[str, str]:
+    return {column['name']: column.get('user_defined_type') or column['pandas_type'] for column in columns}
+
+
+def _run_retype(job: InferenceJob, profile: PhaseProfile) -> List[Dict[str, str]]:
+    while True:
+        obj = CsvFileInference.objects.get(file_name=job.file_name)
+        columns = obj.get_columns_data()
+        type_map = _user_types(columns)
+
+        # Every column whose type differs from the one it was written with, so a retype that ran on an older
+        # version of the typed file is caught up by the next one
+        typed_path = os.path.join(settings.CSV_FILES_DIR, obj.typed_file_name)
+        written = pq.read_schema(typed_path).empty_table().to_pandas().dtypes
+        changed = [column for column, dtype in type_map.items()
+                   if column in written and stored_dtype(dtype) != str(written[column])]
+        if not changed:
+            return columns
+
+        # Patched into a file of its own, the typed file may be shared with identical uploads
+        typed_file = os.path.join(TYPED_FILES_DIR, f'{job.file_name}.parquet')
+        inference = DataFrameTypeInferencer(file_path=os.path.join(settings.CSV_FILES_DIR, job.file_name),
+                                            dialect=obj.get_dialect(), progress_callback=JobProgress(job),
+                                            profile=profile)
+        _write_typed_file(typed_file, str(job.pk),
+                          lambda path: inference.convert_columns_to_file(type_map, changed, typed_path, path))
+        CsvFileInference.objects.filter(pk=obj.pk).update(typed_file_name=typed_file, updated_at=timezone.now())
+
+        # Types set while this job was patching may have been patched by a retype that finished first, and
+        # overwritten with the older types just now, so they are patched again
+        if _user_types(obj.get_columns_data()) == type_map:
+            return columns
+
+
+def run_job(job_id: str) -> Tuple[str, str, List[Dict[str, Any]], Optional[int]]:
+    """
+    Runs a job and saves its columns, the profile of its phases and its peak resident memory on it. Failures are
+    saved on the job rather than raised. The profile is logged with the job, as extra fields of the log record.
+
+    An inference job sniffs the file, infers and converts it, and saves the columns on the CsvFileInference
+    record of the file, caching them for the file digest. The converted data is written as Parquet when
+    pyarrow is installed, and CSV files are indexed for the row window endpoint.
+
+    A retype job re-converts only the columns whose user defined type changed, and patches them into the
+    typed Parquet file.
+
+    Returns:
+    - The kind and status of the job, its profile and peak resident memory, for the metrics of the process that
+      queued it.
+    """
+    job = InferenceJob.objects.get(pk=job_id)
+    job.status = InferenceJob.RUNNING
+    job.save(update_fields=['status', 'updated_at'])
+
+    # Worker processes run one job after another, the peak is reset so it is the one of this job where the
+    # platform allows it, and of the process up to now otherwise
+    reset_peak_rss()
+
+    profile = PhaseProfile()
+    try:
+        columns = _run_retype(job, profile) if job.kind == InferenceJob.RETYPE else _run_inference(job, profile)
+        job.set_columns_data(columns)
+        job.status = InferenceJob.SUCCEEDED
+        job.progress = 1.0
+    except Exception as error:
+        logger.exception("Inference job %s failed", job_id)
+        job.status = InferenceJob.FAILED
+        job.error = str(error) or type(error).__name__
+    records = profile.to_list()
+    job.set_profile(records)
+    job.peak_rss = peak_rss()
+    if job.peak_rss is not None:
+        # The worker processes parsing the file and inferring its columns hold chunks and columns of their own
+        job.peak_rss += profile.worker_peak_rss
+    job.finished_at = timezone.now()
+    job.save()
+    logger.info("Inference job %s %s", job_id, job.status, extra={
+        'job_id': job_id, 'file_name': job.file_name, 'kind': job.kind, 'status': job.status,
+        'peak_rss': job.peak_rss, 'profile': records})
+    return job.kind, job.status, records, job.peak_rss
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawned workers start from a fresh interpreter: Django is set up, from the settings module in the
+            # environment, before this module and its models are imported to run a job
+            _executor = ProcessPoolExecutor(max_workers=settings.INFERENCE_JOB_WORKERS,
+                                            mp_context=multiprocessing.get_context('spawn'),
+                                            initializer=django.setup)
+        return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        _executor = None
+
+
+def _job_done(job_id: str, future):
+    _pending.discard(future)
+    error = future.exception()
+    if error is not None:
+        # The worker process died before the job could save its own failure
+        logger.error("Inference job %s crashed: %s", job_id, error)
+        InferenceJob.objects.filter(pk=job_id, status__in=[InferenceJob.QUEUED, InferenceJob.RUNNING]).update(
+            status=InferenceJob.FAILED, error="Inference worker crashed.", finished_at=timezone.now())
+        if isinstance(error, BrokenProcessPool):
+            _reset_executor()
+        return
+    METRICS.add_job(*future.result())
+
+
+def check_queue():
+    """
+    Raises QueueFullError if INFERENCE_JOB_QUEUE_LIMIT jobs are already queued or running in this process.
+    """
+    if settings.INFERENCE_JOB_WORKERS > 0 and len(_pending) >= settings.INFERENCE_JOB_QUEUE_LIMIT:
+        raise QueueFullError("Too many inference jobs are queued, retry later.")
+
+
+def submit_job(file_name: str, config: Dict[str, Any], sha256: str = '',
+               cached: Optional[InferenceCacheEntry] = None) -> InferenceJob:
+    """
+    Creates an inference job for a file saved in CSV_FILES_DIR and queues it on the worker pool, or runs it
+    inline when INFERENCE_JOB_WORKERS is 0. A job with a cached result is finished at once.
+
+    Args:
+    - file_name: The name of the file in CSV_FILES_DIR.
+    - config: The DataFrameTypeInferencer parameters, and the sniffed 'dialect' as a dictionary if known.
+    - sha256: The hex SHA-256 digest of the file, if known.
+    - cached: The cached result of the file content and parameters, looked up from the digest if not given.
+
+    Returns:
+    - The InferenceJob, finished when run inline or cached.
+
+    Raises:
+    - QueueFullError: If INFERENCE_JOB_QUEUE_LIMIT jobs are already queued or running.
+    """
+    if cached is None:
+        cached = cache.lookup(sha256, config)
+
+    job = InferenceJob(file_name=file_name, sha256=sha256)
+    job.set_config(config)
+
+    if cached is not None:
+        columns = cached.get_columns_data()
+        dialect_data = config.get('dialect')
+        # The Parquet file converted for the same content and parameters, unless it was never written
+        typed_file = typed_file_name(file_name, sha256, config)
+        if not os.path.exists(os.path.join(settings.CSV_FILES_DIR, typed_file)):
+            typed_file = None
+        _save_file_inference(file_name, columns, CsvDialect.from_dict(dialect_data) if dialect_data else None,
+                             typed_file)
+        job.set_columns_data(columns)
+        job.status = InferenceJob.SUCCEEDED
+        job.cache_hit = True
+        job.progress = 1.0
+        job.finished_at = timezone.now()
+        job.save()
+        return job
+
+    check_queue()
+    job.save()
+    return _enqueue(job)
+
+
+def submit_retype_job(file_name: str) -> Optional[InferenceJob]:
+    """
+    Queues a retype job patching the columns whose user defined type changed into the typed file of a CSV
+    file, or runs it inline when INFERENCE_JOB_WORKERS is 0. A retype of the file still queued is returned
+    instead of queueing another. A running one patches again, once done, the types set while it ran.
+
+    Args:
+    - file_name: The name of the file in CSV_FILES_DIR.
+
+    Returns:
+    - The InferenceJob, the one already queued for the file if any, or None if the file has no typed file to
+      patch.
+
+    Raises:
+    - QueueFullError: If INFERENCE_JOB_QUEUE_LIMIT jobs are already queued or running.
+    """
+    obj = CsvFileInference.objects.filter(file_name=file_name).only('typed_file_name').first()
+    if pq is None or obj is None or not obj.typed_file_name or not file_name.endswith('.csv'):
+        return None
+    if not os.path.exists(os.path.join(settings.CSV_FILES_DIR, obj.typed_file_name)):
+        return None
+
+    queued = InferenceJob.objects.filter(file_name=file_name, kind=InferenceJob.RETYPE,
+                                         status=InferenceJob.QUEUED).first()
+    if queued is not None:
+        # It has not read the column types yet, it patches the ones just set when it starts
+        return queued
+
+    check_queue()
+    job = InferenceJob.objects.create(file_name=file_name, kind=InferenceJob.RETYPE)
+    return _enqueue(job)
+
+
+def _enqueue(job: InferenceJob) -> InferenceJob:
+    if settings.INFERENCE_JOB_WORKERS == 0:
+        METRICS.add_job(*run_job(str(job.pk)))
+        job.refresh_from_db()
+        return job
+
+    job_id = str(job.pk)
+    try:
+        future = _get_executor().submit(run_job, job_id)
+    except BrokenProcessPool:
+        _reset_executor()
+        future = _get_executor().submit(run_job, job_id)
+    _pending.add(future)
+    future.add_done_callback(lambda done: _job_done(job_id, done))
+    return job
@@ -0,0 +1,87 @@
+import math
+import sys
+from typing import Optional, Tuple
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - resource is not available on Windows
+    resource = None
+
+# Smallest memory budget accepted for a job
+MIN_MEMORY_BUDGET = 16 << 20
+# Rows read to estimate the in-memory size of a row
+MEMORY_PROBE_ROWS = 1000
+# Share of the memory budget given to one chunk, which is held with its converted copy and the parser buffers
+CHUNK_BUDGET_SHARE = 0.2
+# Share of the memory budget given to the sample of the whole file the types are inferred from
+SAMPLE_BUDGET_SHARE = 0.2
+# Fewest rows a budget sizes a chunk or sample to, below that the per-chunk overhead dominates
+MIN_BUDGET_ROWS = 1000
+
+
+def row_size(probe: pd.DataFrame) -> float:
+    """
+    Estimates the in-memory size of a row from the first rows of a file, strings included, as the
+    inferencer holds them.
+
+    Returns:
+    - The average size of a row in bytes, at least 1.
+    """
+    return max(float(probe.memory_usage(deep=True, index=False).sum()) / max(len(probe), 1), 1.0)
+
+
+def budget_rows(memory_budget: int, row_bytes: float, chunks_in_flight: int = 1) -> Tuple[int, int]:
+    """
+    Sizes the chunks and the sample of a file so that reading, sampling and converting it stay within a
+    memory budget.
+
+    Args:
+    - memory_budget: The memory budget in bytes.
+    - row_bytes: The estimated in-memory size of a row, from row_size.
+    - chunks_in_flight: Number of chunks held at once, more than one when parsed by a pool of workers.
+
+    Returns:
+    - The chunk size and the sample size, in rows.
+    """
+    chunk_size = memory_budget * CHUNK_BUDGET_SHARE / chunks_in_flight / row_bytes
+    sample_size = memory_budget * SAMPLE_BUDGET_SHARE / row_bytes
+    return max(math.floor(chunk_size), MIN_BUDGET_ROWS), max(math.floor(sample_size), MIN_BUDGET_ROWS)
+
+
+def reset_peak_rss() -> bool:
+    """
+    Resets the peak resident set size of this process, so the next peak_rss covers what runs from now on.
+    Only Linux can reset it.
+
+    Returns:
+    - True if it was reset, False if peak_rss still reports the peak of the whole process.
+    """
+    # noinspection PyBroadException
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+        return True
+    except:
+        return False
+
+
+def peak_rss() -> Optional[int]:
+    """
+    Returns the peak resident set size of this process in bytes since reset_peak_rss, or since it started, or
+    None if it cannot be measured.
+    """
+    # noinspection PyBroadException
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except:
+        pass
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
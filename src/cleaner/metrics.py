@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Prefix of the metric names on the metrics endpoint
+METRIC_PREFIX = 'csv_cleaner'
+
+
+@dataclass
+class PhaseRecord:
+    """
+    Totals of one phase of a job, or of one check on one column.
+
+    Attributes:
+        phase (str): 'read', 'sample', 'infer', 'profile', the name of a check function such as 'check_numeric',
+                     'convert' or 'write'.
+        column (str): The column of a per-column phase, None for a phase of the whole file.
+        seconds (float): Wall time spent in the phase.
+        rows (int): Rows processed.
+        bytes (int): Bytes of the file read, or of the typed file written.
+        calls (int): Number of times the phase was entered, once per chunk for the chunked phases.
+    """
+    phase: str
+    column: Optional[str] = None
+    seconds: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+    calls: int = 0
+
+
+class PhaseProfile:
+    """
+    Records the wall time, rows and bytes of the phases of a job. Entering a phase again adds to its totals, so a
+    file read in many chunks still has a single 'read' record, and a check a single record per column.
+
+    Attributes:
+        records (Dict[Tuple[str, Optional[str]], PhaseRecord]): The records by phase and column, in the order
+                                                                   the phases were first entered.
+        worker_peak_rss (int): The highest sum of the peak resident memory of the worker processes of a pool
+                               the job ran, in bytes. Pools run one after another, so their sums are not added.
+    """
+
+    def __init__(self):
+        self.records: Dict[Tuple[str, Optional[str]], PhaseRecord] = {}
+        self.worker_peak_rss = 0
+
+    def record(self, phase: str, column: Any = None) -> PhaseRecord:
+        """
+        Returns the record of a phase, created empty the first time.
+        """
+        key = (phase, None if column is None else str(column))
+        if key not in self.records:
+            self.records[key] = PhaseRecord(*key)
+        return self.records[key]
+
+    @contextmanager
+    def phase(self, phase: str, column: Any = None) -> Iterator[PhaseRecord]:
+        """
+        Times the block as one call of a phase. The block adds its rows and bytes to the record it is given.
+        """
+        record = self.record(phase, column)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds += time.perf_counter() - start
+            record.calls += 1
+
+    def add_worker_peaks(self, peaks: Dict[int, int]):
+        """
+        Adds the peak resident memory of each worker process of a pool that has finished, by process id.
+        """
+        self.worker_peak_rss = max(self.worker_peak_rss, sum(peaks.values()))
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [asdict(record) for record in self.records.values()]
+
+
+class PhaseMetrics:
+    """
+    Totals of the jobs finished by this process and of their phases, summed over the columns, for the metrics
+    endpoint. Jobs run in the worker pool are added when their result comes back to the process that queued
+    them, so each server process reports the jobs it queued.
+
+    Attributes:
+        jobs (Counter): Number of jobs by kind and status.
+        phases (Dict[str, PhaseRecord]): Totals by phase.
+        peak_rss (int): Highest peak resident memory of a job, in bytes.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.jobs = Counter()
+        self.phases: Dict[str, PhaseRecord] = {}
+        self.peak_rss = 0
+
+    def add_job(self, kind: str, status: str, profile: List[Dict[str, Any]], peak_rss: Optional[int] = None):
+        """
+        Adds a finished job, the records of its PhaseProfile and its peak resident memory.
+        """
+        with self.lock:
+            self.jobs[(kind, status)] += 1
+            self.peak_rss = max(self.peak_rss, peak_rss or 0)
+            for data in profile:
+                total = self.phases.setdefault(data['phase'], PhaseRecord(data['phase']))
+                total.seconds += data['seconds']
+                total.rows += data['rows']
+                total.bytes += data['bytes']
+                total.calls += data['calls']
+
+    def render(self) -> str:
+        """
+        Renders the totals in the Prometheus text exposition format.
+        """
+        with self.lock:
+            jobs = sorted(self.jobs.items())
+            phases = [self.phases[phase] for phase in sorted(self.phases)]
+            job_peak_rss = self.peak_rss
+
+        lines = [f'# HELP {METRIC_PREFIX}_jobs_total Jobs finished, by kind and status.',
+                 f'# TYPE {METRIC_PREFIX}_jobs_total counter']
+        lines += [f'{METRIC_PREFIX}_jobs_total{{kind="{kind}",status="{status}"}} {count}'
+                  for (kind, status), count in jobs]
+        lines += [f'# HELP {METRIC_PREFIX}_job_peak_rss_bytes Highest peak resident memory of a job.',
+                  f'# TYPE {METRIC_PREFIX}_job_peak_rss_bytes gauge',
+                  f'{METRIC_PREFIX}_job_peak_rss_bytes {job_peak_rss}']
+        for name, attribute, help_text in (('phase_seconds_total', 'seconds', 'Wall time spent in each phase.'),
+                                           ('phase_rows_total', 'rows', 'Rows processed by each phase.'),
+                                           ('phase_bytes_total', 'bytes', 'Bytes read or written by each phase.'),
+                                           ('phase_calls_total', 'calls', 'Times each phase was entered.')):
+            lines += [f'# HELP {METRIC_PREFIX}_{name} {help_text}', f'# TYPE {METRIC_PREFIX}_{name} counter']
+            lines += [f'{METRIC_PREFIX}_{name}{{phase="{record.phase}"}} {getattr(record, attribute)}'
+                      for record in phases]
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = PhaseMetrics()
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cleaner", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="csvfileinference",
+            name="dialect_data",
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.14 on 2026-10-17 06:24
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cleaner", "0002_csvfileinference_dialect_data"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InferenceJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("file_name", models.CharField(max_length=255)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("running", "Running"),
+                            ("succeeded", "Succeeded"),
+                            ("failed", "Failed"),
+                        ],
+                        default="queued",
+                        max_length=16,
+                    ),
+                ),
+                ("stage", models.CharField(blank=True, default="", max_length=32)),
+                ("progress", models.FloatField(default=0.0)),
+                ("rows_processed", models.BigIntegerField(default=0)),
+                ("config_data", models.TextField(blank=True, null=True)),
+                ("columns_data", models.TextField(blank=True, null=True)),
+                ("error", models.TextField(blank=True, default="")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
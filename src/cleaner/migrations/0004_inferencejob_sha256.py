@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cleaner", "0003_inferencejob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="inferencejob",
+            name="sha256",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.14 on 2026-10-17 06:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cleaner", "0004_inferencejob_sha256"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InferenceCacheEntry",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("digest", models.CharField(max_length=64)),
+                ("config_fingerprint", models.CharField(max_length=64)),
+                ("type_map_data", models.TextField(blank=True, null=True)),
+                ("columns_data", models.TextField(blank=True, null=True)),
+                ("hits", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("last_used_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="inferencejob",
+            name="cache_hit",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddConstraint(
+            model_name="inferencecacheentry",
+            constraint=models.UniqueConstraint(
+                fields=("digest", "config_fingerprint"),
+                name="unique_inference_cache_key",
+            ),
+        ),
+    ]
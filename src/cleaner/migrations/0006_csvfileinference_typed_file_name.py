@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 06:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cleaner", "0005_inference_cache"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="csvfileinference",
+            name="typed_file_name",
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.14 on 2026-10-17 06:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cleaner", "0006_csvfileinference_typed_file_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="csvfileinference",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
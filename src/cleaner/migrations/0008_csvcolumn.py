@@ -0,0 +1,93 @@
+# Generated by Django 5.0.14 on 2026-10-17 06:36
+
+import json
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def columns_to_rows(apps, schema_editor):
+    CsvFileInference = apps.get_model("cleaner", "CsvFileInference")
+    CsvColumn = apps.get_model("cleaner", "CsvColumn")
+    for file in CsvFileInference.objects.exclude(columns_data__isnull=True).iterator():
+        columns = json.loads(file.columns_data) if file.columns_data else []
+        CsvColumn.objects.bulk_create(
+            [
+                CsvColumn(
+                    file=file,
+                    position=position,
+                    name=column["name"],
+                    pandas_type=column.get("pandas_type", ""),
+                    friendly_name=column.get("friendly_name", ""),
+                    user_defined_type=column.get("user_defined_type"),
+                )
+                for position, column in enumerate(columns)
+            ]
+        )
+
+
+def rows_to_columns(apps, schema_editor):
+    CsvFileInference = apps.get_model("cleaner", "CsvFileInference")
+    for file in CsvFileInference.objects.iterator():
+        columns = []
+        for column in file.columns.order_by("position"):
+            data = {
+                "name": column.name,
+                "pandas_type": column.pandas_type,
+                "friendly_name": column.friendly_name,
+            }
+            if column.user_defined_type is not None:
+                data["user_defined_type"] = column.user_defined_type
+            columns.append(data)
+        file.columns_data = json.dumps(columns)
+        file.save(update_fields=["columns_data"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cleaner", "0007_csvfileinference_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CsvColumn",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("position", models.PositiveIntegerField()),
+                ("name", models.CharField(max_length=255)),
+                ("pandas_type", models.CharField(blank=True, default="", max_length=50)),
+                ("friendly_name", models.CharField(blank=True, default="", max_length=50)),
+                ("user_defined_type", models.CharField(blank=True, max_length=50, null=True)),
+                (
+                    "file",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="columns",
+                        to="cleaner.csvfileinference",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["file", "position"],
+                "indexes": [models.Index(fields=["file", "position"], name="csv_column_position_idx")],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="csvcolumn",
+            constraint=models.UniqueConstraint(fields=("file", "name"), name="unique_csv_column_name"),
+        ),
+        migrations.RunPython(columns_to_rows, rows_to_columns),
+        migrations.RemoveField(
+            model_name="csvfileinference",
+            name="columns_data",
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.14 on 2026-10-17 06:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cleaner", "0008_csvcolumn"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="inferencejob",
+            name="kind",
+            field=models.CharField(
+                choices=[("infer", "Infer"), ("retype", "Retype")],
+                default="infer",
+                max_length=16,
+            ),
+        ),
+    ]
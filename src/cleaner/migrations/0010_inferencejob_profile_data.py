@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 07:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cleaner", "0009_inferencejob_kind"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="inferencejob",
+            name="profile_data",
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 07:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cleaner", "0010_inferencejob_profile_data"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="inferencejob",
+            name="peak_rss",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
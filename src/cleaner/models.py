@@ -1,10 +1,174 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+from typing import Any, Dict
 import json
+import uuid
+
+from .sniffer import CsvDialect
+
+# Files whose column types are set by a single UPDATE statement
+UPDATE_BATCH_FILES = 100
 
 
 class CsvFileInference(models.Model):
     file_name = models.CharField(max_length=255, unique=True, primary_key=True)
-    columns_data = models.TextField(blank=True, null=True)  # Using TextField to store JSON data
+    dialect_data = models.TextField(blank=True, null=True)  # Encoding and dialect sniffed on upload, as JSON
+    typed_file_name = models.CharField(max_length=255, blank=True, null=True)  # Converted Parquet file, if written
+    updated_at = models.DateTimeField(auto_now=True)  # Changes the ETag of the listing and metadata responses
+
+    def set_columns_data(self, data):
+        """
+        Replaces the columns of the file, which must be saved, by the described ones.
+        """
+        with transaction.atomic():
+            self.columns.all().delete()
+            CsvColumn.objects.bulk_create([CsvColumn.from_dict(self, position, column)
+                                           for position, column in enumerate(data)])
+
+    def get_columns_data(self):
+        return [column.to_dict() for column in self.columns.all()]
+
+    def update_column_types(self, types: Dict[str, str]) -> int:
+        """
+        Sets the user defined type of the named columns, in a single statement.
+        """
+        return CsvColumn.update_types({self.file_name: types})
+
+    def set_dialect(self, dialect):
+        self.dialect_data = json.dumps(dialect.to_dict())
+
+    def get_dialect(self):
+        return CsvDialect.from_dict(json.loads(self.dialect_data)) if self.dialect_data else None
+
+
+class CsvColumn(models.Model):
+    file = models.ForeignKey(CsvFileInference, on_delete=models.CASCADE, related_name='columns')
+    position = models.PositiveIntegerField()  # Position of the column in the file, from 0
+    name = models.CharField(max_length=255)
+    pandas_type = models.CharField(max_length=50, blank=True, default='')
+    friendly_name = models.CharField(max_length=50, blank=True, default='')
+    user_defined_type = models.CharField(max_length=50, blank=True, null=True)  # Set once a user re-types it
+
+    class Meta:
+        ordering = ['file', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['file', 'name'], name='unique_csv_column_name'),
+        ]
+        indexes = [
+            models.Index(fields=['file', 'position'], name='csv_column_position_idx'),
+        ]
+
+    @classmethod
+    def from_dict(cls, file: CsvFileInference, position: int, data: Dict[str, Any]) -> 'CsvColumn':
+        return cls(file=file, position=position, name=data['name'], pandas_type=data.get('pandas_type', ''),
+                   friendly_name=data.get('friendly_name', ''), user_defined_type=data.get('user_defined_type'))
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"name": self.name, "pandas_type": self.pandas_type, "friendly_name": self.friendly_name}
+        if self.user_defined_type is not None:
+            data["user_defined_type"] = self.user_defined_type
+        return data
+
+    @classmethod
+    def update_types(cls, updates: Dict[str, Dict[str, str]]) -> int:
+        """
+        Sets the user defined type of columns across files in one transaction, with a single UPDATE statement
+        per UPDATE_BATCH_FILES files, matching the columns on the (file, name) unique index, and marks the
+        files updated.
+
+        Args:
+        - updates: The new type of each column name, for each file name.
+
+        Returns:
+        - The number of columns updated, columns not in their file are ignored.
+        """
+        file_names = [file_name for file_name, types in updates.items() if types]
+        if not file_names:
+            return 0
+
+        updated = 0
+        with transaction.atomic():
+            # Batched, SQLite refuses expression trees deeper than 1000 and every file adds an OR term
+            for start in range(0, len(file_names), UPDATE_BATCH_FILES):
+                batch = file_names[start:start + UPDATE_BATCH_FILES]
+                cases = [When(file_id=file_name, name=name, then=Value(dtype))
+                         for file_name in batch for name, dtype in updates[file_name].items()]
+                matches = Q()
+                for file_name in batch:
+                    matches |= Q(file_id=file_name, name__in=list(updates[file_name]))
+                updated += cls.objects.filter(matches).update(
+                    user_defined_type=Case(*cases, default=F('user_defined_type'), output_field=models.CharField()))
+                CsvFileInference.objects.filter(pk__in=batch).update(updated_at=timezone.now())
+        return updated
+
+
+class InferenceJob(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (SUCCEEDED, 'Succeeded'), (FAILED, 'Failed')]
+    INFER = 'infer'
+    RETYPE = 'retype'
+    KIND_CHOICES = [(INFER, 'Infer'), (RETYPE, 'Retype')]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    file_name = models.CharField(max_length=255)
+    sha256 = models.CharField(max_length=64, blank=True, default='')  # Digest of the uploaded content
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES, default=INFER)  # Retype patches the typed file
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED)
+    cache_hit = models.BooleanField(default=False)  # Columns taken from the inference cache
+    stage = models.CharField(max_length=32, blank=True, default='')
+    progress = models.FloatField(default=0.0)
+    rows_processed = models.BigIntegerField(default=0)
+    config_data = models.TextField(blank=True, null=True)  # Inferencer parameters, as JSON
+    columns_data = models.TextField(blank=True, null=True)  # Inferred columns once succeeded, as JSON
+    profile_data = models.TextField(blank=True, null=True)  # Time, rows and bytes of each phase once run, as JSON
+    peak_rss = models.BigIntegerField(blank=True, null=True)  # Peak resident memory of the job and its workers, in bytes
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def set_config(self, config):
+        self.config_data = json.dumps(config)
+
+    def get_config(self):
+        return json.loads(self.config_data) if self.config_data else {}
+
+    def set_columns_data(self, data):
+        self.columns_data = json.dumps(data)
+
+    def get_columns_data(self):
+        return json.loads(self.columns_data) if self.columns_data else []
+
+    def set_profile(self, profile):
+        self.profile_data = json.dumps(profile)
+
+    def get_profile(self):
+        return json.loads(self.profile_data) if self.profile_data else None
+
+
+class InferenceCacheEntry(models.Model):
+    digest = models.CharField(max_length=64)  # SHA-256 of the file content
+    config_fingerprint = models.CharField(max_length=64)  # SHA-256 of the inference parameters
+    type_map_data = models.TextField(blank=True, null=True)  # Inferred type_map, as JSON
+    columns_data = models.TextField(blank=True, null=True)  # Converted columns, as JSON
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['digest', 'config_fingerprint'], name='unique_inference_cache_key'),
+        ]
+
+    def set_type_map(self, type_map):
+        self.type_map_data = json.dumps(type_map)
+
+    def get_type_map(self):
+        return json.loads(self.type_map_data) if self.type_map_data else {}
 
     def set_columns_data(self, data):
         self.columns_data = json.dumps(data)
@@ -0,0 +1,28 @@
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class CsvFileCursorPagination(CursorPagination):
+    """
+    Cursor pagination of files by name, returning the page as a plain list with the next and previous page
+    URLs in a Link header, so clients reading the list body keep working. The cursor seeks on the file name
+    primary key, any page costs the same whatever its position.
+    """
+    ordering = 'file_name'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def get_paginated_response(self, data):
+        links = []
+        next_url = self.get_next_link()
+        previous_url = self.get_previous_link()
+        if next_url:
+            links.append(f'<{next_url}>; rel="next"')
+        if previous_url:
+            links.append(f'<{previous_url}>; rel="prev"')
+        headers = {'Link': ', '.join(links)} if links else None
+        return Response(data, headers=headers)
+
+    def get_paginated_response_schema(self, schema):
+        return schema
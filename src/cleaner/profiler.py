@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Number of values spread over the column that are profiled
+PROFILE_SIZE = 10000
+# Characters classified per value, longer values are free text for every check the profile can rule out
+PROFILE_MAX_CHARS = 64
+# Longest value the boolean vocabularies can match ('false')
+BOOLEAN_MAX_LENGTH = 5
+# Longest value considered for the datetime and timedelta parsers
+TEMPORAL_MAX_LENGTH = 64
+
+# Letters that may appear in numbers and complex literals: exponents, the imaginary unit, inf, infinity and nan
+NUMERIC_LETTERS = 'eEjJiInNfFaAtTyY'
+SEPARATORS = '-/:.,'
+
+
+def _codes(characters):
+    return np.array([ord(character) for character in characters], dtype=np.uint32)
+
+
+@dataclass
+class ColumnProfile:
+    """
+    Character-class and length statistics of a column, computed in a single vectorized pass over a probe
+    of its values. Shares are the proportion of probed values with the property.
+    """
+    count: int
+    min_length: int
+    max_length: int
+    mean_length: float
+    digit_ratio: float
+    digit_share: float
+    letter_share: float
+    space_share: float
+    separator_share: float
+    boolean_like_share: float
+    numeric_like_share: float
+    temporal_like_share: float
+
+    def could_be(self, kind: str, threshold: float, z: float = 4.0) -> bool:
+        """
+        Tells whether enough values could be of a kind ('bool', 'numeric', 'complex', 'datetime' or 'timedelta')
+        for a check with the given threshold to pass. Only rules out kinds that are clearly impossible: values
+        are counted as possible on their characters and length alone.
+        """
+        share = {
+            'bool': self.boolean_like_share,
+            'numeric': self.numeric_like_share,
+            'complex': self.numeric_like_share,
+            'datetime': self.temporal_like_share,
+            'timedelta': self.temporal_like_share,
+        }[kind]
+        # Upper confidence bound of the share, the probe may be smaller than the column
+        upper_bound = share + z * np.sqrt(share * (1 - share) / self.count) + z * z / self.count
+        return bool(upper_bound >= threshold)
+
+
+def profile_column(valid_values: pd.Series, size: int = PROFILE_SIZE) -> ColumnProfile:
+    """
+    Profiles the character classes, length distribution, separator presence and digit ratio of a column.
+
+    Args:
+    - valid_values: The pandas Series to profile, without NaN or empty values.
+    - size: The number of values, spread over the column, to profile.
+
+    Returns:
+    - The ColumnProfile of the probed values.
+    """
+    positions = np.unique(np.linspace(0, len(valid_values) - 1, num=min(size, len(valid_values))).astype(int))
+    probe = valid_values.iloc[positions].astype(str)
+    lengths = probe.str.len().to_numpy()
+
+    # One row of code points per value, padded with zeros
+    characters = probe.str.slice(0, PROFILE_MAX_CHARS).to_numpy(dtype=str)
+    codes = characters.view(np.uint32).reshape(len(characters), -1)
+
+    is_digit = (codes >= ord('0')) & (codes <= ord('9'))
+    is_letter = ((codes | 0x20) >= ord('a')) & ((codes | 0x20) <= ord('z')) | (codes > 127)
+    is_space = np.isin(codes, _codes(' \t'))
+    is_separator = np.isin(codes, _codes(SEPARATORS))
+    is_foreign_letter = is_letter & ~np.isin(codes, _codes(NUMERIC_LETTERS))
+
+    has_digit = is_digit.any(axis=1)
+    has_letter = is_letter.any(axis=1)
+    classified = np.count_nonzero(codes)
+
+    return ColumnProfile(
+        count=len(probe),
+        min_length=int(lengths.min()),
+        max_length=int(lengths.max()),
+        mean_length=float(lengths.mean()),
+        digit_ratio=float(is_digit.sum() / classified) if classified else 0.0,
+        digit_share=float(has_digit.mean()),
+        letter_share=float(has_letter.mean()),
+        space_share=float(is_space.any(axis=1).mean()),
+        separator_share=float(is_separator.any(axis=1).mean()),
+        boolean_like_share=float((lengths <= BOOLEAN_MAX_LENGTH).mean()),
+        numeric_like_share=float(((has_digit | has_letter) & ~is_foreign_letter.any(axis=1)).mean()),
+        temporal_like_share=float((has_digit & (lengths <= TEMPORAL_MAX_LENGTH)).mean()),
+    )
@@ -0,0 +1,356 @@
+import io
+import itertools
+import math
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from cleaner.memory import peak_rss
+from cleaner.sniffer import CsvDialect
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+    pa_csv = None
+
+try:
+    import openpyxl
+except ImportError:  # pragma: no cover - openpyxl is optional
+    openpyxl = None
+
+try:
+    import xlrd
+except ImportError:  # pragma: no cover - xlrd is optional
+    xlrd = None
+
+CSV_ENGINES = ('c', 'pyarrow')
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+
+# Bytes read at a time while scanning the file for record boundaries
+BLOCK_SIZE = 1 << 20
+# Bytes after the header used to estimate the average row size
+ROW_SIZE_PROBE_BYTES = 1 << 20
+# Smallest byte range handed to a worker, below that the process overhead dominates
+MIN_RANGE_BYTES = 1 << 20
+
+
+def _next_record_start(handle, position: int, quotes: int, quotechar: bytes) -> Optional[int]:
+    """
+    Finds the first record start at or after position: the byte after a newline that is not inside a quoted
+    field. The handle must be positioned at position, and quotes is the number of quote characters seen
+    since the last record start.
+    """
+    while True:
+        block = handle.read(BLOCK_SIZE)
+        if not block:
+            return None
+        search = 0
+        while True:
+            newline = block.find(b'\n', search)
+            if newline < 0:
+                quotes += block.count(quotechar, search)
+                break
+            quotes += block.count(quotechar, search, newline)
+            # An even number of quotes, escaped ones included, means the newline ends a record
+            if quotes % 2 == 0:
+                return position + newline + 1
+            search = newline + 1
+        position += len(block)
+
+
+def split_byte_ranges(path: str, start: int, range_bytes: int, quotechar: str = '"') -> List[Tuple[int, int]]:
+    """
+    Splits the records of a CSV file after start into byte ranges of about range_bytes, each one starting and
+    ending on a record boundary so it can be parsed on its own. Quoted fields spanning several lines are kept
+    whole by tracking the parity of the quote characters read, in a single sequential pass over the file.
+
+    Args:
+    - path: The path to the CSV file.
+    - start: The offset of the first record, after the header.
+    - range_bytes: The target size of each range.
+    - quotechar: The character used to quote fields.
+
+    Returns:
+    - The (start, end) offsets of the ranges, in file order.
+    """
+    size = os.path.getsize(path)
+    quotechar = quotechar.encode('ascii')
+    starts = [start] if start < size else []
+
+    with open(path, 'rb') as handle:
+        position = start
+        while position + range_bytes < size:
+            # Quote characters between the last record start and the target offset
+            handle.seek(position)
+            quotes = 0
+            remaining = range_bytes
+            while remaining > 0:
+                block = handle.read(min(BLOCK_SIZE, remaining))
+                quotes += block.count(quotechar)
+                remaining -= len(block)
+
+            boundary = _next_record_start(handle, position + range_bytes, quotes, quotechar)
+            if boundary is None or boundary >= size:
+                break
+            starts.append(boundary)
+            position = boundary
+
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def _read_range(task) -> pd.DataFrame:
+    path, start, end, columns, read_csv_kwargs = task
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        data = handle.read(end - start)
+    return pd.read_csv(io.BytesIO(data), header=None, names=columns, **read_csv_kwargs)
+
+
+def _read_range_in_worker(task) -> Tuple[pd.DataFrame, int, Optional[int]]:
+    # Runs in a worker process: reads its own byte range from disk and parses it, and reports the peak memory
+    # of the worker so far
+    return _read_range(task), os.getpid(), peak_rss()
+
+
+class ParallelCsvReader:
+    """
+    Reads a CSV file as DataFrame chunks parsed in parallel worker processes. The file is split into byte
+    ranges aligned to record boundaries, each worker reads and parses its own ranges, and the chunks are
+    yielded in file order, with a bounded number of ranges in flight so memory stays around a few chunks.
+    Only ASCII-compatible encodings and doubled quotes, not escaped ones, can be split this way.
+
+    Attributes:
+        path (str): The path to the CSV file.
+        workers (int): Number of worker processes.
+        chunk_size (int): Approximate number of rows per chunk, used to size the byte ranges.
+        range_bytes (int): Size of the byte ranges, estimated from the average row size when not given.
+        columns (List[str]): The column names, read from the header row.
+        worker_peak_rss (Dict[int, int]): The peak resident memory of each worker process by process id, in bytes,
+                                          as of the last range it parsed.
+    """
+
+    def __init__(self, path: str, workers: int, chunk_size: int = 1000000, encoding: Optional[str] = None,
+                 quotechar: str = '"', header: Optional[int] = 0, range_bytes: Optional[int] = None,
+                 **read_csv_kwargs):
+        self.path = path
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.quotechar = quotechar
+        self.read_csv_kwargs = dict(read_csv_kwargs, encoding=encoding, quotechar=quotechar)
+        self.worker_peak_rss: Dict[int, int] = {}
+
+        if header is None:
+            # Without a header the columns are numbered, as pandas numbers them
+            first_row = pd.read_csv(path, nrows=1, header=None, **self.read_csv_kwargs)
+            self.columns = list(range(len(first_row.columns)))
+            self.data_start = 0
+        else:
+            self.columns = list(pd.read_csv(path, nrows=0, **self.read_csv_kwargs).columns)
+            with open(path, 'rb') as handle:
+                self.data_start = _next_record_start(handle, 0, 0, quotechar.encode('ascii')) or \
+                    os.path.getsize(path)
+        self.range_bytes = range_bytes or self._estimate_range_bytes()
+
+    def _estimate_range_bytes(self) -> int:
+        with open(self.path, 'rb') as handle:
+            handle.seek(self.data_start)
+            probe = handle.read(ROW_SIZE_PROBE_BYTES)
+        row_bytes = len(probe) / max(probe.count(b'\n'), 1)
+        data_bytes = os.path.getsize(self.path) - self.data_start
+        # Ranges of about chunk_size rows, but at least one range per worker
+        per_worker = math.ceil(data_bytes / self.workers)
+        return max(MIN_RANGE_BYTES, min(int(row_bytes * self.chunk_size), per_worker))
+
+    def ranges(self) -> List[Tuple[int, int]]:
+        """
+        Returns the byte ranges the records are split into.
+        """
+        return split_byte_ranges(self.path, self.data_start, self.range_bytes, self.quotechar)
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        tasks = [(self.path, start, end, self.columns, self.read_csv_kwargs) for start, end in self.ranges()]
+        if not tasks:
+            yield pd.DataFrame(columns=self.columns)
+            return
+        if len(tasks) == 1:
+            yield _read_range(tasks[0])
+            return
+
+        # Spawned workers do not inherit the threads and open connections of a forked server process
+        context = multiprocessing.get_context('spawn')
+        executor = ProcessPoolExecutor(max_workers=min(self.workers, len(tasks)), mp_context=context)
+        try:
+            tasks = iter(tasks)
+            pending = deque(executor.submit(_read_range_in_worker, task)
+                            for task in itertools.islice(tasks, 2 * self.workers))
+            while pending:
+                chunk, pid, worker_peak = pending.popleft().result()
+                if worker_peak is not None:
+                    self.worker_peak_rss[pid] = max(self.worker_peak_rss.get(pid, 0), worker_peak)
+                for task in itertools.islice(tasks, 1):
+                    pending.append(executor.submit(_read_range_in_worker, task))
+                yield chunk
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+
+class ArrowCsvReader:
+    """
+    Reads a CSV file with the multithreaded pyarrow.csv parser and yields DataFrame chunks whose text columns
+    are Arrow-backed strings, converted from the Arrow table without copying values into Python objects. The
+    parsed table is held in Arrow memory, typically smaller than the file, and only one pandas chunk at a time
+    is materialized from it.
+
+    Attributes:
+        path (str): The path to the CSV file.
+        chunk_size (int): Number of rows per chunk.
+        dialect (CsvDialect): The encoding and dialect of the file, the pandas defaults when not given.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 1000000, dialect: Optional[CsvDialect] = None):
+        if pa is None:
+            raise ImportError("The pyarrow CSV engine requires pyarrow.")
+        self.path = path
+        self.chunk_size = chunk_size
+        self.dialect = dialect or CsvDialect()
+
+    def read_table(self):
+        """
+        Parses the whole file into an Arrow table, with booleans and missing values read as the C parser
+        reads them, and dates kept as text so the datetime checks see them like any other column.
+        """
+        dialect = self.dialect
+        encoding = 'utf8' if dialect.encoding in ('utf-8', 'utf-8-sig') else dialect.encoding
+        read_options = pa_csv.ReadOptions(encoding=encoding, autogenerate_column_names=dialect.header_row is None)
+        parse_options = pa_csv.ParseOptions(delimiter=dialect.delimiter, quote_char=dialect.quotechar,
+                                            double_quote=dialect.doublequote, escape_char=dialect.escapechar or False)
+        convert_options = pa_csv.ConvertOptions(true_values=['True', 'TRUE', 'true'],
+                                                false_values=['False', 'FALSE', 'false'],
+                                                strings_can_be_null=True, timestamp_parsers=[])
+        try:
+            table = pa_csv.read_csv(self.path, read_options=read_options, parse_options=parse_options,
+                                    convert_options=convert_options)
+        except pa.ArrowInvalid as error:
+            if 'UTF8' not in str(error):
+                raise
+            raise UnicodeDecodeError('utf-8', b'', 0, 1, str(error)) from error
+
+        # Unnamed columns are named the way the C parser names them, so they are dropped the same way
+        table = table.rename_columns([name or f'Unnamed: {index}' for index, name in enumerate(table.column_names)])
+        for index, field in enumerate(table.schema):
+            if pa.types.is_binary(field.type):
+                # Columns with bytes invalid in the encoding are inferred as binary, replace those bytes like
+                # the C engine does
+                values = [value if value is None else value.decode(dialect.encoding, errors='replace')
+                          for value in table.column(index).to_pylist()]
+                table = table.set_column(index, field.name, pa.array(values, type=pa.string()))
+            if pa.types.is_temporal(field.type):
+                table = table.set_column(index, field.name, table.column(index).cast(pa.string()))
+        return table
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        table = self.read_table()
+        types_mapper = {pa.string(): pd.StringDtype('pyarrow'), pa.large_string(): pd.StringDtype('pyarrow')}.get
+        if table.num_rows == 0:
+            yield table.to_pandas(types_mapper=types_mapper)
+            return
+        for offset in range(0, table.num_rows, self.chunk_size):
+            chunk = table.slice(offset, self.chunk_size).to_pandas(types_mapper=types_mapper)
+            if self.dialect.header_row is None:
+                # Without a header the columns are numbered, as pandas numbers them
+                chunk.columns = range(len(chunk.columns))
+            yield chunk
+
+
+def _xls_value(cell, datemode: int):
+    """
+    Returns the value of an xlrd cell the way openpyxl returns it: None for empty cells, bool for booleans and
+    datetime for dates, which xlrd stores as numbers.
+    """
+    if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+        return None
+    if cell.ctype == xlrd.XL_CELL_BOOLEAN:
+        return bool(cell.value)
+    if cell.ctype == xlrd.XL_CELL_DATE:
+        return xlrd.xldate_as_datetime(cell.value, datemode)
+    return cell.value
+
+
+class ExcelReader:
+    """
+    Streams the rows of the first worksheet of a workbook and yields DataFrame chunks of chunk_size rows, so a
+    workbook is sampled and converted like a CSV file without loading it whole. .xlsx workbooks are read with
+    openpyxl in read-only mode, which parses the sheet XML as the rows are iterated, and legacy .xls workbooks
+    with xlrd. Columns holding anything but numbers or booleans are read as text, the way the C parser reads
+    them, so the datetime and category checks see them like any other column.
+
+    Attributes:
+        path (str): The path to the workbook.
+        chunk_size (int): Number of rows per chunk.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 1000000):
+        if path.endswith('.xls'):
+            if xlrd is None:
+                raise ImportError("Reading .xls workbooks requires xlrd.")
+        elif openpyxl is None:
+            raise ImportError("Reading .xlsx workbooks requires openpyxl.")
+        self.path = path
+        self.chunk_size = chunk_size
+
+    def rows(self) -> Iterator[tuple]:
+        """
+        Yields the cell values of each row of the first worksheet, the header row included.
+        """
+        if self.path.endswith('.xls'):
+            book = xlrd.open_workbook(self.path, on_demand=True)
+            try:
+                sheet = book.sheet_by_index(0)
+                for index in range(sheet.nrows):
+                    yield tuple(_xls_value(cell, book.datemode) for cell in sheet.row(index))
+            finally:
+                book.release_resources()
+        else:
+            book = openpyxl.load_workbook(self.path, read_only=True, data_only=True)
+            try:
+                yield from book.worksheets[0].iter_rows(values_only=True)
+            finally:
+                book.close()
+
+    @staticmethod
+    def _to_frame(rows: List[tuple], columns: List[str]) -> pd.DataFrame:
+        width = len(columns)
+        df = pd.DataFrame([row[:width] + (None,) * (width - len(row)) for row in rows], columns=columns,
+                          dtype=object)
+        for col in df.columns:
+            values = df[col].infer_objects()
+            if not pd.api.types.is_numeric_dtype(values):
+                values = df[col].map(lambda value: value if value is None else str(value))
+            df[col] = values
+        return df
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        rows = self.rows()
+        header = next(rows, None)
+        if header is None:
+            yield pd.DataFrame()
+            return
+        # Unnamed columns are named the way the C parser names them, so they are dropped the same way
+        columns = [f'Unnamed: {index}' if name is None else str(name) for index, name in enumerate(header)]
+        # Blank rows are skipped, as the C parser skips blank lines
+        rows = (row for row in rows if any(value is not None and value != '' for value in row))
+        empty = True
+        while True:
+            block = list(itertools.islice(rows, self.chunk_size))
+            if not block:
+                break
+            empty = False
+            yield self._to_frame(block, columns)
+        if empty:
+            yield pd.DataFrame(columns=columns)
@@ -0,0 +1,205 @@
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cleaner.readers import BLOCK_SIZE
+from cleaner.sniffer import CsvDialect
+
+# Data rows between two indexed offsets: a window read skips fewer rows than this before its first row
+ROW_INDEX_STEP = 1000
+
+NEWLINE = ord('\n')
+CARRIAGE_RETURN = ord('\r')
+
+
+def index_path(file_path: str) -> str:
+    """
+    Returns the path of the row index of a file, a hidden file next to it.
+    """
+    directory, name = os.path.split(file_path)
+    return os.path.join(directory, f'.{name}.rows.npz')
+
+
+def indexable(dialect: CsvDialect) -> bool:
+    """
+    Tells if the records of a file can be found by scanning its bytes: newlines and quotes must be single
+    bytes, which rules out UTF-16.
+    """
+    return not dialect.encoding.lower().startswith('utf-16')
+
+
+@dataclass
+class RowIndex:
+    """
+    Sparse index of the byte offsets of the data rows of a CSV file, one every step rows, so a window of rows
+    is read by seeking close to it rather than parsing the rows before it.
+
+    Attributes:
+        offsets (np.ndarray): The byte offset of data rows 0, step, 2 * step, ...
+        step (int): The number of data rows between two offsets.
+        rows (int): The number of data rows, blank lines excluded as pandas skips them.
+        size (int): The size of the file indexed, to detect it changed.
+        mtime_ns (int): The modification time of the file indexed, to detect it changed.
+    """
+    offsets: np.ndarray
+    step: int
+    rows: int
+    size: int
+    mtime_ns: int
+
+    @classmethod
+    def build(cls, file_path: str, dialect: CsvDialect, step: int = ROW_INDEX_STEP) -> 'RowIndex':
+        """
+        Indexes a file in a single pass over its bytes, finding record ends as the newlines outside of quoted
+        fields from the parity of the quote characters, vectorised per block.
+
+        Args:
+        - file_path: The path of the CSV file.
+        - dialect: The dialect of the file, its encoding must be indexable.
+        - step: The number of data rows between two offsets.
+
+        Returns:
+        - The RowIndex of the file.
+        """
+        stat = os.stat(file_path)
+        quote = ord(dialect.quotechar)
+        escape = ord(dialect.escapechar) if dialect.escapechar else None
+        header_pending = dialect.header_row is not None
+
+        offsets = []
+        rows = 0
+        in_quotes = 0
+        record_start = 0
+        position = 0
+        last_byte = NEWLINE
+
+        with open(file_path, 'rb') as file:
+            while True:
+                block = file.read(BLOCK_SIZE)
+                if not block:
+                    break
+                data = np.frombuffer(block, dtype=np.uint8)
+
+                quotes = data == quote
+                if escape is not None:
+                    quotes[1:] &= data[:-1] != escape
+                parity = (np.cumsum(quotes, dtype=np.int64) + in_quotes) % 2
+                ends = np.flatnonzero((data == NEWLINE) & (parity == 0))
+                in_quotes = int(parity[-1])
+
+                # Records are the bytes up to each end, blank ones (an empty or a lone carriage return line)
+                # are skipped by pandas and not counted
+                starts = np.concatenate(([record_start], ends + position + 1))[:len(ends)]
+                lengths = ends + position - starts
+                before = np.where(ends > 0, data[np.maximum(ends - 1, 0)], last_byte)
+                filled = (lengths > 1) | ((lengths == 1) & (before != CARRIAGE_RETURN))
+                starts = starts[filled]
+
+                if header_pending and len(starts):
+                    header_pending = False
+                    starts = starts[1:]
+                first = (-rows) % step
+                offsets.extend(starts[first::step].tolist())
+                rows += len(starts)
+
+                if len(ends):
+                    record_start = int(ends[-1]) + position + 1
+                position += len(block)
+                last_byte = int(data[-1])
+
+        # A last record without a trailing newline
+        if position - record_start > 1 or (position - record_start == 1 and last_byte != CARRIAGE_RETURN):
+            if header_pending:
+                header_pending = False
+            else:
+                if rows % step == 0:
+                    offsets.append(record_start)
+                rows += 1
+
+        return cls(np.array(offsets, dtype=np.int64), step, rows, stat.st_size, stat.st_mtime_ns)
+
+    def save(self, path: str):
+        with open(path, 'wb') as file:
+            np.savez(file, offsets=self.offsets,
+                     meta=np.array([self.step, self.rows, self.size, self.mtime_ns], dtype=np.int64))
+
+    @classmethod
+    def load(cls, file_path: str) -> Optional['RowIndex']:
+        """
+        Loads the row index of a file, if there is one and the file has not changed since it was built.
+        """
+        path = index_path(file_path)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            step, rows, size, mtime_ns = (int(value) for value in data['meta'])
+            index = cls(data['offsets'], step, rows, size, mtime_ns)
+        stat = os.stat(file_path)
+        if (stat.st_size, stat.st_mtime_ns) != (index.size, index.mtime_ns):
+            return None
+        return index
+
+    def locate(self, row: int) -> Tuple[int, int]:
+        """
+        Returns the byte offset to seek to for a data row, and the number of rows to skip from there.
+        """
+        position = row // self.step
+        return int(self.offsets[position]), row - position * self.step
+
+
+def build_row_index(file_path: str, dialect: CsvDialect, step: int = ROW_INDEX_STEP) -> Optional[RowIndex]:
+    """
+    Builds the row index of a file and saves it next to the file.
+
+    Returns:
+    - The RowIndex, or None if the encoding of the file cannot be indexed.
+    """
+    if not indexable(dialect):
+        return None
+    index = RowIndex.build(file_path, dialect, step)
+    index.save(index_path(file_path))
+    return index
+
+
+def read_row_window(file_path: str, dialect: CsvDialect, start: int,
+                    count: int) -> Tuple[List[str], List[list], Optional[int]]:
+    """
+    Reads the data rows [start, start + count) of a CSV file as stored, seeking to the closest indexed offset
+    so any window costs the same. The index is built first if it is missing or the file changed.
+
+    Args:
+    - file_path: The path of the CSV file.
+    - dialect: The dialect of the file.
+    - start: The first data row, from 0.
+    - count: The number of rows.
+
+    Returns:
+    - The column names, the rows as lists of strings, and the number of data rows of the file or None if the
+      encoding cannot be indexed, in which case the rows before the window are parsed.
+    """
+    kwargs = dialect.read_csv_kwargs()
+    header = kwargs.pop('header')
+    columns = list(pd.read_csv(file_path, nrows=0, **kwargs).columns) if header is not None else None
+    read_kwargs = dict(kwargs, header=None, names=columns, dtype=str, keep_default_na=False)
+
+    index = RowIndex.load(file_path) or build_row_index(file_path, dialect)
+    if index is None:
+        df = pd.read_csv(file_path, skiprows=1 if header is not None else None, nrows=start + count, **read_kwargs)
+        df = df.iloc[start:]
+        total = None
+    elif start >= index.rows:
+        df = pd.DataFrame(columns=columns)
+        total = index.rows
+    else:
+        offset, skip = index.locate(start)
+        with open(file_path, 'rb') as file:
+            file.seek(offset)
+            df = pd.read_csv(file, nrows=skip + count, **read_kwargs).iloc[skip:]
+        total = index.rows
+
+    if columns is None:
+        columns = [str(column) for column in df.columns]
+    return columns, df.values.tolist(), total
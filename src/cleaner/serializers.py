@@ -1,19 +1,40 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import CsvFileInference
+from .models import CsvColumn, CsvFileInference, InferenceJob
+from .memory import MIN_MEMORY_BUDGET
+from .inferencer import CONVERTIBLE_DTYPES
+from .readers import CSV_ENGINES
+
+# Most files a bulk update may change at once
+BULK_UPDATE_MAX_FILES = 5000
 
 
 class CleanerSerializer(serializers.Serializer):
     document = serializers.FileField()
     chunk_size = serializers.IntegerField(default=1000000)
-    sample_size_per_chunk = serializers.IntegerField(default=1000000)
+    sample_size = serializers.IntegerField(required=False, min_value=1)
+    sample_size_per_chunk = serializers.IntegerField(required=False, min_value=1)
     random_state = serializers.IntegerField(default=0)
     valid_threshold = serializers.FloatField(default=0.5)
     category_threshold = serializers.FloatField(default=0.5)
+    workers = serializers.IntegerField(default=1, min_value=1, max_value=settings.INFERENCE_MAX_WORKERS)
+    engine = serializers.ChoiceField(choices=CSV_ENGINES, default='c')
+    profile = serializers.BooleanField(default=False)
+    memory_budget = serializers.IntegerField(required=False, min_value=MIN_MEMORY_BUDGET)
+
+
+class InferenceJobOptionsSerializer(serializers.Serializer):
+    profile = serializers.BooleanField(default=False)
+
+
+class RowWindowSerializer(serializers.Serializer):
+    start = serializers.IntegerField(default=0, min_value=0)
+    count = serializers.IntegerField(default=100, min_value=1, max_value=1000)
 
 
 class ColumnUpdateSerializer(serializers.Serializer):
     name = serializers.CharField(max_length=255)
-    new_dtype = serializers.CharField(max_length=50)
+    new_dtype = serializers.ChoiceField(choices=CONVERTIBLE_DTYPES)
 
 
 class CsvFileInferenceUpdateSerializer(serializers.Serializer):
@@ -21,20 +42,56 @@ class CsvFileInferenceUpdateSerializer(serializers.Serializer):
     columns = ColumnUpdateSerializer(many=True)
 
     def update_columns_data(self, instance, validated_data):
-        columns_data = instance.get_columns_data()
+        instance.update_column_types({update['name']: update['new_dtype'] for update in validated_data['columns']})
+        return instance
 
-        for update in validated_data['columns']:
-            for column_data in columns_data:
-                if column_data['name'] == update['name']:
-                    column_data['user_defined_type'] = update['new_dtype']
-                    break
 
-        instance.set_columns_data(columns_data)
-        instance.save()
-        return instance
+class BulkColumnUpdateSerializer(serializers.Serializer):
+    files = CsvFileInferenceUpdateSerializer(many=True, allow_empty=False, max_length=BULK_UPDATE_MAX_FILES)
+
+    def update_columns_data(self, validated_data):
+        """
+        Updates the columns of every file in one transaction.
+
+        Returns:
+        - The number of columns updated.
+        """
+        updates = {}
+        for file in validated_data['files']:
+            updates.setdefault(file['file_name'], {}).update(
+                {update['name']: update['new_dtype'] for update in file['columns']})
+        return CsvColumn.update_types(updates)
 
 
 class CsvFileInferenceSerializer(serializers.ModelSerializer):
+    columns_data = serializers.SerializerMethodField()
+
     class Meta:
         model = CsvFileInference
         fields = ['file_name', 'columns_data']
+
+    def get_columns_data(self, obj):
+        return obj.get_columns_data()
+
+
+class CsvFileNameSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CsvFileInference
+        fields = ['file_name']
+
+
+class CsvFileListSerializer(serializers.Serializer):
+    include_columns = serializers.BooleanField(default=True)
+
+
+class InferenceJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.UUIDField(source='id', read_only=True)
+    columns = serializers.SerializerMethodField()
+
+    class Meta:
+        model = InferenceJob
+        fields = ['job_id', 'file_name', 'kind', 'status', 'cache_hit', 'stage', 'progress', 'rows_processed',
+                  'peak_rss', 'columns', 'error', 'created_at', 'finished_at']
+
+    def get_columns(self, obj):
+        return obj.get_columns_data()
@@ -0,0 +1,136 @@
+from typing import Dict, List
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+    pq = None
+
+SINK_FORMATS = ('parquet', 'feather')
+
+
+def arrow_type(dtype: str, file_format: str = 'parquet'):
+    """
+    Maps a dtype from an inferred type_map to the Arrow type it is written as.
+
+    Args:
+    - dtype: The inferred pandas dtype name.
+    - file_format: The sink format, categories are dictionary encoded in Parquet only since Feather files
+                   cannot replace a dictionary between chunks.
+
+    Returns:
+    - The Arrow data type. Complex numbers have no Arrow type and are written as strings, like text.
+    """
+    if dtype in ('Int8', 'Int16', 'Int32', 'Int64'):
+        return pa.from_numpy_dtype(dtype.lower())
+    if dtype in ('float32', 'float64'):
+        return pa.from_numpy_dtype(dtype)
+    if dtype == 'bool':
+        return pa.bool_()
+    if dtype == 'datetime64[ns]':
+        return pa.timestamp('ns')
+    if dtype == 'timedelta64[ns]':
+        return pa.duration('ns')
+    if dtype == 'category' and file_format == 'parquet':
+        return pa.dictionary(pa.int32(), pa.string())
+    return pa.string()
+
+
+def stored_dtype(dtype: str, file_format: str = 'parquet') -> str:
+    """
+    Returns the pandas dtype a column converted to dtype reads back as from a typed file: dtype itself, or
+    'object' for the types written as strings.
+    """
+    return 'object' if pa.types.is_string(arrow_type(dtype, file_format)) else dtype
+
+
+class TypedFileWriter:
+    """
+    Writes converted DataFrame chunks to a Parquet or Feather file incrementally, with a schema fixed up
+    front from the type_map so every chunk lands in the same columns and types.
+
+    Attributes:
+        path (str): The path of the output file.
+        file_format (str): Either 'parquet' or 'feather'.
+        columns (List): The columns of the chunks, in the order they are written.
+        schema (pa.Schema): The Arrow schema of the output file, set when the first chunk is written.
+    """
+
+    def __init__(self, path: str, type_map: Dict[str, str], columns: List[str], file_format: str = 'parquet',
+                 compression: str = 'zstd', row_group_size: int = None):
+        if pa is None:
+            raise ImportError("Writing Parquet or Feather output requires pyarrow.")
+        if file_format not in SINK_FORMATS:
+            raise ValueError(f"Unsupported output format {file_format}.")
+
+        self.path = path
+        self.file_format = file_format
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.columns = list(columns)
+        # Arrow only takes string names, a file read without a header has integer ones
+        self.schema = pa.schema([(str(column), arrow_type(type_map.get(column, 'object'), file_format))
+                                 for column in self.columns])
+        self._writer = None
+
+    def write(self, chunk: pd.DataFrame):
+        """
+        Appends a converted chunk to the output file.
+        """
+        table = self._to_table(chunk)
+        if self._writer is None:
+            # Keep the pandas metadata of the first chunk so the file reads back with the inferred dtypes
+            self.schema = self.schema.with_metadata(self._pandas_metadata(chunk))
+            table = table.replace_schema_metadata(self.schema.metadata)
+            if self.file_format == 'parquet':
+                self._writer = pq.ParquetWriter(self.path, self.schema, compression=self.compression)
+            else:
+                self._writer = pa.ipc.new_file(self.path, self.schema,
+                                               options=pa.ipc.IpcWriteOptions(compression=self.compression))
+        else:
+            table = table.replace_schema_metadata(self.schema.metadata)
+
+        if self.file_format == 'parquet':
+            self._writer.write_table(table, row_group_size=self.row_group_size)
+        else:
+            self._writer.write_table(table)
+
+    def close(self):
+        """
+        Finishes the output file, writing an empty one if no chunk was written.
+        """
+        if self._writer is None:
+            self.write(pd.DataFrame({column: pd.Series(dtype=object) for column in self.columns}))
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _pandas_metadata(self, chunk: pd.DataFrame):
+        empty = chunk[self.columns].head(0)
+        empty.columns = self.schema.names
+        # Columns written as strings are described as text, Arrow cannot describe complex numbers anyway
+        text_columns = [field.name for field in self.schema if pa.types.is_string(field.type)]
+        empty = empty.astype({column: object for column in text_columns})
+        return pa.Schema.from_pandas(empty, preserve_index=False).metadata
+
+    def _to_table(self, chunk: pd.DataFrame):
+        arrays = []
+        for column, field in zip(self.columns, self.schema):
+            values = chunk[column]
+            if pa.types.is_string(field.type) or pa.types.is_dictionary(field.type):
+                # Text, complex numbers and columns whose conversion was rolled back are written as strings
+                values = values.astype(str).where(values.notna(), None).astype(object)
+                array = pa.array(values, type=pa.string(), from_pandas=True)
+                if pa.types.is_dictionary(field.type):
+                    array = array.dictionary_encode().cast(field.type)
+            else:
+                array = pa.array(values, type=field.type, from_pandas=True)
+            arrays.append(array)
+        return pa.Table.from_arrays(arrays, schema=self.schema)
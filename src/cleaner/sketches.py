@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+
+# Distinct values counted exactly before switching to a HyperLogLog sketch
+DISTINCT_EXACT_LIMIT = 65536
+# HyperLogLog precision, 2 ** 14 registers for a standard error of about 0.8%
+HLL_PRECISION = 14
+# Python str overhead in bytes, as reported by sys.getsizeof('')
+STR_OVERHEAD_BYTES = 49
+# Values per chunk whose lengths are measured to estimate the average value size
+VALUE_SIZE_PROBE = 256
+
+
+def _bit_length(values):
+    # Exact bit length of uint64 values, computed on 32-bit halves so float64 rounding cannot creep in
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    with np.errstate(divide='ignore'):
+        high_bits = np.where(high > 0, np.floor(np.log2(high)) + 33, 0)
+        low_bits = np.where(low > 0, np.floor(np.log2(low)) + 1, 0)
+    return np.where(high > 0, high_bits, low_bits).astype(np.int64)
+
+
+class DistinctCounter:
+    """
+    A streaming distinct-count sketch. Values are counted exactly until DISTINCT_EXACT_LIMIT distinct
+    hashes have been seen, after which the counter switches to a HyperLogLog sketch with constant memory.
+
+    Attributes:
+        precision (int): Number of hash bits used to pick a HyperLogLog register.
+        hashes (set): Distinct value hashes while counting exactly, None once switched to HyperLogLog.
+        registers (np.ndarray): HyperLogLog registers once switched, None while counting exactly.
+    """
+
+    def __init__(self, max_exact: int = DISTINCT_EXACT_LIMIT, precision: int = HLL_PRECISION):
+        self.max_exact = max_exact
+        self.precision = precision
+        self.hashes = set()
+        self.registers = None
+
+    def update(self, values: pd.Series) -> 'DistinctCounter':
+        """
+        Adds the non-null values of a chunk to the counter.
+        """
+        hashes = pd.util.hash_pandas_object(values.dropna(), index=False).to_numpy()
+        if self.registers is None:
+            hashes = pd.unique(hashes)
+            if len(self.hashes) + len(hashes) <= self.max_exact:
+                self.hashes.update(hashes.tolist())
+                return self
+            self._switch_to_sketch()
+        self._add_to_registers(hashes)
+        return self
+
+    def merge(self, other: 'DistinctCounter') -> 'DistinctCounter':
+        """
+        Merges the values counted by another counter with the same precision into this one.
+        """
+        if other.registers is None:
+            if self.registers is None:
+                self.hashes.update(other.hashes)
+                if len(self.hashes) > self.max_exact:
+                    self._switch_to_sketch()
+            else:
+                self._add_to_registers(np.fromiter(other.hashes, dtype=np.uint64, count=len(other.hashes)))
+        else:
+            if self.registers is None:
+                self._switch_to_sketch()
+            np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        """
+        Returns the number of distinct values seen, exact below DISTINCT_EXACT_LIMIT.
+        """
+        if self.registers is None:
+            return len(self.hashes)
+
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if raw <= 2.5 * m and zeros > 0:
+            # Small range correction
+            return int(round(m * np.log(m / zeros)))
+        return int(round(raw))
+
+    def _switch_to_sketch(self):
+        self.registers = np.zeros(1 << self.precision, dtype=np.uint8)
+        self._add_to_registers(np.fromiter(self.hashes, dtype=np.uint64, count=len(self.hashes)))
+        self.hashes = None
+
+    def _add_to_registers(self, hashes):
+        if len(hashes) == 0:
+            return
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        remaining = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        # Position of the leftmost one bit in the remaining hash bits
+        rank = (64 - self.precision) - _bit_length(remaining) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+
+class CategorySketch:
+    """
+    Incremental statistics used to decide whether a column is better stored as 'category', computed
+    chunk by chunk without materializing the column or its categorical copy.
+
+    Attributes:
+        count (int): Number of non-null values seen.
+        distinct (DistinctCounter): Distinct-count sketch of the values seen.
+        probed_values (int): Number of values whose size was measured.
+        probed_bytes (int): Total size in bytes of the measured values.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.distinct = DistinctCounter()
+        self.probed_values = 0
+        self.probed_bytes = 0
+
+    def update(self, values: pd.Series) -> 'CategorySketch':
+        """
+        Adds the non-null values of a chunk to the sketch.
+        """
+        values = values.dropna()
+        self.count += len(values)
+        self.distinct.update(values)
+
+        probe = values.iloc[:VALUE_SIZE_PROBE].astype(str)
+        self.probed_values += len(probe)
+        self.probed_bytes += int(probe.str.len().sum()) + STR_OVERHEAD_BYTES * len(probe)
+        return self
+
+    def merge(self, other: 'CategorySketch') -> 'CategorySketch':
+        """
+        Merges the statistics of a sketch computed on another chunk into this one.
+        """
+        self.count += other.count
+        self.distinct.merge(other.distinct)
+        self.probed_values += other.probed_values
+        self.probed_bytes += other.probed_bytes
+        return self
+
+    def distinct_ratio(self) -> float:
+        """
+        Returns the estimated proportion of distinct values among the values seen.
+        """
+        return min(self.distinct.estimate() / self.count, 1.0) if self.count else 0.0
+
+    def predicted_memory(self):
+        """
+        Predicts the memory usage of the values seen, in bytes, as Python strings in an object column and as a
+        categorical (integer codes plus one string per category).
+
+        Returns:
+            Tuple[int, int]: The object and category memory usage.
+        """
+        value_bytes = self.probed_bytes / self.probed_values if self.probed_values else STR_OVERHEAD_BYTES
+        distinct = min(self.distinct.estimate(), self.count)
+        code_bytes = np.min_scalar_type(-max(distinct, 1)).itemsize
+
+        memory_usage_text = self.count * (8 + value_bytes)
+        memory_usage_category = self.count * code_bytes + distinct * (8 + value_bytes)
+        return int(memory_usage_text), int(memory_usage_category)
+
+
+class ReservoirSampler:
+    """
+    A fixed-size uniform sample of the rows of a stream of DataFrame chunks (reservoir sampling,
+    vectorized per chunk). Memory stays bounded by the sample size however many rows the stream has.
+
+    Attributes:
+        size (int): Maximum number of rows kept in the sample.
+        seen (int): Number of rows seen so far.
+        sample (pd.DataFrame): The rows sampled so far, indexed by their slot in the reservoir.
+    """
+
+    def __init__(self, size: int, random_state: int = 0):
+        self.size = size
+        self.rng = np.random.default_rng(random_state)
+        self.seen = 0
+        self.sample = None
+
+    def update(self, chunk: pd.DataFrame) -> 'ReservoirSampler':
+        """
+        Offers the rows of a chunk to the reservoir.
+        """
+        fill = max(0, min(self.size - self.seen, len(chunk)))
+        if fill > 0 or self.sample is None:
+            # The reservoir is not full yet, keep the rows as they come
+            head = chunk.iloc[:fill]
+            self.sample = head.reset_index(drop=True) if self.sample is None else \
+                pd.concat([self.sample, head], ignore_index=True)
+
+        if fill < len(chunk):
+            # Row t of the stream replaces a random slot with probability size / (t + 1)
+            positions = np.arange(self.seen + fill, self.seen + len(chunk))
+            slots = self.rng.integers(0, positions + 1)
+            rows = np.flatnonzero(slots < self.size) + fill
+            slots = slots[rows - fill]
+
+            # When a slot is drawn more than once, the latest row wins
+            _, latest = np.unique(slots[::-1], return_index=True)
+            latest = len(slots) - 1 - latest
+            if len(latest) > 0:
+                replacement = chunk.iloc[rows[latest]]
+                replacement.index = slots[latest]
+                self.sample = pd.concat([self.sample.drop(index=slots[latest]), replacement])
+
+        self.seen += len(chunk)
+        return self
+
+    def result(self) -> pd.DataFrame:
+        """
+        Returns the sampled rows in reservoir slot order.
+        """
+        if self.sample is None:
+            return pd.DataFrame()
+        return self.sample.sort_index().reset_index(drop=True)
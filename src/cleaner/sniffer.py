@@ -0,0 +1,201 @@
+import codecs
+import csv
+import io
+import itertools
+import os
+import re
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+# Bytes read from the start of the file to sniff the dialect and header
+PREFIX_BYTES = 1 << 16
+# Blocks sampled over the rest of the file to check the encoding
+SAMPLE_BLOCKS = 8
+SAMPLE_BLOCK_BYTES = 1 << 14
+
+# Encodings tried in order, latin-1 decodes any byte so it always matches
+ENCODINGS = ('utf-8', 'cp1252', 'latin-1')
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+DELIMITERS = ',;\t|'
+# Rows after the first compared with it to tell a header of numbers from data, as many as csv.Sniffer compares
+HEADER_PROBE_ROWS = 20
+
+
+@dataclass
+class CsvDialect:
+    """
+    The encoding and dialect of a CSV file, sniffed once and reused by every later read of the file.
+
+    Attributes:
+        encoding (str): The text encoding of the file.
+        delimiter (str): The field delimiter.
+        quotechar (str): The character used to quote fields.
+        doublequote (bool): Whether a quote inside a quoted field is written as two quotes.
+        escapechar (str): The character escaping quotes when doublequote is False, if any.
+        header_row (int): The row holding the column names, None when the file has no header.
+    """
+    encoding: str = 'utf-8'
+    delimiter: str = ','
+    quotechar: str = '"'
+    doublequote: bool = True
+    escapechar: Optional[str] = None
+    header_row: Optional[int] = 0
+
+    def read_csv_kwargs(self) -> Dict[str, Any]:
+        """
+        Returns the pd.read_csv arguments reading the file with this dialect. Bytes invalid in the encoding,
+        outside of the sampled blocks, are replaced rather than failing the read.
+        """
+        return {
+            'encoding': self.encoding,
+            'encoding_errors': 'replace',
+            'sep': self.delimiter,
+            'quotechar': self.quotechar,
+            'doublequote': self.doublequote,
+            'escapechar': self.escapechar,
+            'header': self.header_row,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CsvDialect':
+        return cls(**data)
+
+
+def _read_samples(path: str, prefix_bytes: int, block_count: int, block_bytes: int) -> List[bytes]:
+    size = os.path.getsize(path)
+    with open(path, 'rb') as handle:
+        samples = [handle.read(prefix_bytes)]
+        if size > prefix_bytes + block_bytes:
+            # Blocks spread evenly over the rest of the file, the last one ending at the end of the file
+            step = (size - prefix_bytes - block_bytes) / max(block_count - 1, 1)
+            for index in range(block_count):
+                handle.seek(prefix_bytes + int(index * step))
+                samples.append(handle.read(block_bytes))
+        elif size > prefix_bytes:
+            samples.append(handle.read())
+    return samples
+
+
+def _decodes(samples: List[bytes], encoding: str) -> bool:
+    for index, sample in enumerate(samples):
+        if index > 0 and encoding == 'utf-8':
+            # A sampled block may start in the middle of a multi-byte character
+            sample = sample.lstrip(bytes(range(0x80, 0xC0)))
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            # A block may also end in the middle of one, unless it is the last, ending the file
+            decoder.decode(sample, final=index == len(samples) - 1)
+        except UnicodeDecodeError:
+            return False
+    return True
+
+
+def detect_encoding(samples: List[bytes]) -> str:
+    """
+    Detects the encoding of a file from its byte order mark, or as the first of ENCODINGS decoding the
+    prefix and every sampled block.
+
+    Args:
+    - samples: The prefix of the file followed by blocks sampled over the rest of it, the last one ending
+               the file.
+
+    Returns:
+    - The name of the encoding.
+    """
+    for bom, encoding in BOMS:
+        if samples[0].startswith(bom):
+            return encoding
+    for encoding in ENCODINGS:
+        if _decodes(samples, encoding):
+            return encoding
+    return ENCODINGS[-1]
+
+
+def _value_type(value: str) -> type:
+    for cast in (int, float):
+        try:
+            cast(value)
+            return cast
+        except ValueError:
+            pass
+    return str
+
+
+def _is_data_row(first_row: List[str], rows: List[List[str]]) -> bool:
+    # A first row of numbers only is data when every column holds values of the same type below it, like
+    # csv.Sniffer.has_header; numbers heading numbers of another type or text, such as years, are a header
+    columns = [(value, [row[index] for row in rows if index < len(row) and row[index]])
+               for index, value in enumerate(first_row) if value]
+    if not columns or any(_value_type(value) is str for value, _ in columns):
+        return False
+    compared = [(value, below) for value, below in columns if below]
+    return bool(compared) and all({_value_type(other) for other in below} == {_value_type(value)}
+                                  for value, below in compared)
+
+
+def sniff_csv(path: str, prefix_bytes: int = PREFIX_BYTES, block_count: int = SAMPLE_BLOCKS,
+              block_bytes: int = SAMPLE_BLOCK_BYTES) -> CsvDialect:
+    """
+    Sniffs the encoding, delimiter, quoting and header row of a CSV file from a bounded prefix and blocks
+    sampled over the rest of the file, so the file is never read whole.
+
+    Args:
+    - path: The path to the CSV file.
+    - prefix_bytes: The number of bytes read from the start of the file.
+    - block_count: The number of blocks sampled after the prefix to check the encoding.
+    - block_bytes: The size of each sampled block.
+
+    Returns:
+    - The CsvDialect of the file, with the pandas defaults for whatever cannot be sniffed.
+    """
+    return sniff_samples(_read_samples(path, prefix_bytes, block_count, block_bytes))
+
+
+def sniff_samples(samples: List[bytes]) -> CsvDialect:
+    """
+    Sniffs the encoding, delimiter, quoting and header row of a CSV file from samples of its bytes.
+
+    Args:
+    - samples: The prefix of the file followed by blocks sampled over the rest of it, the last one ending
+               the file.
+
+    Returns:
+    - The CsvDialect of the file, with the pandas defaults for whatever cannot be sniffed.
+    """
+    dialect = CsvDialect(encoding=detect_encoding(samples))
+
+    text = samples[0].decode(dialect.encoding, errors='replace')
+    if len(samples) > 1:
+        # Only sniff whole lines
+        text = text[:text.rfind('\n') + 1] or text
+    if not text.strip():
+        return dialect
+
+    try:
+        sniffed = csv.Sniffer().sniff(text, delimiters=DELIMITERS)
+        dialect.delimiter = sniffed.delimiter
+        dialect.quotechar = sniffed.quotechar or '"'
+    except csv.Error:
+        # A single column or too few lines, keep the defaults
+        pass
+
+    # Doubled quotes are the norm, backslash escapes are only assumed when they are all the sample has
+    quote = dialect.quotechar
+    if '\\' + quote in text and not re.search(r'(?<!\\)' + re.escape(quote * 2), text):
+        dialect.doublequote = False
+        dialect.escapechar = '\\'
+
+    # The first row is read as the header like pandas does, unless it is numbers typed like the rows below it
+    reader = csv.reader(io.StringIO(text), delimiter=dialect.delimiter, quotechar=quote,
+                        doublequote=dialect.doublequote, escapechar=dialect.escapechar)
+    rows = [[value.strip() for value in row] for row in itertools.islice(reader, HEADER_PROBE_ROWS + 1)]
+    if rows and _is_data_row(rows[0], rows[1:]):
+        dialect.header_row = None
+    return dialect
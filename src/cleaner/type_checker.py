@@ -1,15 +1,65 @@
+import re
 import pandas as pd
 import numpy as np
 import warnings
 from collections import Counter
-from sklearn.cluster import DBSCAN
-from sklearn.preprocessing import StandardScaler
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 from cleaner.utils import zip_float_dtype, zip_float_to_int_dtype, zip_int_dtype
-from sklearn.metrics import silhouette_score
+from cleaner.sketches import CategorySketch
 from dateutil import parser
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+from pandas.tseries.api import guess_datetime_format
 from pytimeparse.timeparse import timeparse
 
+# Number of values used to guess candidate datetime formats
+DATETIME_FORMAT_PROBE_SIZE = 20
+# Number of distinct leftover values parsed one by one before deciding whether the per-value fallback can pay off
+FALLBACK_PROBE_SIZE = 100
+
+_NUMBER = r'\d+(?:\.\d+)?'
+
+# Duration shapes parsed column-at-a-time; every group holds an amount of the unit it is named after
+DURATION_PATTERNS = (
+    # [D day[s][,]] [H]H:MM[:SS[.fff]], MM:SS when only two fields are present (as pytimeparse reads them)
+    re.compile(rf'^(?P<sign>[+-])?\s*(?:(?P<days>\d+)\s*days?,?\s*)?'
+               rf'(?:(?P<hours>\d+):(?=\d+:))?(?P<minutes>\d+):(?P<seconds>[0-5]?\d(?:\.\d+)?)$', re.IGNORECASE),
+    # 1w 2d 3h 4m 5s 6ms, 2 days, 1 hour and 30 minutes, 1.5h
+    re.compile(rf'^(?P<sign>[+-])?\s*(?=\d)'
+               rf'(?:(?P<weeks>{_NUMBER})\s*w(?:ee)?k?s?(?![a-z])\s*,?\s*(?:and\s+)?)?'
+               rf'(?:(?P<days>{_NUMBER})\s*d(?:ays?|ys?)?(?![a-z])\s*,?\s*(?:and\s+)?)?'
+               rf'(?:(?P<hours>{_NUMBER})\s*h(?:ours?|rs?)?(?![a-z])\s*,?\s*(?:and\s+)?)?'
+               rf'(?:(?P<minutes>{_NUMBER})\s*m(?:inutes?|ins?)?(?![a-z])\s*,?\s*(?:and\s+)?)?'
+               rf'(?:(?P<seconds>{_NUMBER})\s*s(?:econds?|ecs?)?(?![a-z])\s*,?\s*(?:and\s+)?)?'
+               rf'(?:(?P<milliseconds>{_NUMBER})\s*(?:ms|millis(?:econds?)?)(?![a-z]))?\s*$', re.IGNORECASE),
+    # ISO-8601 durations without years or months: P1W, P2DT3H, PT1H30M, PT0.5S
+    re.compile(rf'^(?P<sign>[+-])?P(?!$)(?:(?P<weeks>{_NUMBER})W)?(?:(?P<days>{_NUMBER})D)?'
+               rf'(?:T(?=\d)(?:(?P<hours>{_NUMBER})H)?(?:(?P<minutes>{_NUMBER})M)?(?:(?P<seconds>{_NUMBER})S)?)?$',
+               re.IGNORECASE),
+)
+
+# Representations of boolean values, matched against lowercased strings; 1 and 0 also match 1.0, True and 0.0, False
+BOOLEAN_TRUE_VALUES = ['1', 't', 'true', 'yes', 1]
+BOOLEAN_FALSE_VALUES = ['0', 'f', 'false', 'no', 0]
+# Number of values matched in the first block, blocks then double up to BOOLEAN_BLOCK_SIZE
+BOOLEAN_BLOCK_SIZE = 65536
+
+# Number of values matched before the whole column, to give up early on columns that clearly do not qualify
+PROBE_SIZE = 1024
+# z-score of the confidence bound used to give up on columns whose matched proportion is clearly too low
+CONFIDENCE_Z = 4.0
+
+_REAL = r'(?:(?:\d+(?:\.\d*)?|\.\d+)(?:e[+-]?\d+)?|inf(?:inity)?|nan)'
+
+# Complex literals as accepted by complex(): real and imaginary, imaginary only or real only, optionally in parentheses
+COMPLEX_PATTERN = re.compile(rf'\s*(\()?\s*(?:[+-]?{_REAL}(?:[+-]{_REAL}?j)?|[+-]?{_REAL}?j)\s*(?(1)\))\s*', re.IGNORECASE)
+
+# Longest duration timedelta64[ns] holds, in seconds
+MAX_TIMEDELTA_SECONDS = pd.Timedelta.max.total_seconds()
+
+DURATION_UNIT_SECONDS = {
+    'weeks': 604800, 'days': 86400, 'hours': 3600, 'minutes': 60, 'seconds': 1, 'milliseconds': 0.001,
+}
+
 
 # Attempt conversion to datetime
 def try_parse_date(x):
@@ -23,25 +73,147 @@ def try_parse_date(x):
         return pd.NaT
 
 
-def check_datetime(valid_values, threshold=0.5):
+def _fallback_can_pass(parse, unique_leftovers, leftover_count, total, threshold):
+    # Parse a probe of the leftover values one by one and tell whether, at the success rate observed,
+    # the proportion of valid values could still exceed the threshold
+    probe = unique_leftovers[:FALLBACK_PROBE_SIZE]
+    probe_parsed = sum(pd.notna(parse(value)) for value in probe)
+    best_case = (total - leftover_count + leftover_count * probe_parsed / len(probe)) / total
+    return best_case > threshold
+
+
+def _to_naive_datetime64(value):
+    # Normalise a parsed timestamp to a timezone-naive UTC numpy datetime64[ns]
+    if pd.isna(value):
+        return np.datetime64('NaT', 'ns')
+    if value.tzinfo is not None:
+        value = value.tz_convert('UTC').tz_localize(None)
+    return value.to_datetime64().astype('datetime64[ns]')
+
+
+def guess_datetime_formats(values, probe_size=DATETIME_FORMAT_PROBE_SIZE) -> List[str]:
     """
-    Check if a column can be converted to datetime after removing NaN or empty values.
+    Guess a small set of candidate strptime formats from a few non-null values of a column.
 
     Args:
-    - column: The pandas Series to check.
+    - values: The pandas Series to probe.
+    - probe_size: The number of values to guess formats from.
+
+    Returns:
+    - The guessed formats ordered by how many probed values they parse, followed by
+      'ISO8601' as a cheap catch-all candidate.
+    """
+    values = values.dropna()
+    # Probe values spread over the column rather than its head, which is often sorted
+    positions = np.unique(np.linspace(0, len(values) - 1, num=min(probe_size, len(values))).astype(int))
+    probe = values.iloc[positions].astype(str).str.strip()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        guesses = {guess_datetime_format(value) for value in probe} - {None}
+        # Rank the guesses by how many probed values they parse, so an ambiguous month-first guess
+        # does not win over the day-first format an unambiguous value revealed
+        matches = {fmt: pd.to_datetime(probe, format=fmt, errors='coerce').notna().sum() for fmt in guesses}
+
+    formats = [fmt for fmt, count in sorted(matches.items(), key=lambda item: (-item[1], item[0])) if count > 0]
+    formats.append('ISO8601')
+    return formats
+
+
+def parse_datetimes(values, formats, threshold=None) -> Tuple[Optional[pd.Series], List[str]]:
+    """
+    Convert a column to datetime64[ns] by checking each candidate format against the whole column in a
+    single vectorized pass, and only parsing the values left over one by one.
+
+    Args:
+    - values: The pandas Series to convert.
+    - formats: Candidate strptime formats (or 'ISO8601'), tried in order.
+    - threshold: If given, the per-value fallback is skipped as soon as a probe of the leftover values
+                 shows the proportion of valid datetime values cannot exceed it.
+
+    Returns:
+    - A tuple of the converted Series (NaT where a value could not be parsed) and the formats that matched
+      at least one value.
+    """
+    strings = pd.Series(values.astype(str).str.strip().to_numpy(), copy=False)
+    converted = np.full(len(strings), np.datetime64('NaT'), dtype='datetime64[ns]')
+    pending = values.notna().to_numpy() & (strings != '').to_numpy()
+    total = int(pending.sum())
+    matched_formats = []
+
+    for fmt in formats:
+        positions = np.flatnonzero(pending)
+        if len(positions) == 0:
+            break
+        # noinspection PyBroadException
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                parsed = pd.to_datetime(strings.iloc[positions], format=fmt, errors='coerce')
+            if parsed.dt.tz is not None:
+                parsed = parsed.dt.tz_convert('UTC').dt.tz_localize(None)
+        except:
+            # Mixed timezones or an unsupported directive, try the next candidate
+            continue
+        parsed_mask = parsed.notna().to_numpy()
+        if parsed_mask.any():
+            converted[positions[parsed_mask]] = parsed.to_numpy(dtype='datetime64[ns]')[parsed_mask]
+            pending[positions[parsed_mask]] = False
+            matched_formats.append(fmt)
+
+    positions = np.flatnonzero(pending)
+    if len(positions) > 0:
+        leftovers = strings.iloc[positions]
+        unique_leftovers = leftovers.unique()
+
+        if threshold is not None and total > 0 and \
+                not _fallback_can_pass(try_parse_date, unique_leftovers, len(positions), total, threshold):
+            return pd.Series(converted, index=values.index, name=values.name), matched_formats
+
+        parsed_leftovers = {value: _to_naive_datetime64(try_parse_date(value)) for value in unique_leftovers}
+        converted[positions] = leftovers.map(parsed_leftovers).to_numpy(dtype='datetime64[ns]')
+
+    return pd.Series(converted, index=values.index, name=values.name), matched_formats
+
+
+def infer_datetime_formats(valid_values, threshold=0.5) -> Optional[List[str]]:
+    """
+    Detect whether a column holds datetime values and which formats they are written in.
+
+    Args:
+    - valid_values: The pandas Series to check.
     - threshold: The minimum proportion of valid datetime values required to consider
                  the column as datetime type.
 
     Returns:
-    - The string 'datetime64[ns]' if the column passes the datetime check based on the threshold,
-      None otherwise.
+    - The list of formats that matched the column (empty if only the per-value fallback did) if the column
+      passes the datetime check based on the threshold, None otherwise.
     """
-    converted = valid_values.apply(lambda x: try_parse_date(x) if pd.notnull(x) else pd.NaT)
+    converted, matched_formats = parse_datetimes(valid_values, guess_datetime_formats(valid_values),
+                                                 threshold=threshold)
 
     # Calculate the proportion of valid datetime values
     proportion_valid = converted.notna().mean()
 
     if proportion_valid > threshold:
+        return matched_formats
+    return None
+
+
+def check_datetime(valid_values, threshold=0.5):
+    """
+    Check if a column can be converted to datetime after removing NaN or empty values.
+
+    Args:
+    - column: The pandas Series to check.
+    - threshold: The minimum proportion of valid datetime values required to consider
+                 the column as datetime type.
+
+    Returns:
+    - The string 'datetime64[ns]' if the column passes the datetime check based on the threshold,
+      None otherwise.
+    """
+    if infer_datetime_formats(valid_values, threshold=threshold) is not None:
         return 'datetime64[ns]'
     else:
         return None
@@ -62,10 +234,63 @@ def try_parse_timedelta(x):
         return pd.NaT
 
 
+def parse_timedeltas(values, threshold=None) -> pd.Series:
+    """
+    Convert a column to timedelta64[ns] by matching the common duration shapes (HH:MM:SS, 1h 30m, 2 days,
+    ISO-8601 PT..) with vectorized regular expressions, and only handing the values left over to pytimeparse.
+
+    Args:
+    - values: The pandas Series to convert.
+    - threshold: If given, the pytimeparse fallback is skipped as soon as a probe of the leftover values
+                 shows the proportion of valid timedelta values cannot exceed it.
+
+    Returns:
+    - The converted Series, NaT where a value could not be parsed.
+    """
+    strings = pd.Series(values.astype(str).str.strip().to_numpy(), copy=False)
+    seconds = np.full(len(strings), np.nan)
+    pending = values.notna().to_numpy() & (strings != '').to_numpy()
+    total = int(pending.sum())
+
+    for pattern in DURATION_PATTERNS:
+        positions = np.flatnonzero(pending)
+        if len(positions) == 0:
+            break
+        extracted = strings.iloc[positions].str.extract(pattern)
+        amounts = extracted.drop(columns='sign').astype(float)
+        matched = amounts.notna().any(axis=1).to_numpy()
+        if not matched.any():
+            continue
+
+        amounts = amounts[matched]
+        total_seconds = sum(amounts[unit].fillna(0) * factor for unit, factor in DURATION_UNIT_SECONDS.items()
+                            if unit in amounts)
+        sign = np.where(extracted['sign'][matched] == '-', -1, 1)
+        seconds[positions[matched]] = total_seconds.to_numpy() * sign
+        pending[positions[matched]] = False
+
+    positions = np.flatnonzero(pending)
+    if len(positions) > 0:
+        leftovers = strings.iloc[positions]
+        unique_leftovers = leftovers.unique()
+
+        if threshold is None or total == 0 or \
+                _fallback_can_pass(try_parse_timedelta, unique_leftovers, len(positions), total, threshold):
+            parsed_leftovers = {value: try_parse_timedelta(value) / pd.Timedelta(seconds=1) for value in unique_leftovers}
+            seconds[positions] = leftovers.map(parsed_leftovers).to_numpy(dtype=float)
+
+    # Only the parsed seconds within the timedelta64[ns] range are cast, casting NaN to an integer overflows
+    # inside to_timedelta and durations out of range raise, they become NaT
+    converted = np.full(len(seconds), np.timedelta64('NaT'), dtype='timedelta64[ns]')
+    parsed = np.abs(seconds) < MAX_TIMEDELTA_SECONDS
+    converted[parsed] = pd.to_timedelta(seconds[parsed], unit='s').to_numpy()
+    return pd.Series(converted, index=values.index, name=values.name)
+
+
 def check_timedelta(valid_values, threshold=0.5):
     """
     Check if a pandas Series can be converted to timedelta after removing NaN or empty values,
-    using custom parsing logic for a variety of string formats, with robust error handling.
+    using vectorized parsing for the common duration formats and pytimeparse for the rest.
 
     Args:
     - valid_values: The pandas Series to check.
@@ -74,20 +299,50 @@ def check_timedelta(valid_values, threshold=0.5):
     Returns:
     - 'timedelta64[ns]' if the series passes the timedelta check based on the threshold, None otherwise.
     """
-    converted = valid_values.apply(lambda x: try_parse_timedelta(x) if pd.notnull(x) else pd.NaT)
-    converted_timedeltas = pd.Series(converted).apply(lambda x: pd.to_timedelta(x, errors='coerce'))
+    converted_timedeltas = parse_timedeltas(valid_values, threshold=threshold)
 
     if converted_timedeltas.notna().mean() > threshold:
         return 'timedelta64[ns]'
     return None
 
 
+def _proportion_upper_bound(successes, trials, z=CONFIDENCE_Z):
+    # Wilson score upper bound of a proportion observed on a random sample
+    p = successes / trials
+    centre = p + z * z / (2 * trials)
+    margin = z * np.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials))
+    return (centre + margin) / (1 + z * z / trials)
+
+
+def _spread_probe(values, size=PROBE_SIZE):
+    # Values at evenly spaced positions, the head of a column is often sorted or grouped
+    positions = np.unique(np.linspace(0, len(values) - 1, num=min(size, len(values))).astype(int))
+    return values.iloc[positions]
+
+
+def _lower_strings(values):
+    # Lowercase the string values, anything else such as 1 or True is kept as is
+    try:
+        lowered = values.str.lower()
+    except AttributeError:
+        # No string values at all
+        return values
+    is_string = lowered.notna().to_numpy()
+    if is_string.sum() == values.notna().sum():
+        return lowered
+    combined = values.to_numpy(dtype=object, copy=True)
+    combined[is_string] = lowered.to_numpy(dtype=object)[is_string]
+    return pd.Series(combined, index=values.index, name=values.name)
+
+
 def check_boolean(column, threshold=0.5):
     """
     Check if a column can be converted to boolean after removing NaN or empty values.
-    First, filter for valid boolean strings or boolean types. If the ratio of valid
-    boolean values exceeds the threshold, then check if these values form one of the
-    valid two unique value pairs representing boolean logic.
+    Values are lowercased and matched block by block against the true and false vocabularies with vectorized
+    lookups, finishing early once enough values have matched for the column to reach the threshold
+    or too many have failed to match for it ever to. Columns whose spread probe falls clearly short
+    of the threshold are given up on before any block. Columns that pass must contain both true and
+    false values.
 
     Args:
     - column: The pandas Series to check.
@@ -97,37 +352,98 @@ def check_boolean(column, threshold=0.5):
     - 'bool' if the valid boolean values exceed the threshold and form two unique pairs,
       None otherwise.
     """
-    # Update valid boolean representations to include additional True values
-    valid_true_strs = {'1', 't', 'true', 'yes'}
-    valid_false_strs = {'0', 'f', 'false', 'no'}
-    valid_boolean_types = {True, False, 1, 0}
-
-    # Normalize string values and filter out valid boolean representations
-    valid_values = column.map(lambda x: str(x).lower() if isinstance(x, str) else x)
-    valid_values = valid_values[valid_values.apply(lambda x: x in valid_true_strs or x in valid_false_strs or x in valid_boolean_types)]
-
-    if len(valid_values) == 0:
+    # Callers pass valid values, NaN found in a block are skipped but still counted in the total
+    total = len(column)
+    if total == 0:
         return None
 
-    # Check if the ratio of valid boolean values is above the threshold
-    if len(valid_values) / len(column.dropna()) < threshold:
-        return None
+    if is_numeric_dtype(column) or is_bool_dtype(column):
+        # Numeric 0/1 (and True/False, which compare equal to them)
+        true_values, false_values, normalize = [1], [0], lambda values: values
+    else:
+        true_values, false_values, normalize = BOOLEAN_TRUE_VALUES, BOOLEAN_FALSE_VALUES, _lower_strings
+    valid_values = true_values + false_values
+
+    # Give up on a probe spread over the column first, so a column that clearly does not qualify is not matched whole
+    if total > PROBE_SIZE:
+        probe = normalize(_spread_probe(column).dropna())
+        if len(probe) > 0 and _proportion_upper_bound(int(probe.isin(valid_values).sum()), len(probe)) < threshold:
+            return None
 
-    # Convert all valid representations to True or False for uniform comparison
-    uniform_boolean_values = set(valid_values.map(lambda x: True if x in valid_true_strs else False if x in valid_false_strs or x == 0 else x))
+    position, seen, valid, has_true, has_false = 0, 0, 0, False, False
+    block_size = PROBE_SIZE
+
+    while position < len(column):
+        block = normalize(column.iloc[position:position + block_size].dropna())
+        position += block_size
+        is_valid = block.isin(valid_values).to_numpy()
+        seen += len(block)
+        valid += int(np.count_nonzero(is_valid))
+
+        if not (has_true and has_false) and is_valid.any():
+            matched = block[is_valid]
+            has_true = has_true or bool(matched.isin(true_values).any())
+            has_false = has_false or bool(matched.isin(false_values).any())
+
+        if valid >= threshold * total and has_true and has_false:
+            # Enough values matched already, whatever the rest of the column holds
+            break
+        if total - seen + valid < threshold * total:
+            # Too many values failed to match for the column to reach the threshold
+            return None
+        block_size = min(block_size * 2, BOOLEAN_BLOCK_SIZE)
 
     # Check if unique values form a valid boolean set
-    if len(uniform_boolean_values) == 2:
+    if has_true and has_false:
         return 'bool'
     else:
         return None
 
 
+def _try_complex(x):
+    # noinspection PyBroadException
+    try:
+        return complex(x)
+    except:
+        return np.nan
+
+
+def parse_complex(values) -> pd.Series:
+    """
+    Convert a column to complex128 in a single array conversion. When some values are not complex
+    literals, a vectorized regular expression picks out the ones that are before converting them.
+
+    Args:
+    - values: The pandas Series to convert.
+
+    Returns:
+    - The converted Series, NaN where a value is not a complex literal.
+    """
+    present = values.notna().to_numpy()
+    strings = values[present].astype(str).to_numpy()
+    converted = np.full(len(values), np.nan, dtype='complex128')
+
+    try:
+        # Fast path, every value is a complex literal
+        converted[present] = strings.astype('complex128')
+    except (TypeError, ValueError):
+        matches = pd.Series(strings, copy=False).str.fullmatch(COMPLEX_PATTERN).to_numpy(dtype=bool)
+        positions = np.flatnonzero(present)[matches]
+        try:
+            converted[positions] = strings[matches].astype('complex128')
+        except (TypeError, ValueError):
+            # A literal the pattern lets through but complex() rejects, convert one by one
+            converted[positions] = [_try_complex(literal) for literal in strings[matches]]
+
+    return pd.Series(converted, index=values.index, name=values.name)
+
+
 def check_complex(valid_values, threshold=0.5):
     """
     Check if a column can be converted to complex numbers after removing NaN or empty values.
-    If more than a specified threshold of the column can be converted without error,
-    it is classified as 'complex128'.
+    A probe spread over the column is matched against a regular expression for complex literals first, so columns
+    without any give up before the whole column is converted. If more than a specified
+    threshold of the column can be converted without error, it is classified as 'complex128'.
 
     Args:
     - column: The pandas Series to check.
@@ -137,17 +453,21 @@ def check_complex(valid_values, threshold=0.5):
     Returns:
     - 'complex128' if the column predominantly contains complex numbers, None otherwise.
     """
-    # Attempt to convert valid values to complex numbers, coercing errors to NaN
-    try:
-        complex_series = valid_values.apply(lambda x: complex(x))
-        # Check if the conversion succeeded without producing NaNs
-        proportion_valid = complex_series.apply(lambda x: not pd.isna(x)).mean()
+    if len(valid_values) == 0:
+        return None
 
-        if proportion_valid > threshold:
-            return 'complex128'
-    except ValueError:
+    strings = valid_values.astype(str)
+
+    # Give up on a probe spread over the column first, most text columns have no complex literal at all
+    probe = _spread_probe(strings)
+    if len(probe) < len(strings) and \
+            _proportion_upper_bound(probe.str.fullmatch(COMPLEX_PATTERN).sum(), len(probe)) <= threshold:
         return None
 
+    proportion_valid = parse_complex(valid_values).notna().mean()
+
+    if proportion_valid > threshold:
+        return 'complex128'
     return None
 
 
@@ -174,7 +494,8 @@ def check_numeric(valid_values, threshold=0.5):
     # Now considering only valid numeric values for type determination
     numeric_series = numeric_series.dropna()
 
-    if numeric_series.apply(float.is_integer).all():
+    # Arrow-backed strings convert to nullable integer or float dtypes, so no float-only method is used here
+    if (numeric_series % 1 == 0).all():
         # Determine the smallest suitable integer type
         if numeric_series.between(np.iinfo(np.int8).min, np.iinfo(np.int8).max).all():
             return 'Int8'
@@ -184,48 +505,31 @@ def check_numeric(valid_values, threshold=0.5):
             return 'Int32'
         return 'Int64'
     else:
-        return zip_float_dtype(numeric_series)
+        return zip_float_dtype(numeric_series.astype('float64'))
 
 
-def check_category(valid_values):
+def check_category(valid_values, threshold=0.5, sketch=None):
     """
-    Determine if a pandas Series is more efficiently stored as 'category' or 'text',
-    using memory efficiency and a basic feature-based clustering analysis.
+    Determine if a pandas Series is more efficiently stored as 'category' or 'text', using a
+    distinct-count sketch to predict the memory usage of both without building the categorical.
 
     Args:
     - valid_values: The pandas Series to check.
+    - threshold: The maximum proportion of distinct values for the column to be a category.
+    - sketch: A CategorySketch already fed with the column chunk by chunk, built from valid_values if None.
 
     Returns:
-    - 'category' if the data is both memory efficient as category and shows tight clustering based on basic features,
-      'text' if it is more memory efficient but does not show tight clustering,
-      or 'ineligible' if not more memory efficient as category.
+    - 'category' if the data has few enough distinct values and is more memory efficient as category,
+      None otherwise.
     """
-    # Initial memory usage comparison
-    memory_usage_text = valid_values.memory_usage(deep=True)
-    memory_usage_category = valid_values.astype('category').memory_usage(deep=True)
-
-    if memory_usage_category < memory_usage_text:
-        valid_texts = valid_values.dropna().astype(str)
-
-        if len(set(valid_texts)) <= 1:  # All values are identical or only one value exists
-            return 'category'
-
-        # Feature extraction: Use string length
-        features = np.array(valid_texts.str.len()).reshape(-1, 1)
-        features = StandardScaler().fit_transform(features)  # Standardize features
-
-        # Apply DBSCAN
-        dbscan = DBSCAN(eps=0.5, min_samples=5).fit(features)
-        labels = dbscan.labels_
-
-        # Number of clusters in labels, ignoring noise if present
-        n_clusters_ = len(set(labels)) - (1 if -1 in labels else 0)
+    if sketch is None:
+        sketch = CategorySketch().update(valid_values)
+    if sketch.count == 0:
+        return None
 
-        print('Number of clusters:', n_clusters_)
+    memory_usage_text, memory_usage_category = sketch.predicted_memory()
 
-        if n_clusters_ > 1:
-            return None
-        else:
-            return 'category'
+    if memory_usage_category < memory_usage_text and sketch.distinct_ratio() <= threshold:
+        return 'category'
     else:
         return None
@@ -0,0 +1,130 @@
+import hashlib
+import os
+import random
+import uuid
+from typing import List
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+
+from .sniffer import CsvDialect, PREFIX_BYTES, SAMPLE_BLOCKS, SAMPLE_BLOCK_BYTES, sniff_samples
+
+
+class StoredUploadedFile(UploadedFile):
+    """
+    An upload streamed straight into CSV_FILES_DIR under a partial name, with the digest and byte samples
+    collected while it arrived. It replaces the file of its final name only once committed.
+
+    Attributes:
+        sha256 (str): The hex SHA-256 digest of the content.
+        samples (List[bytes]): The first bytes of the content followed by blocks sampled over the rest of it,
+                               the last one ending the content.
+    """
+
+    def __init__(self, path: str, name: str, content_type: str, size: int, charset: str, sha256: str,
+                 samples: List[bytes], content_type_extra=None):
+        super().__init__(open(path, 'rb'), name, content_type, size, charset, content_type_extra)
+        self.path = path
+        self.sha256 = sha256
+        self.samples = samples
+
+    def temporary_file_path(self):
+        return self.path
+
+    def sniff(self) -> CsvDialect:
+        """
+        Sniffs the encoding and dialect from the samples, without reading the file again.
+        """
+        return sniff_samples(self.samples)
+
+    def commit(self, file_path: str):
+        """
+        Moves the upload to its final path, atomically replacing any file already there.
+        """
+        self.close()
+        os.replace(self.path, file_path)
+        self.path = file_path
+
+    def discard(self):
+        """
+        Removes the partial file of an upload that is not committed.
+        """
+        self.close()
+        if os.path.exists(self.path) and self.path.endswith('.part'):
+            os.remove(self.path)
+
+
+class CsvStorageUploadHandler(FileUploadHandler):
+    """
+    Streams the uploaded document to a partial file in CSV_FILES_DIR as the bytes arrive, hashing them and
+    keeping the prefix, a reservoir of sampled blocks and the tail for sniffing. The upload is written once
+    and memory per request stays constant whatever its size.
+
+    The rows the types are inferred from are not sampled here: the sample size, chunk size and memory budget are
+    form fields that may arrive after the document, and the rows can only be parsed once the dialect is sniffed.
+    The inference job samples them in a pass over the stored file instead.
+
+    Attributes:
+        field_name (str): The form field of the file handled, other fields go to the next handlers.
+    """
+
+    def __init__(self, request=None, field_name: str = 'document'):
+        super().__init__(request)
+        self.field_name = field_name
+        self.handled = False
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.handled = field_name == self.field_name
+        if not self.handled:
+            return
+
+        os.makedirs(settings.CSV_FILES_DIR, exist_ok=True)
+        self.path = os.path.join(settings.CSV_FILES_DIR, f'.{os.path.basename(self.file_name)}.{uuid.uuid4().hex}.part')
+        self.destination = open(self.path, 'wb')
+        self.digest = hashlib.sha256()
+        self.prefix = b''
+        self.blocks = []
+        self.blocks_seen = 0
+        self.tail = b''
+        self.rng = random.Random(0)
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.handled:
+            return raw_data
+
+        self.destination.write(raw_data)
+        self.digest.update(raw_data)
+        if len(self.prefix) < PREFIX_BYTES:
+            self.prefix += raw_data[:PREFIX_BYTES - len(self.prefix)]
+        elif raw_data:
+            # Reservoir of blocks taken after the prefix, kept in the order they arrived
+            block = (start, raw_data[:SAMPLE_BLOCK_BYTES])
+            if len(self.blocks) < SAMPLE_BLOCKS:
+                self.blocks.append(block)
+            else:
+                slot = self.rng.randrange(self.blocks_seen + 1)
+                if slot < SAMPLE_BLOCKS:
+                    self.blocks[slot] = block
+            self.blocks_seen += 1
+        self.tail = (self.tail + raw_data)[-SAMPLE_BLOCK_BYTES:]
+        return None
+
+    def file_complete(self, file_size):
+        if not self.handled:
+            return None
+
+        self.destination.close()
+        samples = [self.prefix]
+        if file_size > PREFIX_BYTES:
+            samples += [block for _, block in sorted(self.blocks)] + [self.tail]
+        return StoredUploadedFile(self.path, self.file_name, self.content_type, file_size, self.charset,
+                                  self.digest.hexdigest(), samples, self.content_type_extra)
+
+    def upload_interrupted(self):
+        if self.handled:
+            self.destination.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
@@ -6,9 +6,14 @@ from .views import api_documentation
 
 urlpatterns = [
     path(r"type-infer/", views.CsvTypeInferView.as_view(), name="cleaner-type-infer"),
+    path(r"inference-jobs/<uuid:job_id>/", views.InferenceJobView.as_view(), name="inference-job"),
     path(r"update-dtype/", views.UpdateColumnDtypeView.as_view(), name="update-column-dtype"),
+    path(r"bulk-update-dtype/", views.BulkUpdateColumnDtypeView.as_view(), name="bulk-update-column-dtype"),
     path(r"documentation/", api_documentation, name='api_documentation'),
     path(r"list-csv-files/", views.ListCsvFilesView.as_view(), name='list-csv-files'),
     path(r"fetch-file-content/<str:file_name>/", views.FetchFileContentView.as_view(), name='fetch-file-content'),
+    path(r"fetch-typed-file/<str:file_name>/", views.FetchTypedFileView.as_view(), name='fetch-typed-file'),
+    path(r"fetch-rows/<str:file_name>/", views.FetchRowWindowView.as_view(), name='fetch-rows'),
     path(r"fetch-file-metadata/<str:file_name>/", views.FetchFileMetadataView.as_view(), name='fetch-file-metadata'),
+    path(r"metrics/", views.metrics, name='metrics'),
 ]
@@ -5,15 +5,11 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, JSONParser
 
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
 from django.shortcuts import render
 from django.conf import settings
 from django.http import HttpResponse
 
 from .serializers import CleanerSerializer, CsvFileInferenceUpdateSerializer, CsvFileInferenceSerializer
-from .inferencer import DataFrameTypeInferencer
-from .entities import ColumnInference, InferenceResult
 from .models import CsvFileInference
 
 
@@ -25,6 +21,8 @@ def api_documentation(request):
     return render(request, 'csv_cleaner/api_documentation.html')
 
 
+import hashlib
+import logging
 import os
 
 from rest_framework import views, status
@@ -32,19 +30,30 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, JSONParser
 
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
 from django.shortcuts import render
 from django.conf import settings
 from django.http import HttpResponse
-from django.http import FileResponse
 from django.urls import reverse
 from django.http import JsonResponse
-
-from .serializers import CleanerSerializer, CsvFileInferenceUpdateSerializer, CsvFileInferenceSerializer
-from .inferencer import DataFrameTypeInferencer
-from .entities import ColumnInference, InferenceResult
-from .models import CsvFileInference
+from django.http import HttpResponseForbidden
+from django.db.models import Count, Max
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from .serializers import CleanerSerializer, CsvFileInferenceUpdateSerializer, CsvFileInferenceSerializer, \
+    InferenceJobSerializer, RowWindowSerializer, CsvFileNameSerializer, CsvFileListSerializer, \
+    BulkColumnUpdateSerializer, InferenceJobOptionsSerializer
+from .models import CsvFileInference, InferenceJob
+from .sniffer import sniff_csv
+from .jobs import submit_job, submit_retype_job, check_queue, QueueFullError
+from . import cache
+from .uploads import CsvStorageUploadHandler, StoredUploadedFile
+from .downloads import file_download_response
+from .row_index import read_row_window
+from .pagination import CsvFileCursorPagination
+from .metrics import METRICS
+
+logger = logging.getLogger(__name__)
 
 
 def get_file_path(file_name):
@@ -55,7 +64,25 @@ def api_documentation(request):
     return render(request, 'csv_cleaner/api_documentation.html')
 
 
+def file_list_etag(request):
+    # Any file added, updated or removed changes the count or the latest update, one aggregate query answers
+    # polling clients before a page is read
+    stats = CsvFileInference.objects.aggregate(count=Count('pk'), updated_at=Max('updated_at'))
+    key = f"{stats['count']}:{stats['updated_at']}:{request.get_full_path()}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def file_metadata_etag(request, file_name):
+    updates = CsvFileInference.objects.filter(file_name=file_name).values_list('updated_at', 'typed_file_name')
+    update = updates.first()
+    if update is None:
+        return None
+    key = f"{file_name}:{update[0]}:{update[1]}:{request.get_host()}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
 class FetchFileMetadataView(views.APIView):
+    @method_decorator(condition(etag_func=file_metadata_etag))
     def get(self, request, file_name):
         # Check if the file metadata exists in the database
         try:
@@ -79,6 +106,9 @@ class FetchFileMetadataView(views.APIView):
             "download_url": download_url,
             "metadata": metadata
         }
+        if file_metadata.typed_file_name:
+            response_data["typed_download_url"] = request.build_absolute_uri(
+                reverse('fetch-typed-file', args=[file_name]))
 
         return JsonResponse(response_data)
 
@@ -90,31 +120,101 @@ class FetchFileContentView(views.APIView):
         if not os.path.exists(file_path):
             return Response({"error": "File not found."}, status=404)
 
-        try:
-            with open(file_path, 'r') as file:
-                content = file.read()
-        except UnicodeDecodeError:
-            with open(file_path, 'r', encoding='latin-1') as file:
-                content = file.read()
+        # The encoding sniffed on upload, sniffed now for files uploaded before it was stored
+        file_metadata = CsvFileInference.objects.filter(file_name=file_name).first()
+        dialect = file_metadata.get_dialect() if file_metadata else None
+        encoding = dialect.encoding if dialect else sniff_csv(file_path).encoding
+
+        # Streamed as stored with its charset, so downloads can be resumed and sliced with Range requests
+        return file_download_response(request, file_path, file_name, encoding=encoding)
+
+
+class FetchTypedFileView(views.APIView):
+    def get(self, request, file_name):
+        file_metadata = CsvFileInference.objects.filter(file_name=file_name).first()
+        if file_metadata is None or not file_metadata.typed_file_name:
+            return Response({"error": "Typed file not found."}, status=404)
+
+        typed_path = os.path.join(settings.CSV_FILES_DIR, file_metadata.typed_file_name)
+        if not os.path.exists(typed_path):
+            return Response({"error": "Typed file not found."}, status=404)
 
-        response = HttpResponse(content, content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="{file_name}"'
-        return response
+        # The converted columns as Parquet, with range support for readers fetching row groups on their own
+        return file_download_response(request, typed_path, f'{os.path.splitext(file_name)[0]}.parquet',
+                                      content_type='application/vnd.apache.parquet')
+
+
+class FetchRowWindowView(views.APIView):
+    def get(self, request, file_name):
+        serializer = RowWindowSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        start = serializer.validated_data['start']
+        count = serializer.validated_data['count']
+
+        file_path = os.path.join(settings.CSV_FILES_DIR, file_name)
+        if not file_name.endswith('.csv') or not os.path.exists(file_path):
+            return Response({"error": "File not found."}, status=404)
+
+        file_metadata = CsvFileInference.objects.filter(file_name=file_name).first()
+        dialect = file_metadata.get_dialect() if file_metadata else None
+        dialect = dialect or sniff_csv(file_path)
+
+        # Seeks to the row offset indexed on upload, so any page costs the same
+        columns, rows, total_rows = read_row_window(file_path, dialect, start, count)
+        return Response({
+            "file_name": file_name,
+            "start": start,
+            "count": len(rows),
+            "total_rows": total_rows,
+            "columns": columns,
+            "rows": rows,
+        })
 
 
 class ListCsvFilesView(views.APIView):
+    @method_decorator(condition(etag_func=file_list_etag))
     def get(self, request):
-        print(request)
+        logger.debug("Listing files: %s", request.get_full_path())
+
+        options = CsvFileListSerializer(data=request.query_params)
+        options.is_valid(raise_exception=True)
+
+        # Files a page at a time, without their columns unless included
+        csv_files = CsvFileInference.objects.defer('dialect_data')
+        if options.validated_data['include_columns']:
+            # The columns of the whole page in one query
+            csv_files = csv_files.prefetch_related('columns')
+            serializer_class = CsvFileInferenceSerializer
+        else:
+            csv_files = csv_files.only('file_name')
+            serializer_class = CsvFileNameSerializer
+
+        paginator = CsvFileCursorPagination()
+        page = paginator.paginate_queryset(csv_files, request, view=self)
+        serializer = serializer_class(page, many=True)
+        # The next and previous pages are linked in the Link header
+        return paginator.get_paginated_response(serializer.data)
 
-        # Query all CsvFileInference instances
-        csv_files = CsvFileInference.objects.all()
 
-        print(csv_files)
+def _job_summary(request, job):
+    summary = {
+        "job_id": str(job.pk),
+        "status": job.status,
+        "status_url": request.build_absolute_uri(reverse('inference-job', args=[job.pk])),
+    }
+    if job.status == InferenceJob.SUCCEEDED:
+        # Jobs run inline or answered from the cache are already finished
+        summary["columns"] = job.get_columns_data()
+    return summary
 
-        # Serialize the query results
-        serializer = CsvFileInferenceSerializer(csv_files, many=True)
-        # Return the serialized data
-        return Response(serializer.data)
+
+def _submit_retype_job(file_name):
+    try:
+        return submit_retype_job(file_name)
+    except QueueFullError:
+        # The types are saved, the next retype of the file patches every column still written with another type
+        logger.warning("Retype of %s not queued, the job queue is full", file_name)
+        return None
 
 
 class UpdateColumnDtypeView(views.APIView):
@@ -124,79 +224,110 @@ class UpdateColumnDtypeView(views.APIView):
             try:
                 csv_file_inference = CsvFileInference.objects.get(file_name=serializer.validated_data['file_name'])
                 serializer.update_columns_data(csv_file_inference, serializer.validated_data)
-
-                return Response(status=status.HTTP_204_NO_CONTENT)
             except CsvFileInference.DoesNotExist:
                 return Response({"message": "File not found."}, status=status.HTTP_404_NOT_FOUND)
+
+            # Only the re-typed columns are converted again and patched into the typed file, when there is one
+            job = _submit_retype_job(csv_file_inference.file_name)
+            if job is None:
+                return Response(status=status.HTTP_204_NO_CONTENT)
+            return Response(data=_job_summary(request, job), status=status.HTTP_202_ACCEPTED)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CsvTypeInferView(views.APIView):
-    parser_classes = [MultiPartParser, JSONParser]
-
-    def post(self, request: Request) -> Response:
-        print("Request Content-Type:", request.content_type)
-
-        serializer = CleanerSerializer(data=request.data)
+class BulkUpdateColumnDtypeView(views.APIView):
+    def post(self, request):
+        serializer = BulkColumnUpdateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        # Extract file from request
-        file = request.FILES['document']
-        config = {
-            'chunk_size': serializer.validated_data['chunk_size'],
-            'sample_size_per_chunk': serializer.validated_data['sample_size_per_chunk'],
-            'random_state': serializer.validated_data['random_state'],
-            'valid_threshold': serializer.validated_data['valid_threshold'],
-            'category_threshold': serializer.validated_data['category_threshold'],
-        }
+        file_names = {file['file_name'] for file in serializer.validated_data['files']}
+        found = set(CsvFileInference.objects.filter(file_name__in=file_names).values_list('file_name', flat=True))
+        if found != file_names:
+            # Nothing is updated unless every file exists
+            return Response({"message": "File not found.", "missing_files": sorted(file_names - found)},
+                            status=status.HTTP_404_NOT_FOUND)
 
-        # Save the uploaded file temporarily
-        temp_file_path = default_storage.save("temp_files/" + file.name, ContentFile(file.read()))
+        updated_columns = serializer.update_columns_data(serializer.validated_data)
+        jobs = [job for job in (_submit_retype_job(file_name) for file_name in sorted(file_names)) if job is not None]
+        return Response({"updated_columns": updated_columns,
+                         "jobs": [dict(_job_summary(request, job), file_name=job.file_name) for job in jobs]})
 
-        # Ensure CSV_FILES_DIR exists
-        os.makedirs(settings.CSV_FILES_DIR, exist_ok=True)
 
-        # Define file path
-        file_path = os.path.join(settings.CSV_FILES_DIR, file.name)
+class CsvTypeInferView(views.APIView):
+    parser_classes = [MultiPartParser, JSONParser]
 
-        # Save the uploaded file, overriding if it exists
-        with open(file_path, 'wb+') as destination:
-            for chunk in file.chunks():
-                destination.write(chunk)
+    def post(self, request: Request) -> Response:
+        logger.debug("Type inference upload, Content-Type %s", request.content_type)
 
-        try:
-            # Initialize DataFrameTypeInferencer with the file path
-            inference = DataFrameTypeInferencer(file_path=default_storage.path(temp_file_path), **config)
-            inference_result = inference.infer_and_convert()
-
-            # Mapping of pandas data types to friendly names
-            dtype_to_friendly_name = {
-                'int8': 'integer', 'int16': 'integer', 'int32': 'integer', 'int64': 'integer',
-                'float16': 'float', 'float32': 'float', 'float64': 'float',
-                'complex64': 'complex', 'complex128': 'complex',
-                'object': 'text', 'bool': 'boolean',
-                'category': 'category', 'datetime64[ns]': 'datetime', 'timedelta64[ns]': 'timedelta'
-            }
+        # Stream the upload straight into CSV_FILES_DIR, hashing it and sampling blocks for the sniffer as the bytes
+        # arrive
+        request.upload_handlers.insert(0, CsvStorageUploadHandler(request))
 
-            # Prepare response data by iterating over DataFrame columns and their data types
-            response_data = {
-                "columns": [
-                    {
-                        "name": col,
-                        "pandas_type": str(inference_result[col].dtype),
-                        "friendly_name": dtype_to_friendly_name.get(str(inference_result[col].dtype).lower(), 'unknown')
-                    }
-                    for col in inference_result.columns
-                ]
+        serializer = CleanerSerializer(data=request.data)
+        file = request.FILES.get('document')
+        try:
+            serializer.is_valid(raise_exception=True)
+
+            config = {
+                'chunk_size': serializer.validated_data['chunk_size'],
+                'sample_size': serializer.validated_data.get('sample_size'),
+                'sample_size_per_chunk': serializer.validated_data.get('sample_size_per_chunk'),
+                'random_state': serializer.validated_data['random_state'],
+                'valid_threshold': serializer.validated_data['valid_threshold'],
+                'category_threshold': serializer.validated_data['category_threshold'],
+                'workers': serializer.validated_data['workers'],
+                'engine': serializer.validated_data['engine'],
+                'memory_budget': (serializer.validated_data.get('memory_budget') or settings.INFERENCE_MEMORY_BUDGET
+                                  or None),
             }
-
-            obj, created = CsvFileInference.objects.get_or_create(file_name=file.name)
-            obj.set_columns_data(response_data['columns'])
-            obj.save()
-
+            if file.name.endswith('.csv'):
+                # Sniffed from the samples taken during the upload, the job reuses it
+                config['dialect'] = file.sniff().to_dict()
+
+            # Identical content inferred with the same parameters is answered from the cache, otherwise the
+            # inference runs in the job worker pool and the client polls the job for its progress and columns
+            cached = cache.lookup(file.sha256, config)
+            if cached is None:
+                check_queue()
+            # Replace the file of the same name only once the upload is complete and accepted
+            file.commit(os.path.join(settings.CSV_FILES_DIR, file.name))
+            job = submit_job(file.name, config, sha256=file.sha256, cached=cached)
+        except QueueFullError as error:
+            return Response({"error": str(error)}, status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            headers={'Retry-After': '30'})
         finally:
-            # Clean up: delete the temporary file
-            default_storage.delete(temp_file_path)
-
+            # Removes the partial file unless it was committed
+            if isinstance(file, StoredUploadedFile):
+                file.discard()
+
+        response_data = dict(_job_summary(request, job), cache_hit=job.cache_hit)
+        if serializer.validated_data['profile']:
+            # Known once the job has run, so for jobs run inline only, queued ones have it on the job
+            response_data['profile'] = job.get_profile()
         return Response(data=response_data, status=status.HTTP_202_ACCEPTED)
+
+
+class InferenceJobView(views.APIView):
+    def get(self, request, job_id):
+        try:
+            job = InferenceJob.objects.get(pk=job_id)
+        except InferenceJob.DoesNotExist:
+            return Response({"error": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        options = InferenceJobOptionsSerializer(data=request.query_params)
+        options.is_valid(raise_exception=True)
+        data = InferenceJobSerializer(job).data
+        if options.validated_data['profile']:
+            data['profile'] = job.get_profile()
+        return Response(data)
+
+
+def metrics(request):
+    """
+    Serves the job and phase totals of this process in the Prometheus text format, to scrapers on the
+    addresses of METRICS_ALLOWED_IPS only.
+    """
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(METRICS.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -26,6 +26,19 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 CSV_FILES_DIR = os.path.join(BASE_DIR, 'csv')
 
+# Processes running inference jobs, 0 runs each job inline in the upload request
+INFERENCE_JOB_WORKERS = env.int("INFERENCE_JOB_WORKERS", 2)
+# Most processes a single job may parse and infer a file in, the workers an upload asks for are capped to it
+INFERENCE_MAX_WORKERS = env.int("INFERENCE_MAX_WORKERS", os.cpu_count() or 1)
+# Jobs queued or running at once in a server process, uploads beyond that are turned away
+INFERENCE_JOB_QUEUE_LIMIT = env.int("INFERENCE_JOB_QUEUE_LIMIT", 16)
+# Inference results kept for identical content and parameters, least recently used evicted first, 0 disables it
+INFERENCE_CACHE_MAX_ENTRIES = env.int("INFERENCE_CACHE_MAX_ENTRIES", 1000)
+# Bytes each inference job sizes its chunks and sample to when the upload gives no memory_budget, 0 for none
+INFERENCE_MEMORY_BUDGET = env.int("INFERENCE_MEMORY_BUDGET", 0)
+# Addresses allowed to scrape the metrics endpoint, local ones only by default
+METRICS_ALLOWED_IPS = env.list("METRICS_ALLOWED_IPS", ["127.0.0.1", "::1"])
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
@@ -73,6 +86,12 @@ CORS_ALLOW_HEADERS = list(default_headers) + [
     'X-API-KEY',
 ]
 
+# Read by the frontend to follow list pages and revalidate responses
+CORS_EXPOSE_HEADERS = [
+    'Link',
+    'ETag',
+]
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
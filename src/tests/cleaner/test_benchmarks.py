@@ -0,0 +1,27 @@
+from django.test import TestCase
+import pandas as pd
+from benchmarks.datasets import DATASETS, generate
+from benchmarks.suite import CHECKS, compare
+
+
+class BenchmarkSuiteTestCase(TestCase):
+    def test_datasets_are_deterministic(self):
+        """Test that the same seed always generates the same dataset, and another seed a different one."""
+        for kind in DATASETS:
+            pd.testing.assert_frame_equal(generate(kind, 50, seed=1), generate(kind, 50, seed=1))
+            self.assertEqual(len(generate(kind, 50)), 50)
+        self.assertFalse(generate('dirty', 50, seed=1).equals(generate('dirty', 50, seed=2)))
+
+    def test_every_check_is_timed(self):
+        """Test that the suite finds every check function of the type checker."""
+        self.assertEqual(set(CHECKS), {'check_boolean', 'check_category', 'check_complex', 'check_datetime',
+                                       'check_numeric', 'check_timedelta'})
+
+    def test_compare_to_baseline(self):
+        """Test that only timings slower than the threshold and the noise floor are regressions."""
+        baseline = {'tall.check_numeric': 1.0, 'tall.check_boolean': 0.01, 'wide.check_datetime': 2.0}
+        timings = {'tall.check_numeric': 1.6, 'tall.check_boolean': 0.05, 'wide.check_datetime': 2.5,
+                   'dates.check_datetime': 9.0}
+
+        self.assertEqual(compare(timings, baseline, threshold=1.5, min_seconds=0.1),
+                         [('tall.check_numeric', 1.0, 1.6)])
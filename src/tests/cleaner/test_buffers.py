@@ -0,0 +1,24 @@
+from django.test import TestCase
+import numpy as np
+import pandas as pd
+from cleaner.buffers import pack_column, unpack_column
+
+
+class ColumnBufferTestCase(TestCase):
+    def test_text_round_trip(self):
+        """Test that text columns are packed into one buffer and rebuilt with their missing values."""
+        column = pd.Series(['a', None, 'ünïcode', '', np.nan, 'b'], name='text')
+        packed = pack_column(column)
+
+        self.assertIsInstance(packed['text'], bytes)
+        pd.testing.assert_series_equal(unpack_column(packed), column.where(column.notna(), np.nan))
+
+    def test_numeric_and_mixed_columns(self):
+        """Test that NumPy columns ship as arrays and mixed object columns as they are."""
+        numbers = pd.Series([1, 2, 3], dtype='int16', name='numbers')
+        self.assertIsInstance(pack_column(numbers)['values'], np.ndarray)
+        pd.testing.assert_series_equal(unpack_column(pack_column(numbers)), numbers)
+
+        mixed = pd.Series(['a', 1, 'b\x00c'], name='mixed')
+        self.assertNotIn('text', pack_column(mixed))
+        pd.testing.assert_series_equal(unpack_column(pack_column(mixed)), mixed)
@@ -0,0 +1,76 @@
+from django.test import TestCase, override_settings
+from pathlib import Path
+import tempfile
+from unittest import mock
+from cleaner import cache
+from cleaner.jobs import submit_job
+from cleaner.models import CsvFileInference, InferenceCacheEntry, InferenceJob
+from cleaner.sinks import pa
+
+
+@override_settings(INFERENCE_JOB_WORKERS=0, INFERENCE_CACHE_MAX_ENTRIES=2)
+class InferenceCacheTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        rows = ''.join(f'{i},{i % 3}\n' for i in range(100))
+        (Path(self.temp_dir.name) / 'numbers.csv').write_text('id,group\n' + rows)
+        (Path(self.temp_dir.name) / 'copy.csv').write_text('id,group\n' + rows)
+        self.settings_override = self.settings(CSV_FILES_DIR=self.temp_dir.name)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.temp_dir.cleanup()
+
+    def test_config_fingerprint(self):
+        """Test that only the parameters changing the inferred types change the fingerprint."""
+        config = {'chunk_size': 100, 'random_state': 0, 'valid_threshold': 0.5}
+
+        self.assertEqual(cache.config_fingerprint(config),
+                         cache.config_fingerprint({**config, 'workers': 4, 'dialect': {'delimiter': ';'}}))
+        self.assertEqual(cache.config_fingerprint(config), cache.config_fingerprint({**config, 'engine': 'c'}))
+        self.assertNotEqual(cache.config_fingerprint(config),
+                            cache.config_fingerprint({**config, 'valid_threshold': 0.6}))
+
+    def test_repeat_job_hits_cache(self):
+        """Test that the same content and parameters are answered from the cache without inferring again."""
+        first = submit_job('numbers.csv', {'chunk_size': 30}, sha256='a' * 64)
+        entry = InferenceCacheEntry.objects.get()
+        self.assertFalse(first.cache_hit)
+        self.assertEqual(entry.get_type_map(), {'id': 'Int8', 'group': 'Int8'})
+
+        with mock.patch('cleaner.jobs.DataFrameTypeInferencer') as inferencer:
+            second = submit_job('copy.csv', {'chunk_size': 30, 'workers': 2}, sha256='a' * 64)
+        inferencer.assert_not_called()
+
+        self.assertTrue(second.cache_hit)
+        self.assertEqual(second.status, InferenceJob.SUCCEEDED)
+        self.assertEqual(second.get_columns_data(), first.get_columns_data())
+        self.assertEqual(CsvFileInference.objects.get(file_name='copy.csv').get_columns_data(),
+                         first.get_columns_data())
+        self.assertEqual(InferenceCacheEntry.objects.get().hits, 1)
+        if pa is not None:
+            # Both files share the Parquet file converted for their content
+            self.assertEqual(CsvFileInference.objects.get(file_name='copy.csv').typed_file_name,
+                             CsvFileInference.objects.get(file_name='numbers.csv').typed_file_name)
+
+        # Other parameters, or a job without a digest, run the inference
+        self.assertFalse(submit_job('numbers.csv', {'chunk_size': 30, 'random_state': 1}, sha256='a' * 64).cache_hit)
+        self.assertFalse(submit_job('numbers.csv', {'chunk_size': 30}).cache_hit)
+
+    def test_least_recently_used_evicted(self):
+        """Test that the cache keeps INFERENCE_CACHE_MAX_ENTRIES entries, evicting the least recently used."""
+        for digest in ('a', 'b'):
+            cache.store(digest * 64, {}, {'id': 'Int8'}, [])
+        self.assertIsNotNone(cache.lookup('a' * 64, {}))
+        cache.store('c' * 64, {}, {'id': 'Int8'}, [])
+
+        self.assertEqual(set(InferenceCacheEntry.objects.values_list('digest', flat=True)), {'a' * 64, 'c' * 64})
+
+    @override_settings(INFERENCE_CACHE_MAX_ENTRIES=0)
+    def test_cache_disabled(self):
+        """Test that no result is cached when INFERENCE_CACHE_MAX_ENTRIES is 0."""
+        submit_job('numbers.csv', {}, sha256='a' * 64)
+
+        self.assertFalse(InferenceCacheEntry.objects.exists())
+        self.assertIsNone(cache.lookup('a' * 64, {}))
@@ -1,7 +1,11 @@
+import os
 from django.test import TestCase
 from pathlib import Path
+from unittest import mock, skipIf
+import tempfile
 import pandas as pd
 from cleaner.inferencer import DataFrameTypeInferencer
+from cleaner.sinks import pa
 
 
 class DataFrameTypeInferencerTestCase(TestCase):
@@ -27,3 +31,73 @@ class DataFrameTypeInferencerTestCase(TestCase):
 
         # Check if 'Grade' column is of type category
         self.assertTrue(isinstance(df['Grade'].dtype, pd.CategoricalDtype), "Grade column is not of type category")
+
+    def test_convert_in_chunks(self):
+        """Test that converting chunk by chunk keeps one dtype per column, categories included."""
+        inference = DataFrameTypeInferencer(str(self.file_path), chunk_size=2)
+        df = inference.convert_df_dtypes(inference.sample_and_infer_types())
+
+        self.assertEqual(len(df), 5)
+        self.assertEqual(df['Score'].dtype.name, "Int8")
+        self.assertEqual(list(df['Grade'].cat.categories), ['A', 'B'])
+
+    def test_convert_in_chunks_with_rolled_back_category(self):
+        """Test that categories are still merged when one chunk's conversion was rolled back."""
+        inference = DataFrameTypeInferencer(str(self.file_path), chunk_size=2)
+        type_map = inference.sample_and_infer_types()
+        convert_column = inference.convert_column
+        calls = []
+
+        def failing_convert_column(column, values, dtype):
+            if dtype == 'category':
+                calls.append(column)
+                if len(calls) == 2:
+                    raise ValueError("conversion failed")
+            return convert_column(column, values, dtype)
+
+        with mock.patch.object(inference, 'convert_column', side_effect=failing_convert_column):
+            df = inference.convert_df_dtypes(type_map)
+
+        self.assertEqual(len(df), 5)
+        self.assertTrue(isinstance(df['Grade'].dtype, pd.CategoricalDtype))
+        self.assertEqual(list(df['Grade'].cat.categories), ['A', 'B'])
+
+    @skipIf(pa is None, "pyarrow is not installed")
+    def test_convert_to_parquet(self):
+        """Test the streaming conversion to a Parquet file."""
+        inference = DataFrameTypeInferencer(str(self.file_path), chunk_size=2)
+        type_map = inference.sample_and_infer_types()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = str(Path(temp_dir) / 'sample_data.parquet')
+            dtypes = inference.convert_to_file(type_map, output_path)
+            df = pd.read_parquet(output_path)
+
+        self.assertEqual(dtypes['Score'], 'Int8')
+        self.assertEqual(len(df), 5)
+        self.assertTrue(pd.api.types.is_datetime64_ns_dtype(df['Birthdate']))
+        self.assertEqual(df['Score'].dtype.name, "Int8")
+        self.assertTrue(isinstance(df['Grade'].dtype, pd.CategoricalDtype))
+
+    def test_infer_in_parallel(self):
+        """Test that inferring in worker processes gives the same types and datetime formats, workers capped."""
+        sequential = DataFrameTypeInferencer(str(self.file_path))
+        with mock.patch('cleaner.inferencer.MAX_WORKERS', 2):
+            parallel = DataFrameTypeInferencer(str(self.file_path), workers=2)
+        self.assertEqual(parallel.workers, 2)
+        self.assertEqual(DataFrameTypeInferencer(str(self.file_path), workers=5000).workers, os.cpu_count() or 1)
+
+        self.assertEqual(parallel.sample_and_infer_types(), sequential.sample_and_infer_types())
+        self.assertEqual(parallel.datetime_formats, sequential.datetime_formats)
+
+    @skipIf(pa is None, "pyarrow is not installed")
+    def test_pyarrow_engine(self):
+        """Test that the pyarrow engine infers the same types and keeps text Arrow-backed."""
+        inference = DataFrameTypeInferencer(str(self.file_path), engine='pyarrow')
+        type_map = inference.sample_and_infer_types()
+        df = inference.convert_df_dtypes(type_map)
+
+        self.assertEqual(type_map, DataFrameTypeInferencer(str(self.file_path)).sample_and_infer_types())
+        self.assertEqual(str(df['Name'].dtype), 'string')
+        self.assertEqual(df['Score'].dtype.name, "Int8")
+        self.assertTrue(isinstance(df['Grade'].dtype, pd.CategoricalDtype))
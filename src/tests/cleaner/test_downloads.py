@@ -0,0 +1,73 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.conf import settings
+from pathlib import Path
+import tempfile
+from cleaner.downloads import parse_range
+
+
+class FetchFileContentViewTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.content = 'name,city\nAlice,Zürich\nBob,Köln\n'.encode('cp1252')
+        (Path(self.temp_dir.name) / 'cities.csv').write_bytes(self.content)
+        self.settings_override = self.settings(CSV_FILES_DIR=self.temp_dir.name)
+        self.settings_override.enable()
+        self.url = reverse('fetch-file-content', args=['cities.csv'])
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.temp_dir.cleanup()
+
+    def get(self, **headers):
+        return self.client.get(self.url, HTTP_X_API_KEY=settings.API_KEY, **headers)
+
+    def test_download_streams_file_as_stored(self):
+        """Test that the whole file is streamed as stored, with its charset and validators."""
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=windows-1252')
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertTrue(response['ETag'] and response['Last-Modified'])
+
+    def test_range_requests(self):
+        """Test that byte ranges are served as partial content, and ranges past the end are rejected."""
+        response = self.get(HTTP_RANGE='bytes=10-15')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.content[10:16])
+        self.assertEqual(response['Content-Range'], f'bytes 10-15/{len(self.content)}')
+        self.assertEqual(response['Content-Length'], '6')
+
+        response = self.get(HTTP_RANGE='bytes=-4')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-4:])
+
+        response = self.get(HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_conditional_requests(self):
+        """Test If-None-Match, and If-Range resuming only while the file is unchanged."""
+        response = self.get()
+        response.close()
+        etag = response['ETag']
+
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        for if_range, status_code in ((etag, 206), ('"stale"', 200)):
+            response = self.get(HTTP_RANGE='bytes=5-', HTTP_IF_RANGE=if_range)
+            # The content is not read, close the file it streams from
+            response.close()
+            self.assertEqual(response.status_code, status_code)
+
+    def test_parse_range(self):
+        """Test the parsing of Range headers against the file size."""
+        self.assertEqual(parse_range('bytes=0-99', 50), (0, 49))
+        self.assertEqual(parse_range('bytes=-100', 50), (0, 49))
+        self.assertIsNone(parse_range('bytes=0-1,5-6', 50))
+        self.assertIsNone(parse_range('items=0-1', 50))
+        with self.assertRaises(ValueError):
+            parse_range('bytes=50-', 50)
@@ -0,0 +1,150 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.conf import settings
+from pathlib import Path
+import tempfile
+import uuid
+from unittest import mock, skipIf
+import pandas as pd
+from cleaner.inferencer import DataFrameTypeInferencer
+from cleaner.jobs import JobProgress, submit_job, submit_retype_job
+from cleaner.models import CsvFileInference, InferenceJob
+from cleaner.sinks import pa
+
+
+@override_settings(INFERENCE_JOB_WORKERS=0)
+class InferenceJobTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        rows = ''.join(f'{i},{i % 3}\n' for i in range(100))
+        (Path(self.temp_dir.name) / 'numbers.csv').write_text('id,group\n' + rows)
+        self.settings_override = self.settings(CSV_FILES_DIR=self.temp_dir.name)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.temp_dir.cleanup()
+
+    def test_job_runs_and_reports_columns(self):
+        """Test that a job saves its progress, columns and the file inference."""
+        job = submit_job('numbers.csv', {'chunk_size': 30})
+
+        self.assertEqual(job.status, InferenceJob.SUCCEEDED)
+        self.assertEqual((job.stage, job.progress, job.rows_processed), ('converting', 1.0, 100))
+        self.assertEqual([column['pandas_type'] for column in job.get_columns_data()], ['Int8', 'Int8'])
+
+    def test_failed_job(self):
+        """Test that a job on a missing file fails with its error instead of raising."""
+        job = submit_job('missing.csv', {})
+
+        self.assertEqual(job.status, InferenceJob.FAILED)
+        self.assertTrue(job.error)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_job_progress(self):
+        """Test that progress is mapped onto the stages and small steps are not saved."""
+        job = InferenceJob.objects.create(file_name='numbers.csv')
+        progress = JobProgress(job)
+
+        progress('sampling', 100)
+        self.assertEqual((job.stage, job.progress), ('sampling', 0.0))
+        progress('converting', 50, 100)
+        self.assertAlmostEqual(InferenceJob.objects.get(pk=job.pk).progress, 0.75)
+        progress('converting', 50.5, 100)
+        self.assertEqual(InferenceJob.objects.get(pk=job.pk).rows_processed, 50)
+
+    def test_job_status_view(self):
+        """Test the job status endpoint, and a 404 for unknown jobs."""
+        job = submit_job('numbers.csv', {})
+        url = reverse('inference-job', args=[job.pk])
+        response = self.client.get(url, HTTP_X_API_KEY=settings.API_KEY, HTTP_ACCEPT='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['jobId'], str(job.pk))
+        self.assertEqual(response.json()['status'], 'succeeded')
+        self.assertEqual(len(response.json()['columns']), 2)
+
+        url = reverse('inference-job', args=[uuid.uuid4()])
+        response = self.client.get(url, HTTP_X_API_KEY=settings.API_KEY, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 404)
+
+    @skipIf(pa is None, "pyarrow is not installed")
+    def test_retype_job_patches_changed_columns(self):
+        """Test that a retype job re-reads only the re-typed columns and patches them into its own typed file."""
+        submit_job('numbers.csv', {'chunk_size': 30}, sha256='a' * 64)
+        obj = CsvFileInference.objects.get(file_name='numbers.csv')
+        shared_file = obj.typed_file_name
+        obj.update_column_types({'group': 'category'})
+
+        with mock.patch('cleaner.inferencer.pd.read_csv', wraps=pd.read_csv) as read_csv:
+            job = submit_retype_job('numbers.csv')
+        self.assertEqual(job.status, InferenceJob.SUCCEEDED)
+        self.assertEqual(read_csv.call_args.kwargs['usecols'], ['group'])
+
+        obj.refresh_from_db()
+        self.assertNotEqual(obj.typed_file_name, shared_file)
+        df = pd.read_parquet(Path(self.temp_dir.name) / obj.typed_file_name)
+        self.assertEqual([str(dtype) for dtype in df.dtypes], ['Int8', 'category'])
+        self.assertEqual(df['id'].tolist(), list(range(100)))
+        self.assertEqual(df['group'].astype(int).tolist(), [i % 3 for i in range(100)])
+        # The typed file shared with identical uploads keeps the inferred types
+        self.assertEqual(str(pd.read_parquet(Path(self.temp_dir.name) / shared_file)['group'].dtype), 'Int8')
+
+        # Nothing is converted again once the typed file matches the column types
+        with mock.patch('cleaner.inferencer.pd.read_csv') as read_csv:
+            submit_retype_job('numbers.csv')
+        read_csv.assert_not_called()
+
+    @skipIf(pa is None, "pyarrow is not installed")
+    def test_retype_job_not_queued_twice(self):
+        """Test that a retype is not queued while one for the same file is still queued."""
+        submit_job('numbers.csv', {})
+        queued = InferenceJob.objects.create(file_name='numbers.csv', kind=InferenceJob.RETYPE)
+
+        self.assertEqual(submit_retype_job('numbers.csv'), queued)
+        self.assertEqual(InferenceJob.objects.filter(kind=InferenceJob.RETYPE).count(), 1)
+
+    @skipIf(pa is None, "pyarrow is not installed")
+    def test_retype_job_patches_types_set_while_running(self):
+        """Test that a retype job patches again the types set while it was running."""
+        submit_job('numbers.csv', {'chunk_size': 30})
+        obj = CsvFileInference.objects.get(file_name='numbers.csv')
+        obj.update_column_types({'group': 'category'})
+        convert_columns_to_file = DataFrameTypeInferencer.convert_columns_to_file
+
+        def convert_and_retype(inference, type_map, *args):
+            if type_map['group'] == 'category':
+                # Set by another request, which a retype finishing first patched in before this one
+                obj.update_column_types({'group': 'float64'})
+            return convert_columns_to_file(inference, type_map, *args)
+
+        with mock.patch.object(DataFrameTypeInferencer, 'convert_columns_to_file', autospec=True,
+                               side_effect=convert_and_retype) as convert:
+            job = submit_retype_job('numbers.csv')
+
+        self.assertEqual(job.status, InferenceJob.SUCCEEDED)
+        self.assertEqual(convert.call_count, 2)
+        obj.refresh_from_db()
+        df = pd.read_parquet(Path(self.temp_dir.name) / obj.typed_file_name)
+        self.assertEqual(str(df['group'].dtype), 'float64')
+
+    @skipIf(pa is None, "pyarrow is not installed")
+    def test_headerless_file_is_typed_and_retyped(self):
+        """Test that the typed file of a file without a header names its columns by position, and retypes them."""
+        rows = ''.join(f'{i},{i % 3}\n' for i in range(1, 101))
+        (Path(self.temp_dir.name) / 'headerless.csv').write_text(rows)
+
+        job = submit_job('headerless.csv', {'chunk_size': 30})
+        self.assertEqual(job.status, InferenceJob.SUCCEEDED)
+        obj = CsvFileInference.objects.get(file_name='headerless.csv')
+        self.assertEqual([column['name'] for column in obj.get_columns_data()], ['0', '1'])
+
+        obj.update_column_types({'1': 'category'})
+        job = submit_retype_job('headerless.csv')
+        self.assertEqual(job.status, InferenceJob.SUCCEEDED)
+
+        obj.refresh_from_db()
+        df = pd.read_parquet(Path(self.temp_dir.name) / obj.typed_file_name)
+        self.assertEqual([str(dtype) for dtype in df.dtypes], ['Int8', 'category'])
+        self.assertEqual(df['0'].tolist(), list(range(1, 101)))
+        self.assertEqual(df['1'].astype(int).tolist(), [i % 3 for i in range(1, 101)])
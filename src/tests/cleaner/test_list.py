@@ -2,25 +2,23 @@ from django.test import TestCase
 from django.urls import reverse
 from cleaner.models import CsvFileInference
 import json
+import re
+import tempfile
+from pathlib import Path
 from django.conf import settings
 
 
 class ListCsvFilesViewTest(TestCase):
     def setUp(self):
-        CsvFileInference.objects.create(
-            file_name='sample1.csv',
-            columns_data=json.dumps([
-                {"name": "Age", "inferred_type": "int64", "user_defined_type": "integer"},
-                {"name": "Name", "inferred_type": "object", "user_defined_type": "text"}
-            ])
-        )
-        CsvFileInference.objects.create(
-            file_name='sample2.csv',
-            columns_data=json.dumps([
-                {"name": "Date", "inferred_type": "datetime64[ns]", "user_defined_type": "datetime"},
-                {"name": "Score", "inferred_type": "float64", "user_defined_type": "float"}
-            ])
-        )
+        CsvFileInference.objects.create(file_name='sample1.csv').set_columns_data([
+            {"name": "Age", "pandas_type": "int64", "friendly_name": "integer", "user_defined_type": "integer"},
+            {"name": "Name", "pandas_type": "object", "friendly_name": "text", "user_defined_type": "text"}
+        ])
+        CsvFileInference.objects.create(file_name='sample2.csv').set_columns_data([
+            {"name": "Date", "pandas_type": "datetime64[ns]", "friendly_name": "datetime",
+             "user_defined_type": "datetime"},
+            {"name": "Score", "pandas_type": "float64", "friendly_name": "float", "user_defined_type": "float"}
+        ])
 
     def test_list_csv_files(self):
         # Get the URL for the 'list-csv-files' endpoint
@@ -36,15 +34,16 @@ class ListCsvFilesViewTest(TestCase):
             {
                 "file_name": "sample1.csv",
                 "columns_data": [
-                    {"name": "Age", "inferred_type": "int64", "user_defined_type": "integer"},
-                    {"name": "Name", "inferred_type": "object", "user_defined_type": "text"}
+                    {"name": "Age", "pandas_type": "int64", "friendly_name": "integer", "user_defined_type": "integer"},
+                    {"name": "Name", "pandas_type": "object", "friendly_name": "text", "user_defined_type": "text"}
                 ]
             },
             {
                 "file_name": "sample2.csv",
                 "columns_data": [
-                    {"name": "Date", "inferred_type": "datetime64[ns]", "user_defined_type": "datetime"},
-                    {"name": "Score", "inferred_type": "float64", "user_defined_type": "float"}
+                    {"name": "Date", "pandas_type": "datetime64[ns]", "friendly_name": "datetime",
+                     "user_defined_type": "datetime"},
+                    {"name": "Score", "pandas_type": "float64", "friendly_name": "float", "user_defined_type": "float"}
                 ]
             }
         ]
@@ -60,3 +59,37 @@ class ListCsvFilesViewTest(TestCase):
             # Find the matching item by file_name in the actual response
             matching_item = next((ar for ar in actual_response if ar['fileName'] == item['file_name']), None)
             self.assertIsNotNone(matching_item)
+
+    def test_cursor_pagination(self):
+        """Test that pages are linked through the Link header, keeping the columns left out."""
+        url = reverse('list-csv-files')
+        response = self.client.get(url, {'page_size': 1, 'include_columns': 'false'}, HTTP_X_API_KEY=settings.API_KEY)
+
+        self.assertEqual(response.json(), [{'fileName': 'sample1.csv'}])
+        next_url = re.search(r'<([^>]+)>; rel="next"', response['Link']).group(1)
+
+        response = self.client.get(next_url, HTTP_X_API_KEY=settings.API_KEY)
+        self.assertEqual([item['fileName'] for item in response.json()], ['sample2.csv'])
+        self.assertNotIn('columnsData', response.json()[0])
+        self.assertNotIn('rel="next"', response['Link'])
+
+    def test_conditional_get(self):
+        """Test that unchanged listings and metadata answer If-None-Match with 304, and changes do not."""
+        url = reverse('list-csv-files')
+        etag = self.client.get(url, HTTP_X_API_KEY=settings.API_KEY)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_X_API_KEY=settings.API_KEY, HTTP_IF_NONE_MATCH=etag).status_code,
+                         304)
+
+        with tempfile.TemporaryDirectory() as temp_dir, self.settings(CSV_FILES_DIR=temp_dir):
+            (Path(temp_dir) / 'sample1.csv').write_text('Age,Name\n1,a\n')
+            metadata_url = reverse('fetch-file-metadata', args=['sample1.csv'])
+            metadata_etag = self.client.get(metadata_url, HTTP_X_API_KEY=settings.API_KEY)['ETag']
+            response = self.client.get(metadata_url, HTTP_X_API_KEY=settings.API_KEY, HTTP_IF_NONE_MATCH=metadata_etag)
+            self.assertEqual(response.status_code, 304)
+
+            CsvFileInference.objects.get(file_name='sample1.csv').save()
+            response = self.client.get(metadata_url, HTTP_X_API_KEY=settings.API_KEY, HTTP_IF_NONE_MATCH=metadata_etag)
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.client.get(url, HTTP_X_API_KEY=settings.API_KEY, HTTP_IF_NONE_MATCH=etag).status_code,
+                         200)
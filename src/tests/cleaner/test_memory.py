@@ -0,0 +1,70 @@
+from django.test import TestCase, override_settings
+from pathlib import Path
+import tempfile
+from unittest import mock
+import pandas as pd
+from cleaner.cache import config_fingerprint
+from cleaner.inferencer import DataFrameTypeInferencer
+from cleaner.jobs import submit_job
+from cleaner.memory import MIN_BUDGET_ROWS, budget_rows, peak_rss
+from cleaner.models import InferenceJob
+
+
+@override_settings(INFERENCE_JOB_WORKERS=0)
+class MemoryBudgetTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.narrow_path = str(Path(self.temp_dir.name) / 'narrow.csv')
+        self.wide_path = str(Path(self.temp_dir.name) / 'wide.csv')
+        pd.DataFrame({'id': range(3000), 'group': ['a', 'b', 'c'] * 1000}).to_csv(self.narrow_path, index=False)
+        pd.DataFrame({f'note_{i}': [f'value {row} of column {i}' for row in range(3000)]
+                      for i in range(100)}).to_csv(self.wide_path, index=False)
+        self.settings_override = self.settings(CSV_FILES_DIR=self.temp_dir.name)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.temp_dir.cleanup()
+
+    def test_budget_rows(self):
+        """Test that chunks and samples shrink with the row size and the chunks in flight, down to a floor."""
+        chunk_size, sample_size = budget_rows(100 << 20, 100)
+        self.assertGreater(chunk_size, budget_rows(100 << 20, 1000)[0])
+        self.assertGreater(chunk_size, budget_rows(100 << 20, 100, chunks_in_flight=5)[0])
+        self.assertEqual(sample_size, budget_rows(100 << 20, 100, chunks_in_flight=5)[1])
+        self.assertEqual(budget_rows(1 << 20, 1 << 20), (MIN_BUDGET_ROWS, MIN_BUDGET_ROWS))
+
+    def test_chunks_sized_to_budget(self):
+        """Test that a wide file is read in smaller chunks than a narrow one, and inferred the same way."""
+        narrow = DataFrameTypeInferencer(self.narrow_path, memory_budget=16 << 20)
+        wide = DataFrameTypeInferencer(self.wide_path, memory_budget=16 << 20)
+        type_map = wide.sample_and_infer_types()
+        narrow.apply_memory_budget()
+
+        self.assertLess(wide.chunk_size, narrow.chunk_size)
+        self.assertLess(wide.chunk_size, 3000)
+        self.assertGreater(wide.profile.record('read').calls, 2)
+        self.assertEqual(type_map, DataFrameTypeInferencer(self.wide_path).sample_and_infer_types())
+
+    def test_job_peak_rss(self):
+        """Test that a job records the peak resident memory of its process."""
+        job = submit_job('narrow.csv', {'memory_budget': 16 << 20})
+
+        self.assertEqual(job.status, InferenceJob.SUCCEEDED)
+        self.assertGreater(job.peak_rss, 0)
+
+    def test_job_peak_rss_includes_workers(self):
+        """Test that a job parsed and inferred in worker processes adds their peak resident memory to its own."""
+        with mock.patch('cleaner.inferencer.MAX_WORKERS', 2):
+            job = submit_job('wide.csv', {'workers': 2})
+
+        self.assertEqual(job.status, InferenceJob.SUCCEEDED)
+        # Two workers, each at least as large as a fresh interpreter with pandas
+        self.assertGreater(job.peak_rss - peak_rss(), 2 * (32 << 20))
+
+    def test_fingerprint(self):
+        """Test that a budget changes the cache fingerprint, and no budget leaves it as it was."""
+        config = {'chunk_size': 1000000, 'random_state': 0}
+
+        self.assertEqual(config_fingerprint(config), config_fingerprint(dict(config, memory_budget=None)))
+        self.assertNotEqual(config_fingerprint(config), config_fingerprint(dict(config, memory_budget=16 << 20)))
@@ -0,0 +1,87 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.conf import settings
+from pathlib import Path
+import tempfile
+from cleaner.inferencer import DataFrameTypeInferencer
+from cleaner.jobs import submit_job
+from cleaner.metrics import PhaseMetrics
+
+
+@override_settings(INFERENCE_JOB_WORKERS=0)
+class PhaseMetricsTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = Path(self.temp_dir.name) / 'people.csv'
+        rows = ''.join(f'{i},2020-01-{i % 28 + 1:02d},{"ab"[i % 2]}\n' for i in range(100))
+        self.file_path.write_text('id,joined,group\n' + rows)
+        self.settings_override = self.settings(CSV_FILES_DIR=self.temp_dir.name)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.temp_dir.cleanup()
+
+    def test_inference_phases(self):
+        """Test that the reads, sampling, checks of each column and conversion are recorded."""
+        inference = DataFrameTypeInferencer(str(self.file_path), chunk_size=30)
+        inference.convert_df_dtypes(inference.sample_and_infer_types())
+        records = {(record['phase'], record['column']): record for record in inference.profile.to_list()}
+
+        # Read twice, once to sample and once to convert
+        self.assertEqual(records[('read', None)]['rows'], 200)
+        self.assertEqual(records[('read', None)]['bytes'], 2 * self.file_path.stat().st_size)
+        self.assertEqual(records[('sample', None)]['rows'], 100)
+        self.assertEqual(records[('convert', None)]['rows'], 100)
+        self.assertEqual(records[('check_datetime', 'joined')]['rows'], 100)
+        self.assertIn(('check_category', 'group'), records)
+        self.assertGreater(records[('infer', None)]['seconds'], 0)
+
+    def test_job_profile(self):
+        """Test that a job saves its profile, returned by the job endpoint when asked for."""
+        job = submit_job('people.csv', {'chunk_size': 30})
+        url = reverse('inference-job', args=[job.pk])
+
+        response = self.client.get(url, HTTP_X_API_KEY=settings.API_KEY, HTTP_ACCEPT='application/json')
+        self.assertNotIn('profile', response.json())
+        response = self.client.get(url, {'profile': 'true'}, HTTP_X_API_KEY=settings.API_KEY,
+                                   HTTP_ACCEPT='application/json')
+        phases = {record['phase'] for record in response.json()['profile']}
+        self.assertTrue({'read', 'sample', 'infer', 'convert'} <= phases)
+
+    def test_type_infer_profile(self):
+        """Test that the type-infer response has the profile of a job run inline when asked for."""
+        with open(self.file_path, 'rb') as file:
+            response = self.client.post(reverse('cleaner-type-infer'), {'document': file, 'profile': 'true'},
+                                        HTTP_X_API_KEY=settings.API_KEY, HTTP_ACCEPT='application/json')
+
+        self.assertEqual(response.status_code, 202)
+        phases = {record['phase'] for record in response.json()['profile']}
+        self.assertTrue({'read', 'sample', 'infer', 'convert'} <= phases)
+
+    def test_metrics_view(self):
+        """Test that finished jobs are counted on the metrics endpoint, which only local addresses may scrape."""
+        submit_job('people.csv', {})
+        url = reverse('metrics')
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        content = response.content.decode()
+        self.assertRegex(content, r'csv_cleaner_jobs_total\{kind="infer",status="succeeded"\} [1-9]')
+        self.assertRegex(content, r'csv_cleaner_phase_bytes_total\{phase="read"\} [1-9]')
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='203.0.113.7').status_code, 403)
+
+    def test_render(self):
+        """Test that the phase totals of jobs are summed over their columns."""
+        metrics = PhaseMetrics()
+        metrics.add_job('infer', 'succeeded', [
+            {'phase': 'check_numeric', 'column': 'a', 'seconds': 0.5, 'rows': 10, 'bytes': 0, 'calls': 1},
+            {'phase': 'check_numeric', 'column': 'b', 'seconds': 0.25, 'rows': 10, 'bytes': 0, 'calls': 1},
+        ])
+        metrics.add_job('infer', 'failed', [])
+
+        content = metrics.render()
+        self.assertIn('csv_cleaner_phase_seconds_total{phase="check_numeric"} 0.75', content)
+        self.assertIn('csv_cleaner_phase_rows_total{phase="check_numeric"} 20', content)
+        self.assertIn('csv_cleaner_jobs_total{kind="infer",status="failed"} 1', content)
@@ -0,0 +1,33 @@
+from django.test import TestCase
+import pandas as pd
+from cleaner.profiler import profile_column
+
+
+class ColumnProfileTestCase(TestCase):
+    def test_profile_column(self):
+        """Test the character classes and lengths recorded for a column."""
+        profile = profile_column(pd.Series(['2021-01-01', '2021-02-01', 'unknown', '3']))
+
+        self.assertEqual(profile.count, 4)
+        self.assertEqual((profile.min_length, profile.max_length), (1, 10))
+        self.assertEqual(profile.digit_share, 0.75)
+        self.assertEqual(profile.letter_share, 0.25)
+        self.assertEqual(profile.separator_share, 0.5)
+        self.assertAlmostEqual(profile.digit_ratio, 17 / 28)
+
+    def test_free_text_rules_out_parsers(self):
+        """Test that a plain free-text column never reaches the typed parsers."""
+        profile = profile_column(pd.Series([f'note number {chr(97 + i % 26)} about things' for i in range(5000)]))
+
+        for kind in ('bool', 'numeric', 'complex', 'datetime', 'timedelta'):
+            self.assertFalse(profile.could_be(kind, threshold=0.5), kind)
+
+    def test_typed_columns_are_kept(self):
+        """Test that the checks a column could pass are not ruled out."""
+        durations = profile_column(pd.Series(['1h 30m', '2 days', '00:15:00'] * 1000))
+        self.assertTrue(durations.could_be('timedelta', threshold=0.5))
+        self.assertTrue(durations.could_be('datetime', threshold=0.5))
+
+        booleans = profile_column(pd.Series(['yes', 'no', 'TRUE'] * 1000))
+        self.assertTrue(booleans.could_be('bool', threshold=0.5))
+        self.assertFalse(booleans.could_be('numeric', threshold=0.5))
@@ -0,0 +1,87 @@
+from django.test import TestCase
+from pathlib import Path
+from unittest import skipIf
+import datetime
+import tempfile
+import pandas as pd
+from cleaner.inferencer import DataFrameTypeInferencer
+from cleaner.readers import ExcelReader, ParallelCsvReader, openpyxl, split_byte_ranges
+
+
+class ParallelCsvReaderTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = str(Path(self.temp_dir.name) / 'quoted.csv')
+        df = pd.DataFrame({
+            'id': range(300),
+            'note': [f'line one\nline "two" {i}' if i % 7 == 0 else f'note, {i}' for i in range(300)],
+            'score': [i * 0.5 for i in range(300)],
+        })
+        df.to_csv(self.file_path, index=False)
+        self.expected = pd.read_csv(self.file_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_split_byte_ranges(self):
+        """Test that ranges cover the file and never start inside a quoted field."""
+        data_start = len('id,note,score\n')
+        ranges = split_byte_ranges(self.file_path, data_start, 200)
+
+        self.assertGreater(len(ranges), 10)
+        self.assertEqual(ranges[0][0], data_start)
+        self.assertEqual(ranges[-1][1], Path(self.file_path).stat().st_size)
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+        with open(self.file_path, 'rb') as handle:
+            data = handle.read()
+        for start, _ in ranges:
+            self.assertEqual(data[:start].count(b'"') % 2, 0)
+
+    def test_read_in_order(self):
+        """Test that chunks parsed in worker processes combine to the same DataFrame as a single read."""
+        reader = ParallelCsvReader(self.file_path, workers=2, range_bytes=2000)
+        chunks = list(reader)
+
+        self.assertGreater(len(chunks), 1)
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), self.expected)
+
+
+@skipIf(openpyxl is None, "openpyxl is not installed")
+class ExcelReaderTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = str(Path(self.temp_dir.name) / 'sheet.xlsx')
+        self.csv_path = str(Path(self.temp_dir.name) / 'sheet.csv')
+        start = datetime.datetime(2020, 1, 1)
+        rows = [(i, i * 0.5, start + datetime.timedelta(days=i), ['a', 'b'][i % 2], i % 3 == 0) for i in range(250)]
+        book = openpyxl.Workbook(write_only=True)
+        sheet = book.create_sheet()
+        sheet.append(['id', 'score', 'day', 'grade', 'flag'])
+        for row in rows:
+            sheet.append(row)
+        sheet.append([])
+        book.save(self.file_path)
+        pd.DataFrame(rows, columns=['id', 'score', 'day', 'grade', 'flag']).to_csv(self.csv_path, index=False)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_read_in_chunks(self):
+        """Test that the worksheet rows are streamed in chunks, with dates read as text and blank rows skipped."""
+        chunks = list(ExcelReader(self.file_path, chunk_size=100))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [100, 100, 50])
+        self.assertEqual(list(chunks[0].columns), ['id', 'score', 'day', 'grade', 'flag'])
+        self.assertEqual(chunks[0]['id'].dtype, 'int64')
+        self.assertEqual(chunks[0]['day'].iloc[1], '2020-01-02 00:00:00')
+
+    def test_same_types_as_csv(self):
+        """Test that a workbook is inferred and converted like the same data as a CSV file."""
+        excel = DataFrameTypeInferencer(self.file_path, chunk_size=100)
+        csv = DataFrameTypeInferencer(self.csv_path, chunk_size=100)
+
+        type_map = excel.sample_and_infer_types()
+        self.assertEqual(type_map, csv.sample_and_infer_types())
+        self.assertEqual(excel.row_count, 250)
+        pd.testing.assert_frame_equal(excel.convert_df_dtypes(type_map), csv.convert_df_dtypes(type_map))
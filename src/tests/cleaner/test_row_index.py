@@ -0,0 +1,74 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.conf import settings
+import os
+import tempfile
+import pandas as pd
+from unittest import mock
+from cleaner.row_index import RowIndex, build_row_index, index_path, read_row_window
+from cleaner.sniffer import CsvDialect
+
+
+class RowIndexTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        lines = ['id,text,quoted']
+        for i in range(500):
+            if i % 7 == 0:
+                lines.append('')
+            if i % 11 == 0:
+                lines.append(f'{i},"multi\nline {i}","say ""{i}"""')
+            else:
+                lines.append(f'{i},row {i},"a,{i}"')
+        self.file_path = os.path.join(self.temp_dir.name, 'rows.csv')
+        with open(self.file_path, 'w', newline='') as file:
+            file.write('\r\n'.join(lines))
+        self.expected = pd.read_csv(self.file_path, dtype=str, keep_default_na=False)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_index_matches_pandas_rows(self):
+        """Test that the offsets index the rows pandas reads, across quoted newlines, blank lines and blocks."""
+        with mock.patch('cleaner.row_index.BLOCK_SIZE', 97):
+            index = RowIndex.build(self.file_path, CsvDialect(), step=16)
+
+        self.assertEqual(index.rows, len(self.expected))
+        self.assertEqual(len(index.offsets), -(-len(self.expected) // 16))
+        with open(self.file_path, 'rb') as file:
+            file.seek(int(index.offsets[3]))
+            self.assertTrue(file.readline().startswith(f'{self.expected["id"][48]},'.encode()))
+
+    def test_read_row_window(self):
+        """Test that windows anywhere in the file are read as stored, building the index on first use."""
+        for start in (0, 15, 16, 333, len(self.expected) - 2):
+            columns, rows, total = read_row_window(self.file_path, CsvDialect(), start, 5)
+            self.assertEqual(columns, ['id', 'text', 'quoted'])
+            self.assertEqual(rows, self.expected.iloc[start:start + 5].values.tolist())
+            self.assertEqual(total, len(self.expected))
+        self.assertTrue(os.path.exists(index_path(self.file_path)))
+
+        columns, rows, total = read_row_window(self.file_path, CsvDialect(), len(self.expected), 5)
+        self.assertEqual(rows, [])
+
+    def test_stale_index_ignored(self):
+        """Test that an index is not used once its file changed."""
+        build_row_index(self.file_path, CsvDialect())
+        with open(self.file_path, 'a') as file:
+            file.write('\r\n999,appended,"x"')
+
+        self.assertIsNone(RowIndex.load(self.file_path))
+
+    def test_fetch_rows_view(self):
+        """Test the row window endpoint, and its validation of the window."""
+        with self.settings(CSV_FILES_DIR=self.temp_dir.name):
+            url = reverse('fetch-rows', args=['rows.csv'])
+            response = self.client.get(url, {'start': 100, 'count': 3}, HTTP_X_API_KEY=settings.API_KEY,
+                                       HTTP_ACCEPT='application/json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['rows'], self.expected.iloc[100:103].values.tolist())
+            self.assertEqual(response.json()['totalRows'], len(self.expected))
+
+            response = self.client.get(url, {'count': 0}, HTTP_X_API_KEY=settings.API_KEY,
+                                       HTTP_ACCEPT='application/json')
+            self.assertEqual(response.status_code, 400)
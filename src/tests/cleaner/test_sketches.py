@@ -0,0 +1,60 @@
+from django.test import TestCase
+import numpy as np
+import pandas as pd
+from cleaner.sketches import CategorySketch, DistinctCounter, ReservoirSampler
+
+
+class DistinctCounterTestCase(TestCase):
+    def test_exact_count(self):
+        """Test that small cardinalities are counted exactly, ignoring NaN."""
+        counter = DistinctCounter().update(pd.Series(['a', 'b', 'a', None]))
+        counter.update(pd.Series(['b', 'c']))
+        self.assertIsNone(counter.registers)
+        self.assertEqual(counter.estimate(), 3)
+
+    def test_sketch_estimate_and_merge(self):
+        """Test that chunks counted separately and merged estimate the cardinality of their union."""
+        first = DistinctCounter(max_exact=1000).update(pd.Series(np.arange(0, 60000).astype(str)))
+        second = DistinctCounter(max_exact=1000).update(pd.Series(np.arange(30000, 90000).astype(str)))
+        self.assertIsNotNone(first.registers)
+
+        estimate = first.merge(second).estimate()
+        self.assertAlmostEqual(estimate, 90000, delta=90000 * 0.05)
+
+
+class CategorySketchTestCase(TestCase):
+    def test_incremental_updates(self):
+        """Test that a sketch fed chunk by chunk predicts category memory below text memory."""
+        sketch = CategorySketch()
+        for _ in range(3):
+            sketch.update(pd.Series(['red', 'green', 'blue'] * 100))
+
+        memory_usage_text, memory_usage_category = sketch.predicted_memory()
+        self.assertEqual(sketch.count, 900)
+        self.assertAlmostEqual(sketch.distinct_ratio(), 3 / 900)
+        self.assertLess(memory_usage_category, memory_usage_text)
+
+
+class ReservoirSamplerTestCase(TestCase):
+    def sample(self, random_state):
+        sampler = ReservoirSampler(50, random_state=random_state)
+        for start in range(0, 1000, 128):
+            sampler.update(pd.DataFrame({'row': np.arange(start, min(start + 128, 1000))}))
+        return sampler.result()
+
+    def test_fixed_size_sample(self):
+        """Test that the sample size stays fixed over the stream and rows are drawn from all of it."""
+        sample = self.sample(random_state=0)
+        self.assertEqual(len(sample), 50)
+        self.assertTrue(sample['row'].is_unique)
+        self.assertGreater(sample['row'].max(), 500)
+
+    def test_deterministic_sample(self):
+        """Test that the same random_state draws the same sample."""
+        pd.testing.assert_frame_equal(self.sample(random_state=7), self.sample(random_state=7))
+        self.assertFalse(self.sample(random_state=7).equals(self.sample(random_state=8)))
+
+    def test_small_stream(self):
+        """Test that a stream smaller than the sample size is kept whole and in order."""
+        sampler = ReservoirSampler(10).update(pd.DataFrame({'row': [1, 2, 3]}))
+        self.assertEqual(sampler.result()['row'].tolist(), [1, 2, 3])
@@ -0,0 +1,53 @@
+from django.test import TestCase
+from pathlib import Path
+import tempfile
+import pandas as pd
+from cleaner.inferencer import DataFrameTypeInferencer
+from cleaner.sniffer import CsvDialect, sniff_csv
+
+
+class SniffCsvTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, content: bytes):
+        path = Path(self.temp_dir.name) / name
+        path.write_bytes(content)
+        return str(path)
+
+    def test_encoding_from_sampled_blocks(self):
+        """Test that a byte invalid in UTF-8 far past the prefix is found by the sampled blocks."""
+        rows = b''.join(b'%d,plain text\n' % i for i in range(20000))
+        path = self.write('late.csv', b'id,note\n' + rows + b'20000,caf\xe9 \x96 bar\n')
+
+        self.assertEqual(sniff_csv(path).encoding, 'cp1252')
+        self.assertEqual(sniff_csv(self.write('clean.csv', b'id,note\n' + rows)).encoding, 'utf-8')
+
+    def test_dialect_and_header(self):
+        """Test the delimiter, escaped quotes and header row detection."""
+        path = self.write('semicolon.csv', b'name;note\nAlice;"say \\"hi\\""\nBob;plain\nEve;more\n')
+        self.assertEqual(sniff_csv(path), CsvDialect(delimiter=';', doublequote=False, escapechar='\\'))
+
+        path = self.write('headerless.csv', b'1,2.5,3\n4,5.5,6\n7,8.5,9\n')
+        self.assertIsNone(sniff_csv(path).header_row)
+
+    def test_numeric_header(self):
+        """Test that a header of numbers is kept when the rows below it are typed differently."""
+        path = self.write('years.csv', b'2019,2020,2021\n1.5,2.5,3.5\n4.5,5.5,6.5\n')
+        self.assertEqual(sniff_csv(path).header_row, 0)
+
+        path = self.write('single.csv', b'2019,2020,2021\n')
+        self.assertEqual(sniff_csv(path).header_row, 0)
+
+    def test_inferencer_reuses_dialect(self):
+        """Test that the inferencer reads with the sniffed dialect, in a single pass for non UTF-8 files."""
+        path = self.write('latin.csv', 'Name;Score\nJosé;1\nRenée;2\nZoë;3\n'.encode('cp1252'))
+        inference = DataFrameTypeInferencer(path, dialect=sniff_csv(path))
+        df = inference.convert_df_dtypes(inference.sample_and_infer_types())
+
+        self.assertEqual(list(df.columns), ['Name', 'Score'])
+        self.assertEqual(list(df['Name']), ['José', 'Renée', 'Zoë'])
+        self.assertTrue(pd.api.types.is_integer_dtype(df['Score']))
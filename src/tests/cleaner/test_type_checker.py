@@ -0,0 +1,128 @@
+import warnings
+from django.test import TestCase
+from unittest import skipIf
+import pandas as pd
+from cleaner.type_checker import check_datetime, guess_datetime_formats, infer_datetime_formats, parse_datetimes, \
+    check_timedelta, parse_timedeltas, check_boolean, check_complex, parse_complex, check_category, \
+    check_numeric
+from cleaner.readers import pa
+
+
+class DatetimeCheckTestCase(TestCase):
+    def test_guess_datetime_formats(self):
+        """Test that the most common guessed format comes first and ISO8601 is always a candidate."""
+        values = pd.Series(['2020-01-31', '2020-02-01', '03/04/2021', None])
+        self.assertEqual(guess_datetime_formats(values), ['%Y-%m-%d', '%m/%d/%Y', 'ISO8601'])
+
+    def test_parse_datetimes_falls_back_for_leftover_values(self):
+        """Test that values not matching any candidate format are parsed one by one."""
+        values = pd.Series(['1/01/1990', '2/02/1991', 'March 3 2021', 'Not a date', None])
+        converted, matched_formats = parse_datetimes(values, ['%m/%d/%Y'])
+
+        self.assertEqual(matched_formats, ['%m/%d/%Y'])
+        self.assertEqual(str(converted.dtype), 'datetime64[ns]')
+        self.assertEqual(list(converted[:3]), [pd.Timestamp('1990-01-01'), pd.Timestamp('1991-02-02'),
+                                               pd.Timestamp('2021-03-03')])
+        self.assertTrue(converted[3:].isna().all())
+
+    def test_infer_datetime_formats(self):
+        """Test that the detected formats are returned for datetime columns only."""
+        dates = pd.Series(pd.date_range('2000-01-01', periods=500, freq='h').strftime('%d.%m.%Y %H:%M'))
+        self.assertEqual(infer_datetime_formats(dates), ['%d.%m.%Y %H:%M'])
+        self.assertEqual(check_datetime(dates), 'datetime64[ns]')
+
+        texts = pd.Series([f'free text {i}' for i in range(500)])
+        self.assertIsNone(infer_datetime_formats(texts))
+        self.assertIsNone(check_datetime(texts))
+
+
+class TimedeltaCheckTestCase(TestCase):
+    def test_parse_timedeltas(self):
+        """Test the vectorized duration shapes and the pytimeparse fallback for the rest."""
+        values = pd.Series(['1:30:00', '2 days', '1h 30m', 'PT1H30M', '-1.5h', '1 day, 2:00:00', '2d4h', 'soon', None])
+        with warnings.catch_warnings():
+            # Values that are not durations become NaT without casting NaN
+            warnings.simplefilter('error', RuntimeWarning)
+            converted = parse_timedeltas(values)
+
+        self.assertEqual(str(converted.dtype), 'timedelta64[ns]')
+        self.assertEqual(list(converted[:7]), [pd.Timedelta(hours=1, minutes=30), pd.Timedelta(days=2),
+                                               pd.Timedelta(hours=1, minutes=30), pd.Timedelta(hours=1, minutes=30),
+                                               pd.Timedelta(hours=-1.5), pd.Timedelta(days=1, hours=2),
+                                               pd.Timedelta(days=2, hours=4)])
+        self.assertTrue(converted[7:].isna().all())
+
+    def test_parse_timedeltas_out_of_range(self):
+        """Test that durations too long for timedelta64[ns] become NaT instead of failing the column."""
+        values = pd.Series(['1 day'] * 20 + ['99999999999 days', '-99999999999 days'])
+        converted = parse_timedeltas(values)
+
+        self.assertEqual(list(converted[:20]), [pd.Timedelta(days=1)] * 20)
+        self.assertTrue(converted[20:].isna().all())
+        self.assertEqual(check_timedelta(values), 'timedelta64[ns]')
+
+    def test_check_timedelta(self):
+        """Test that duration columns pass the timedelta check and free text does not."""
+        self.assertEqual(check_timedelta(pd.Series([f'{i}m {i % 60}s' for i in range(500)])), 'timedelta64[ns]')
+        self.assertIsNone(check_timedelta(pd.Series([f'free text {i}' for i in range(500)])))
+
+
+class BooleanCheckTestCase(TestCase):
+    def test_check_boolean(self):
+        """Test string, numeric and mixed boolean representations."""
+        self.assertEqual(check_boolean(pd.Series(['Yes', 'no', 'TRUE', 'f'] * 100)), 'bool')
+        self.assertEqual(check_boolean(pd.Series([1, 0, 1.0, True, 'false'], dtype=object)), 'bool')
+        self.assertEqual(check_boolean(pd.Series([0, 1, 1] * 100)), 'bool')
+
+    def test_check_boolean_ignores_case(self):
+        """Test that boolean values match whatever their casing."""
+        self.assertEqual(check_boolean(pd.Series(['yEs', 'fAlSe', 'No', 'tRUE'] * 100)), 'bool')
+
+    def test_check_boolean_rejects(self):
+        """Test that single-valued, numeric and free text columns are not boolean."""
+        self.assertIsNone(check_boolean(pd.Series(['yes'] * 100)))
+        self.assertIsNone(check_boolean(pd.Series([0, 1, 2, 3, 4] * 100)))
+        self.assertIsNone(check_boolean(pd.Series([f'free text {i}' for i in range(100000)])))
+
+    def test_check_boolean_with_non_boolean_head(self):
+        """Test that a column whose first values are not boolean is still checked as a whole."""
+        self.assertEqual(check_boolean(pd.Series(['maybe'] * 1100 + ['yes', 'no'] * 2000)), 'bool')
+
+
+class ComplexCheckTestCase(TestCase):
+    def test_parse_complex(self):
+        """Test that complex literals are converted and everything else becomes NaN."""
+        values = pd.Series(['1+2j', '(1-2j)', '3j', '-j', '1e3-2.5J', '5', 'hello', '1 + 2j', None])
+        converted = parse_complex(values)
+
+        self.assertEqual(str(converted.dtype), 'complex128')
+        self.assertEqual(list(converted[:6]), [1 + 2j, 1 - 2j, 3j, -1j, 1000 - 2.5j, 5 + 0j])
+        self.assertTrue(converted[6:].isna().all())
+
+    def test_check_complex(self):
+        """Test that mostly complex columns pass and text columns are rejected without raising."""
+        self.assertEqual(check_complex(pd.Series(['1+2j', '3-1j', 'x'])), 'complex128')
+        self.assertIsNone(check_complex(pd.Series(['1+2j', 'x', 'y'])))
+        self.assertIsNone(check_complex(pd.Series([f'free text {i}' for i in range(5000)])))
+
+    def test_check_complex_with_non_complex_head(self):
+        """Test that a column whose first values are not complex is still checked as a whole."""
+        self.assertEqual(check_complex(pd.Series(['x'] * 1100 + ['1+2j'] * 4000)), 'complex128')
+
+
+class NumericCheckTestCase(TestCase):
+    @skipIf(pa is None, "pyarrow is not installed")
+    def test_check_numeric_on_arrow_strings(self):
+        """Test that Arrow-backed strings, which convert to nullable dtypes, are sized like Python strings."""
+        for dtype in (object, 'string[pyarrow]'):
+            self.assertEqual(check_numeric(pd.Series(['1', '-2', '300'], dtype=dtype)), 'Int16')
+            self.assertEqual(check_numeric(pd.Series(['1.5', '2', 'x'], dtype=dtype)), 'float32')
+
+
+class CategoryCheckTestCase(TestCase):
+    def test_check_category(self):
+        """Test that the distinct ratio is compared against the category threshold."""
+        grades = pd.Series(list('ABABA'))
+        self.assertEqual(check_category(grades), 'category')
+        self.assertIsNone(check_category(grades, threshold=0.3))
+        self.assertIsNone(check_category(pd.Series(list('ABCDE'))))
@@ -2,18 +2,19 @@ from django.test import TestCase
 from django.urls import reverse
 import json
 from django.conf import settings
-from cleaner.models import CsvFileInference
+from cleaner.models import CsvColumn, CsvFileInference
+from cleaner.serializers import BULK_UPDATE_MAX_FILES, BulkColumnUpdateSerializer
 
 
 class UpdateColumnDtypeViewTest(TestCase):
     def setUp(self):
         # Setup a CsvFileInference instance for testing
         self.test_file_name = 'test_file.csv'
-        self.test_columns_data = json.dumps([
+        self.test_columns_data = [
             {"name": "column1", "pandas_type": "float64", "friendly_name": "float"},
             {"name": "column2", "pandas_type": "object", "friendly_name": "text"}
-        ])
-        CsvFileInference.objects.create(file_name=self.test_file_name, columns_data=self.test_columns_data)
+        ]
+        CsvFileInference.objects.create(file_name=self.test_file_name).set_columns_data(self.test_columns_data)
 
         # URL for the update-column-dtype endpoint
         self.update_url = reverse('update-column-dtype')
@@ -23,7 +24,7 @@ class UpdateColumnDtypeViewTest(TestCase):
         update_data = {
             "file_name": self.test_file_name,
             "columns": [
-                {"name": "column1", "new_dtype": "integer"},
+                {"name": "column1", "new_dtype": "Int64"},
                 {"name": "column2", "new_dtype": "category"}
             ]
         }
@@ -40,5 +41,72 @@ class UpdateColumnDtypeViewTest(TestCase):
         updated_columns_data = updated_obj.get_columns_data()
 
         # Assert the changes were made correctly
-        self.assertEqual(updated_columns_data[0]["user_defined_type"], "integer")
+        self.assertEqual(updated_columns_data[0]["user_defined_type"], "Int64")
         self.assertEqual(updated_columns_data[1]["user_defined_type"], "category")
+
+    def test_update_to_unsupported_dtype(self):
+        """Test that types the converter cannot write to a typed file are rejected."""
+        for new_dtype in ("integer", "float16", "complex64"):
+            update_data = {"file_name": self.test_file_name, "columns": [{"name": "column1", "new_dtype": new_dtype}]}
+            response = self.client.post(self.update_url, data=json.dumps(update_data),
+                                        content_type='application/json', HTTP_X_API_KEY=settings.API_KEY,
+                                        HTTP_ACCEPT='application/json')
+            self.assertEqual(response.status_code, 400)
+
+        self.assertNotIn("user_defined_type",
+                         CsvFileInference.objects.get(file_name=self.test_file_name).get_columns_data()[0])
+
+    def test_update_is_a_single_statement(self):
+        """Test that the column types are set in one UPDATE, ignoring unknown columns."""
+        csv_file_inference = CsvFileInference.objects.get(file_name=self.test_file_name)
+
+        # The update and the file's updated_at, inside a transaction
+        with self.assertNumQueries(4):
+            updated = csv_file_inference.update_column_types({"column1": "integer", "missing": "text"})
+
+        self.assertEqual(updated, 1)
+        self.assertEqual([column.get("user_defined_type") for column in csv_file_inference.get_columns_data()],
+                         ["integer", None])
+
+    def test_bulk_update_column_dtype(self):
+        """Test the bulk update endpoint, applying every file's updates or none of them."""
+        CsvFileInference.objects.create(file_name='other.csv').set_columns_data(self.test_columns_data)
+        url = reverse('bulk-update-column-dtype')
+
+        update_data = {"files": [
+            {"file_name": self.test_file_name, "columns": [{"name": "column1", "new_dtype": "Int64"}]},
+            {"file_name": "other.csv", "columns": [{"name": "column2", "new_dtype": "category"}]},
+            {"file_name": "missing.csv", "columns": [{"name": "column2", "new_dtype": "category"}]},
+        ]}
+        response = self.client.post(url, data=json.dumps(update_data), content_type='application/json',
+                                    HTTP_X_API_KEY=settings.API_KEY, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['missingFiles'], ['missing.csv'])
+        self.assertNotIn("user_defined_type", CsvFileInference.objects.get(file_name='other.csv').get_columns_data()[1])
+
+        update_data["files"].pop()
+        response = self.client.post(url, data=json.dumps(update_data), content_type='application/json',
+                                    HTTP_X_API_KEY=settings.API_KEY, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updatedColumns'], 2)
+        self.assertEqual(CsvFileInference.objects.get(file_name='other.csv').get_columns_data()[1]["user_defined_type"],
+                         "category")
+
+    def test_update_types_of_many_files(self):
+        """Test that the types of columns in more files than one statement can match are all set."""
+        files = CsvFileInference.objects.bulk_create([CsvFileInference(file_name=f'file{i}.csv') for i in range(1200)])
+        CsvColumn.objects.bulk_create([CsvColumn(file=file, position=0, name='column1') for file in files])
+
+        updated = CsvColumn.update_types({file.file_name: {'column1': 'category'} for file in files})
+
+        self.assertEqual(updated, 1200)
+        self.assertEqual(CsvColumn.objects.filter(user_defined_type='category').count(), 1200)
+
+    def test_bulk_update_file_limit(self):
+        """Test that a bulk update of more than BULK_UPDATE_MAX_FILES files is rejected."""
+        files = [{"file_name": f"file{i}.csv", "columns": [{"name": "column1", "new_dtype": "category"}]}
+                 for i in range(BULK_UPDATE_MAX_FILES + 1)]
+        serializer = BulkColumnUpdateSerializer(data={"files": files})
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("files", serializer.errors)
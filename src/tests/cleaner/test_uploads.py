@@ -0,0 +1,51 @@
+from django.test import TestCase
+from django.core.files.uploadhandler import StopFutureHandlers
+from pathlib import Path
+import hashlib
+import os
+import tempfile
+from cleaner.uploads import CsvStorageUploadHandler
+from cleaner.sniffer import PREFIX_BYTES, sniff_csv
+
+
+class CsvStorageUploadHandlerTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.settings_override = self.settings(CSV_FILES_DIR=self.temp_dir.name)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.temp_dir.cleanup()
+
+    def upload(self, content: bytes, chunk_size: int = 1000):
+        handler = CsvStorageUploadHandler()
+        # The handler keeps the document to itself
+        with self.assertRaises(StopFutureHandlers):
+            handler.new_file('document', 'data.csv', 'text/csv', len(content))
+        for start in range(0, len(content), chunk_size):
+            handler.receive_data_chunk(content[start:start + chunk_size], start)
+        return handler.file_complete(len(content))
+
+    def test_streamed_upload(self):
+        """Test that the upload is written once under a partial name, hashed and sampled on the way."""
+        content = b'id;name\n' + b''.join(b'%d;caf\xc3\xa9 %d\n' % (i, i) for i in range(20000))
+        file = self.upload(content)
+
+        self.assertTrue(os.path.basename(file.temporary_file_path()).endswith('.part'))
+        self.assertEqual(file.sha256, hashlib.sha256(content).hexdigest())
+        self.assertEqual(file.samples[0], content[:PREFIX_BYTES])
+        self.assertTrue(content.endswith(file.samples[-1]))
+
+        final_path = str(Path(self.temp_dir.name) / 'data.csv')
+        file.commit(final_path)
+        self.assertEqual(Path(final_path).read_bytes(), content)
+        self.assertEqual(file.sniff(), sniff_csv(final_path))
+        self.assertEqual(os.listdir(self.temp_dir.name), ['data.csv'])
+
+    def test_discarded_upload(self):
+        """Test that an upload that is not committed leaves no file behind."""
+        file = self.upload(b'a,b\n1,2\n')
+        file.discard()
+
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
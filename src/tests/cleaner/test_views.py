@@ -1,12 +1,20 @@
 from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
+import hashlib
+import os
 import tempfile
 import shutil
 from pathlib import Path
 from django.conf import settings
+from unittest import skipIf
+import io
+import pandas as pd
+from cleaner.models import CsvFileInference, InferenceJob
+from cleaner.sinks import pa
 
 
+@override_settings(INFERENCE_JOB_WORKERS=0)
 class CsvTypeInferViewTestCase(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -35,8 +43,8 @@ Eve,1994-05-05,,A
         """Test the CSV type inference through the CsvTypeInferView."""
         url = reverse('cleaner-type-infer')
 
-        # Prepare data and files to send in the POST request
-        with open(self.file_path, 'rb') as file:
+        # Prepare data and files to send in the POST request, saving the upload away from the csv directory
+        with open(self.file_path, 'rb') as file, self.settings(CSV_FILES_DIR=str(Path(self.temp_dir) / 'uploads')):
             data = {
                 'document': file,
                 'chunk_size': 1000000,
@@ -55,3 +63,54 @@ Eve,1994-05-05,,A
         for column in response.json()['columns']:
             self.assertIn(column['name'], ['Name', 'Birthdate', 'Score', 'Grade'])
             # Add more detailed assertions per column based on expected types
+
+        # The job ran inline and reports the same columns
+        job_response = self.client.get(reverse('inference-job', args=[response.json()['jobId']]),
+                                       HTTP_X_API_KEY=settings.API_KEY, HTTP_ACCEPT='application/json')
+        self.assertEqual(job_response.json()['status'], 'succeeded')
+        self.assertEqual(job_response.json()['progress'], 1.0)
+        self.assertEqual(job_response.json()['columns'], response.json()['columns'])
+
+        # The upload was written once, under its own name next to its row index, and its digest recorded on the job
+        expected_files = ['.sample_data.csv.rows.npz', 'sample_data.csv'] + (['.typed'] if pa is not None else [])
+        self.assertEqual(sorted(os.listdir(Path(self.temp_dir) / 'uploads')), sorted(expected_files))
+        with open(self.file_path, 'rb') as file:
+            self.assertEqual(InferenceJob.objects.get().sha256, hashlib.sha256(file.read()).hexdigest())
+
+        # The sniffed dialect is stored with the file for later reads
+        dialect = CsvFileInference.objects.get(file_name='sample_data.csv').get_dialect()
+        self.assertEqual((dialect.encoding, dialect.delimiter, dialect.header_row), ('utf-8', ',', 0))
+
+    def test_too_many_workers(self):
+        """Test that uploads asking for more workers than INFERENCE_MAX_WORKERS are rejected."""
+        with open(self.file_path, 'rb') as file, self.settings(CSV_FILES_DIR=str(Path(self.temp_dir) / 'uploads')):
+            response = self.client.post(reverse('cleaner-type-infer'),
+                                        {'document': file, 'workers': settings.INFERENCE_MAX_WORKERS + 1},
+                                        format='multipart', HTTP_X_API_KEY=settings.API_KEY,
+                                        HTTP_ACCEPT='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('workers', response.json())
+        self.assertFalse(InferenceJob.objects.exists())
+
+    @skipIf(pa is None, "pyarrow is not installed")
+    def test_typed_file_download(self):
+        """Test that the converted data is kept as Parquet and served by the typed download endpoint."""
+        with open(self.file_path, 'rb') as file, self.settings(CSV_FILES_DIR=str(Path(self.temp_dir) / 'typed')):
+            response = self.client.post(reverse('cleaner-type-infer'), {'document': file}, format='multipart',
+                                        HTTP_X_API_KEY=settings.API_KEY, HTTP_ACCEPT='application/json')
+            columns = {column['name']: column['pandasType'] for column in response.json()['columns']}
+
+            metadata = self.client.get(reverse('fetch-file-metadata', args=['sample_data.csv']),
+                                       HTTP_X_API_KEY=settings.API_KEY).json()
+            self.assertIn('typed_download_url', metadata)
+
+            response = self.client.get(reverse('fetch-typed-file', args=['sample_data.csv']),
+                                       HTTP_X_API_KEY=settings.API_KEY)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'application/vnd.apache.parquet')
+            self.assertIn('sample_data.parquet', response['Content-Disposition'])
+
+            df = pd.read_parquet(io.BytesIO(b''.join(response.streaming_content)))
+            self.assertEqual({column: str(dtype) for column, dtype in df.dtypes.items()}, columns)
+            self.assertEqual(len(df), 5)